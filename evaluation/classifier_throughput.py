@@ -0,0 +1,61 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+import intent_emotion_router as router
+
+
+def load_queries(file_path, limit=None):
+    """Load query strings from the intent test set"""
+    with open(file_path, 'r') as f:
+        queries = [item['query'] for item in json.load(f)]
+    return queries[:limit] if limit else queries
+
+def run_concurrent(fn, queries, callers):
+    """Call fn for every query from `callers` threads; return (results, seconds)"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(fn, queries))
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Classifier throughput under concurrent callers: direct vs micro-batched.")
+    parser.add_argument("--data", default="evaluation/intent_test_data.json")
+    parser.add_argument("--limit", type=int, default=64)
+    parser.add_argument("--callers", type=int, default=16, help="Simulated concurrent /chat requests")
+    args = parser.parse_args()
+
+    queries = load_queries(args.data, args.limit)
+    router.nli_intent(queries[0])          # warm-up both models
+    router.detect_emotion_many(queries[:1])
+
+    stages = {
+        "intent":  (router.nli_intent,     router._intent_batcher()),
+        "emotion": (lambda q: router.detect_emotion_many([q])[0], router._emotion_batcher()),
+    }
+    print(f"{len(queries)} queries, {args.callers} concurrent callers, "
+          f"max batch {router.MICROBATCH_MAX_SIZE}, max wait {router.MICROBATCH_MAX_WAIT_MS} ms")
+
+    for name, (direct, batcher) in stages.items():
+        expected, t_direct = run_concurrent(direct, queries, args.callers)
+        got, t_batched = run_concurrent(batcher.submit, queries, args.callers)
+
+        # every caller must receive the result for its own message
+        mismatches = sum(
+            (a[0] != b[0]) if isinstance(a, tuple) else (a != b)
+            for a, b in zip(expected, got)
+        )
+        print(f"\n[{name}]")
+        print(f"  direct      {len(queries) / t_direct:7.2f} msg/s")
+        print(f"  microbatch  {len(queries) / t_batched:7.2f} msg/s   "
+              f"(avg batch {batcher.items / max(batcher.batches, 1):.1f})")
+        print(f"  mismatched results: {mismatches}")
+        if mismatches:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Crawl fixture pages from a local HTTP server and check the concurrent crawler.
+
+The server answers on 127.0.0.1 and localhost (two "domains" for the
+politeness limit), adds --latency-ms to every response and fails the first
+request for every --flaky-every'th page with a 503 to exercise retries.
+
+  python evaluation/crawl_benchmark.py --pages 60 --concurrency 1,8 --domain-rps 5
+
+Checks, per run: every page's marker text reached the output file, flaky
+pages were retried successfully, and no domain was hit faster than
+--domain-rps. Exits non-zero if any check fails.
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from kb_ingest import crawl
+
+PAGE = """<html><head><title>Fixture {n}</title></head><body>
+<nav>menu</nav>
+<article><h1>Fixture page {n}</h1>
+<p>MARKER-{n} VERSION-{v} The Perodua Bezza and Honda City are popular sedans in Malaysia.
+This paragraph has enough words to pass the crawler word count threshold easily.</p>
+{filler}</article></body></html>"""
+
+
+class FixtureServer:
+    """Threaded server for /page/<n>; records (host, path, time) per request.
+
+    Pages carry an ETag per version and honour If-None-Match; bump
+    ``versions[n]`` to change a page, add n to ``removed`` to make it 404.
+    ``page_kb`` pads every page with roughly that many KB of paragraphs.
+    """
+
+    def __init__(self, latency_ms: float, flaky_every: int, page_kb: int = 0):
+        fixture = self
+        filler = "".join(f"<p>Filler paragraph {i}: " + "lorem ipsum dolor sit amet " * 35 + "</p>\n"
+                         for i in range(page_kb))
+        self.hits = []
+        self.lock = threading.Lock()
+        self.failed_once = set()
+        self.versions: dict[int, int] = defaultdict(int)
+        self.removed: set[int] = set()
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if not self.path.startswith("/page/"):
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                n = int(self.path.rsplit("/", 1)[1])
+                host = self.headers.get("Host", "").split(":")[0]
+                with fixture.lock:
+                    fixture.hits.append((host, self.path, time.monotonic()))
+                    fail = flaky_every and n % flaky_every == 0 and n not in fixture.failed_once
+                    if fail:
+                        fixture.failed_once.add(n)
+                    version, gone = fixture.versions[n], n in fixture.removed
+                time.sleep(latency_ms / 1000)
+                etag = f'"{n}-{version}"'
+                if not (fail or gone) and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                status = 404 if gone else 503 if fail else 200
+                page = PAGE.format(n=n, v=version, filler=filler)
+                body = b"gone" if gone else b"busy" if fail else page.encode()
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self.lock:
+            self.hits.clear()
+            self.failed_once.clear()
+            self.versions.clear()
+            self.removed.clear()
+
+    def min_gap_per_host(self):
+        per_host = defaultdict(list)
+        for host, _, t in self.hits:
+            per_host[host].append(t)
+        gaps = {}
+        for host, times in per_host.items():
+            times.sort()
+            gaps[host] = min((b - a for a, b in zip(times, times[1:])), default=float("inf"))
+        return gaps
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def fixture_urls(port, pages):
+    hosts = ("127.0.0.1", "localhost")
+    return [f"http://{hosts[n % 2]}:{port}/page/{n}" for n in range(pages)]
+
+def check(server, output, pages, flaky_every, domain_rps):
+    text = output.read_text(encoding="utf-8")
+    problems = [f"page {n} missing" for n in range(pages) if f"MARKER-{n}" not in text]
+    if flaky_every and not server.failed_once:
+        problems.append("no flaky page was served")
+    if domain_rps > 0:
+        limit = 1.0 / domain_rps * 0.9          # allow for timer jitter
+        for host, gap in server.min_gap_per_host().items():
+            if gap < limit:
+                problems.append(f"{host} hit {gap * 1000:.0f} ms apart (< {limit * 1000:.0f} ms)")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent crawler against local fixture pages.")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated values to compare")
+    parser.add_argument("--domain-rps", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--flaky-every", type=int, default=7, help="0 disables injected 503s")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.latency_ms, args.flaky_every)
+    urls = fixture_urls(server.port, args.pages)
+    failures = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for conc in (int(c) for c in args.concurrency.split(",")):
+                server.reset()
+                output = Path(tmp) / f"content_{conc}.md"
+                _, stats = asyncio.run(crawl(urls, concurrency=conc, domain_rps=args.domain_rps,
+                                             backoff=0.2, output=output))
+                problems = check(server, output, args.pages, args.flaky_every, args.domain_rps)
+                failures += len(problems)
+                print(f"concurrency {conc:>3}: {stats['done']} pages in {stats['elapsed_s']:.1f}s "
+                      f"({stats['pages_per_s']:.2f} pages/s), {stats['failed']} failed, "
+                      f"{len(server.hits)} requests")
+                for p in problems:
+                    print(f"   FAIL {p}")
+    finally:
+        server.close()
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
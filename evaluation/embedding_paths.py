@@ -0,0 +1,98 @@
+"""Container vs in-process embeddings: ingest throughput and query latency.
+
+Needs a running Weaviate with the text2vec-transformers module (the
+docker-compose setup). Two throw-away classes are ingested from the same
+synthetic pages, one vectorized by Weaviate ("container") and one with
+vectors from tools.embedder ("client", CLIENT_EMBEDDINGS=1); both are
+then queried with the intent test set. The client path is queried twice
+to show the memoized-query (LRU) latency. Classes are deleted afterwards;
+manifests and the term index go to a temporary directory.
+
+  python evaluation/embedding_paths.py --pages 40
+  EMBED_RUNTIME=onnx python evaluation/embedding_paths.py
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+import kb_ingest
+from kb_ingest import (
+    CrawledPage, CrawlManifest, PageIngester, build_retriever, class_name_for,
+    create_weaviate_client, reset_weaviate_client,
+)
+from microbench import synthetic_markdown
+from tools.embedder import EMBED_RUNTIME, embed
+
+MODES = {"container": False, "client": True}
+
+
+def load_queries(file_path, limit=None):
+    with open(file_path, "r") as f:
+        queries = [item["query"] for item in json.load(f)]
+    return queries[:limit] if limit else queries
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def use_mode(mode):
+    kb_ingest.CLIENT_EMBEDDINGS = kb_ingest.EMBEDS_LOCALLY = MODES[mode]
+
+def ingest(mode, pages, tmp_manifest):
+    use_mode(mode)
+    ingester = PageIngester(CrawlManifest(tmp_manifest))
+    start = time.perf_counter()
+    for n, md in enumerate(pages):
+        ingester.add(CrawledPage(f"https://bench-{mode}.example/page/{n}", md, 200))
+    report = ingester.close()
+    return report.get("chunks_uploaded", 0), time.perf_counter() - start
+
+def query_latencies(mode, queries):
+    use_mode(mode)
+    reset_weaviate_client()                       # fresh retriever for this mode
+    retriever = build_retriever(class_name_for(f"bench-{mode}.example"), k=8)
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        retriever.invoke(q)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Container vs client-side embedding paths.")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--sections-per-page", type=int, default=15)
+    parser.add_argument("--data", default="evaluation/intent_test_data.json")
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    pages = [synthetic_markdown(args.sections_per_page, seed=n) for n in range(args.pages)]
+    queries = load_queries(args.data, args.queries)
+    embed(["warm-up"])                                # load the local model up front
+    print(f"Local embedder runtime: {EMBED_RUNTIME}")
+
+    client = create_weaviate_client()
+    tmp = tempfile.TemporaryDirectory()
+    kb_ingest.TERM_INDEX_DIR = Path(tmp.name) / "term_index"
+    try:
+        for mode in MODES:
+            chunks, secs = ingest(mode, pages, Path(tmp.name) / f"bench_manifest_{mode}.json")
+            print(f"[{mode:<9}] ingest  {chunks} chunks in {secs:.1f}s  ({chunks / secs:.1f} chunks/s)")
+        for mode, label in (("container", "container"), ("client", "client cold"),
+                            ("client", "client LRU")):
+            lat = query_latencies(mode, queries)
+            print(f"[{label:<11}] query  p50 {statistics.median(lat):7.1f} ms   "
+                  f"p95 {percentile(lat, 95):7.1f} ms")
+    finally:
+        for mode in MODES:
+            class_name = class_name_for(f"bench-{mode}.example")
+            if client.schema.exists(class_name):
+                client.schema.delete_class(class_name)
+        tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Latency and precision of the term-index fast path on entity-style queries.
+
+  python evaluation/entity_lookup.py --models 10 --filler-pages 40
+
+Catalogue pages (one per model, one "## <model> <trim>" section per trim
+with its price) and synthetic filler pages are ingested into a temporary
+local vector index and term index (RETRIEVER_BACKEND=local). Each query
+is then answered by vector search alone and by hybrid_search(); the query
+embedding cache is cleared before every vector call so both sides pay
+for a cold query. "hit@1" counts answers whose first snippet names the
+asked model and trim. The term lookup is also timed on the intent test
+set, i.e. what it adds to queries that fall through to vector search.
+Needs the embedding model (tools.embedder).
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+import kb_ingest
+from kb_ingest import CrawledPage, CrawlManifest, PageIngester, hybrid_search, local_search, term_lookup
+from microbench import synthetic_markdown
+from tools.embedder import _embed_query, embed
+
+MODELS = ("Perodua Bezza", "Perodua Myvi", "Perodua Axia", "Perodua Alza", "Perodua Aruz",
+          "Proton Saga", "Proton Persona", "Proton X50", "Honda City", "Honda Civic",
+          "Toyota Vios", "Toyota Yaris")
+TRIMS = ("1.0 Standard", "1.3 Premium", "1.5 AV", "1.5 Executive")
+CLASS = "Domain_bench_example"
+
+
+def catalogue_page(model, rng):
+    out = [f"# {model}", f"All {model} variants, prices and specifications."]
+    for trim in TRIMS:
+        out.append(f"## {model} {trim}")
+        out.append(f"The {model} {trim} price is RM {rng.randint(30, 150)},{rng.randint(100, 999)} "
+                   f"on the road without insurance, with a {trim.split()[0]}L engine, "
+                   f"{rng.randint(4, 7)} airbags and a {rng.randint(3, 5)}-year warranty.")
+    return "\n\n".join(out)
+
+def entity_queries(models):
+    return [(m, t, q) for m in models for t in TRIMS
+            for q in (f"What's the price of {m.split()[1]} {t}?", f"{m} {t} price")]
+
+def timed(fn):
+    start = time.perf_counter()
+    docs = fn()
+    return docs, (time.perf_counter() - start) * 1000
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Term-index fast path vs vector search.")
+    parser.add_argument("--models", type=int, default=len(MODELS))
+    parser.add_argument("--filler-pages", type=int, default=40)
+    parser.add_argument("--data", default="evaluation/intent_test_data.json")
+    parser.add_argument("-k", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    models = MODELS[:args.models]
+    with tempfile.TemporaryDirectory() as tmp:
+        kb_ingest.RETRIEVER_BACKEND, kb_ingest.EMBEDS_LOCALLY, kb_ingest.TERM_INDEX = "local", True, True
+        kb_ingest.INDEX_DIR, kb_ingest.TERM_INDEX_DIR = Path(tmp) / "vectors", Path(tmp) / "terms"
+        embed(["warm-up"])
+        ingester = PageIngester(CrawlManifest(Path(tmp) / "manifest.json"))
+        for n, model in enumerate(models):
+            ingester.add(CrawledPage(f"https://bench.example/cars/{n}", catalogue_page(model, rng), 200))
+        for n in range(args.filler_pages):
+            ingester.add(CrawledPage(f"https://bench.example/page/{n}", synthetic_markdown(15, seed=n), 200))
+        report = ingester.close()
+        print(f"Indexed {report.get('chunks_uploaded', 0)} chunks "
+              f"({len(models)} catalogue + {args.filler_pages} filler pages)")
+
+        def vector(q):
+            _embed_query.cache_clear()
+            return local_search(CLASS, q, None, args.k)
+
+        results = {"vector": ([], 0), "hybrid": ([], 0)}
+        exact = 0
+        for model, trim, q in entity_queries(models):
+            exact += term_lookup(CLASS, q, None, args.k)[1]
+            for name, run in (("vector", lambda: vector(q)),
+                              ("hybrid", lambda: hybrid_search(CLASS, q, None, args.k, lambda: vector(q)))):
+                docs, ms = timed(run)
+                lat, hits = results[name]
+                lat.append(ms)
+                results[name] = (lat, hits + bool(docs and f"{model} {trim}" in docs[0].page_content))
+
+        total = len(entity_queries(models))
+        print(f"\n{total} entity queries, {exact} answered from the term index alone")
+        print(f"{'path':>8} {'p50 ms':>8} {'p95 ms':>8} {'hit@1':>7}")
+        for name, (lat, hits) in results.items():
+            print(f"{name:>8} {statistics.median(lat):>8.2f} {percentile(lat, 95):>8.2f} {hits / total:>7.0%}")
+
+        with open(args.data, "r") as f:
+            other = [item["query"] for item in json.load(f)]
+        overhead = [timed(lambda: term_lookup(CLASS, q, None, args.k))[1] for q in other]
+        print(f"\nTerm lookup on {len(other)} intent test queries: "
+              f"p50 {statistics.median(overhead):.3f} ms, p95 {percentile(overhead, 95):.3f} ms")
+
+if __name__ == "__main__":
+    main()
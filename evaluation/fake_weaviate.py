@@ -0,0 +1,213 @@
+"""In-memory stand-in for the parts of the Weaviate REST/GraphQL API that
+kb_ingest and chat_engine use (meta, readiness, schema and property
+creation, batch import, object get / list / delete, nearText and nearVector Get
+queries). nearText ranking is
+plain word overlap and nearVector a dot product – good enough for load
+tests and connection-reuse checks, not for relevance.
+"""
+import json
+import re
+import socket
+import threading
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_CLASS_RE   = re.compile(r"Get\s*\{\s*(\w+)")
+_LIMIT_RE   = re.compile(r"limit:\s*(\d+)")
+_CONCEPT_RE = re.compile(r'concepts:\s*\[\s*"((?:[^"\\]|\\.)*)"')
+_FILTER_RE  = re.compile(r'path:\s*\[\s*"(\w+)"\s*\]\s*operator:\s*Equal\s*valueText:\s*"((?:[^"\\]|\\.)*)"')
+_VECTOR_RE  = re.compile(r"nearVector:\s*\{\s*vector:\s*\[([^\]]*)\]")
+_FIELDS_RE  = re.compile(r"\)\s*\{((?:[^{}]|\{[^{}]*\})*)\}")
+_NESTED_RE  = re.compile(r"_additional\s*\{[^{}]*\}")
+_WORD_RE    = re.compile(r"\w+")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"          # keep-alive, so reuse is observable
+
+    def log_message(self, *args):          # keep benchmark output quiet
+        pass
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload if payload is not None else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        fake = self.server.fake
+        fake._count_request()
+        if self.path.startswith("/v1/.well-known/ready") or self.path.startswith("/v1/.well-known/live"):
+            return self._send(200)
+        if self.path.startswith("/v1/meta"):
+            return self._send(200, {"version": "1.24.1", "modules": {}})
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts == ["v1", "schema"]:
+            return self._send(200, {"classes": list(fake.schema.values())})
+        if parts[:2] == ["v1", "schema"] and len(parts) == 3 and parts[2] in fake.schema:
+            return self._send(200, fake.schema[parts[2]])
+        if parts == ["v1", "objects"]:                  # cursor listing: ?class=&limit=&after=
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            return self._send(200, {"objects": fake.list(query.get("class", [None])[0],
+                                                         int(query.get("limit", ["25"])[0]),
+                                                         query.get("after", [None])[0])})
+        if parts[:2] == ["v1", "objects"] and len(parts) == 4:
+            props = fake.get(parts[2], parts[3])
+            if props is not None:
+                return self._send(200, {"class": parts[2], "id": parts[3], "properties": props})
+        return self._send(404, {"error": [{"message": "not found"}]})
+
+    def do_POST(self):
+        fake = self.server.fake
+        fake._count_request()
+        body = self._body()
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts == ["v1", "schema"]:
+            fake.schema[body["class"]] = body
+            return self._send(200, body)
+        if parts[:2] == ["v1", "schema"] and parts[3:] == ["properties"] and parts[2] in fake.schema:
+            fake.schema[parts[2]].setdefault("properties", []).append(body)
+            return self._send(200, body)
+        if self.path.startswith("/v1/batch/objects"):
+            return self._send(200, fake._import(body.get("objects", [])))
+        if self.path.startswith("/v1/graphql"):
+            return self._send(200, fake._graphql(body.get("query", "")))
+        return self._send(404, {"error": [{"message": "not found"}]})
+
+    def do_DELETE(self):
+        fake = self.server.fake
+        fake._count_request()
+        parts = self.path.split("?")[0].strip("/").split("/")      # v1/objects/[class/]id
+        if parts[:2] == ["v1", "objects"] and len(parts) in (3, 4):
+            if fake._delete(parts[2] if len(parts) == 4 else None, parts[-1]):
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        return self._send(404, {"error": [{"message": "not found"}]})
+
+
+class FakeWeaviate:
+    """Threaded fake Weaviate server on 127.0.0.1; use as a context manager."""
+
+    def __init__(self, port: int = 0):
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._lock = threading.Lock()
+        self.schema: dict[str, dict] = {}
+        self.objects: dict[str, dict[str, dict]] = {}
+        self.connections = 0
+        self.requests = 0
+        self._open: list[socket.socket] = []
+
+        accept = self._server.get_request
+
+        def counting_accept():
+            conn = accept()
+            with self._lock:
+                self.connections += 1
+                self._open.append(conn[0])
+            return conn
+        self._server.get_request = counting_accept
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        """Stop like a real server would, dropping keep-alive connections too."""
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            for conn in self._open:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def add_objects(self, class_name: str, objects: list[dict]):
+        """Seed ``class_name`` with property dicts (content, category, headers…).
+        Objects seeded under ``"*"`` answer queries for any unknown class."""
+        self._import([{"class": class_name, "properties": o, "id": str(uuid.UUID(int=i))}
+                      for i, o in enumerate(objects, len(self.objects.get(class_name, {})))])
+
+    # ── request handlers ────────────────────────────────────────────────
+    def _count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def _import(self, objects):
+        with self._lock:
+            for o in objects:
+                props = dict(o["properties"])
+                if o.get("vector") is not None:
+                    props["_vector"] = o["vector"]
+                self.objects.setdefault(o["class"], {})[str(o.get("id"))] = props
+        return [{**o, "result": {}} for o in objects]
+
+    def _delete(self, class_name, uid) -> bool:
+        with self._lock:
+            for cls in ([class_name] if class_name else list(self.objects)):
+                if self.objects.get(cls, {}).pop(uid, None) is not None:
+                    return True
+        return False
+
+    def get(self, class_name: str, uid: str) -> dict | None:
+        with self._lock:
+            props = self.objects.get(class_name, {}).get(uid)
+        return None if props is None else {k: v for k, v in props.items() if k != "_vector"}
+
+    def list(self, class_name: str, limit: int, after: str | None = None) -> list[dict]:
+        """Objects of ``class_name`` in id order after ``after`` (cursor API)."""
+        with self._lock:
+            ids = sorted(uid for uid in self.objects.get(class_name, {}) if after is None or uid > after)
+        return [{"class": class_name, "id": uid, "properties": self.get(class_name, uid)}
+                for uid in ids[:limit]]
+
+    def count(self, class_name: str | None = None) -> int:
+        with self._lock:
+            return sum(len(objs) for cls, objs in self.objects.items()
+                       if class_name in (None, cls))
+
+    def _graphql(self, query: str):
+        cls = _CLASS_RE.search(query)
+        if not cls:
+            return {"errors": [{"message": "unsupported query"}]}
+        cls = cls.group(1)
+        limit   = int((_LIMIT_RE.search(query) or [None, 10])[1])
+        concept = (_CONCEPT_RE.search(query) or [None, ""])[1]
+        fields  = (_FIELDS_RE.search(query) or [None, "content"])[1]
+        with_id = bool(_NESTED_RE.search(fields))
+        fields  = _NESTED_RE.sub(" ", fields).split()
+        filt    = _FILTER_RE.search(query)
+
+        terms = set(_WORD_RE.findall(concept.lower()))
+        with self._lock:
+            rows = [{**props, "_id": uid} for uid, props
+                    in self.objects.get(cls, self.objects.get("*", {})).items()]
+        if filt:
+            rows = [r for r in rows if r.get(filt.group(1)) == filt.group(2)]
+        vector = _VECTOR_RE.search(query)
+        if vector:              # dot product (vectors are normalized); unvectorized rows last
+            q = [float(x) for x in vector.group(1).split(",") if x.strip()]
+            rows.sort(key=lambda r: -sum(a * b for a, b in zip(q, r["_vector"]))
+                      if r.get("_vector") else float("inf"))
+        else:
+            rows.sort(key=lambda r: -len(terms & set(_WORD_RE.findall(str(r.get("content", "")).lower()))))
+        hits = [{**{f: r.get(f) for f in fields if not f.startswith("_")},
+                 **({"_additional": {"id": r["_id"]}} if with_id else {})} for r in rows[:limit]]
+        return {"data": {"Get": {cls: hits}}}
@@ -0,0 +1,90 @@
+"""Two ingest runs over local fixture pages to check incremental re-ingestion.
+
+Before run 1 the class is seeded with objects under the pre-manifest
+content-only UUIDs, as an older ingest left them; run 1 (no manifest yet)
+must sweep them. Run 1 ingests every page. Between runs one page changes, one starts
+returning 404 and one is dropped from the URL list; run 2 should then
+upload only the changed page, answer the rest with 304s, delete the two
+removed pages' chunks, and leave the fake Weaviate holding exactly the
+chunks recorded in the manifest.
+
+  python evaluation/incremental_ingest.py --pages 30
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from crawl_benchmark import FixtureServer, fixture_urls
+from fake_weaviate import FakeWeaviate
+import kb_ingest
+from kb_ingest import CrawlManifest, class_name_for, crawl, domain_from_url, ingest_pages
+
+LEGACY_OBJECTS = 5
+
+
+def run_once(urls, manifest, output, listed_domains):
+    first_run = not manifest.path.exists()
+    pages, stats = asyncio.run(crawl(urls, validators=manifest.validators(), output=output,
+                                     domain_rps=0, backoff=0.1))
+    listed = set(urls)
+    removed = [u for u in manifest.pages if u not in listed and domain_from_url(u) in listed_domains]
+    sweep = [class_name_for(d) for d in listed_domains] if first_run else []
+    return ingest_pages(pages, manifest, removed, sweep=sweep), stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental re-ingestion against fixture pages.")
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    server = FixtureServer(latency_ms=20, flaky_every=0)
+    urls = fixture_urls(server.port, args.pages)
+    domains = {domain_from_url(u) for u in urls}
+    problems = []
+    try:
+        with FakeWeaviate() as fake, tempfile.TemporaryDirectory() as tmp:
+            os.environ["WEAVIATE_URL"] = fake.url
+            kb_ingest.TERM_INDEX_DIR = Path(tmp) / "term_index"
+            manifest = CrawlManifest(Path(tmp) / "manifest.json")
+            output = Path(tmp) / "content.md"
+
+            for domain in domains:               # leftovers of an ingest from before the manifest
+                fake.add_objects(class_name_for(domain), [{"content": f"old chunk {i}", "category": "Old"}
+                                                          for i in range(LEGACY_OBJECTS)])
+
+            first, _ = run_once(urls, manifest, output, domains)
+            print(f"run 1: {first}")
+            if first.get("pages_new") != args.pages:
+                problems.append(f"run 1 ingested {first.get('pages_new')} of {args.pages} pages")
+            if first.get("chunks_swept") != LEGACY_OBJECTS * len(domains):
+                problems.append(f"run 1 swept {first.get('chunks_swept')} pre-manifest objects, "
+                                f"expected {LEGACY_OBJECTS * len(domains)}")
+
+            server.versions[1] += 1                 # changed
+            server.removed.add(2)                   # 404
+            second_urls = [u for u in urls if not u.endswith("/page/3")]   # dropped from list
+
+            second, stats = run_once(second_urls, manifest, output, domains)
+            print(f"run 2: {second}")
+            print(f"       {stats['not_modified']} of {len(second_urls)} pages answered 304")
+            expected = {"pages_changed": 1, "pages_removed": 2,
+                        "pages_not_modified": len(second_urls) - 2}
+            for key, want in expected.items():
+                if second.get(key, 0) != want:
+                    problems.append(f"run 2 {key} = {second.get(key, 0)}, expected {want}")
+            stored = sum(len(e["chunks"]) for e in manifest.pages.values())
+            if fake.count() != stored:
+                problems.append(f"Weaviate holds {fake.count()} objects, manifest lists {stored}")
+    finally:
+        server.close()
+
+    for p in problems:
+        print(f"FAIL {p}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
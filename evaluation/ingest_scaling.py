@@ -0,0 +1,71 @@
+"""Ingest cost vs number of domains: old whole-corpus-per-domain loop vs
+split-once routing, both uploading into an in-memory fake Weaviate.
+
+  python evaluation/ingest_scaling.py --domains 1,2,4 --pages-per-domain 20
+
+For each domain count a synthetic content.md dump is built (pages named
+https://siteN.example/page/M). "legacy" re-splits and uploads the full
+corpus into every domain class, as main() used to; "routed" is
+ingest_markdown(), which sends each page's chunks only to its own class.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import NAMESPACE_URL, uuid5
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from fake_weaviate import FakeWeaviate
+from microbench import synthetic_markdown
+import kb_ingest
+from kb_ingest import (
+    CrawlManifest, _chunk_object, class_name_for, create_weaviate_client, ensure_class,
+    ingest_markdown, split_markdown,
+)
+
+
+def build_dump(domains, pages_per_domain, sections_per_page):
+    parts = []
+    for d in range(domains):
+        for p in range(pages_per_domain):
+            url = f"https://site{d}.example/page/{p}"
+            parts.append(f"## {url}\n\n{synthetic_markdown(sections_per_page, seed=d * 1000 + p)}\n\n")
+    return "".join(parts)
+
+def legacy_ingest(md_text, domains):
+    """The pre-routing main(): every domain class gets the whole corpus."""
+    client = create_weaviate_client()
+    client.batch.configure(batch_size=100, dynamic=True, timeout_retries=3)
+    for d in range(domains):
+        class_name = class_name_for(f"site{d}.example")
+        ensure_class(client, class_name)
+        with client.batch as batch:
+            for doc in split_markdown(md_text):
+                batch.add_data_object(_chunk_object(doc, ""), class_name,
+                                      uuid=uuid5(NAMESPACE_URL, doc.page_content))
+
+def main():
+    parser = argparse.ArgumentParser(description="Legacy vs split-once ingestion across domains.")
+    parser.add_argument("--domains", default="1,2,4")
+    parser.add_argument("--pages-per-domain", type=int, default=10)
+    parser.add_argument("--sections-per-page", type=int, default=12)
+    args = parser.parse_args()
+
+    print(f"{'domains':>7} {'mode':>7} {'seconds':>9} {'objects':>9}")
+    for domains in (int(d) for d in args.domains.split(",")):
+        md_text = build_dump(domains, args.pages_per_domain, args.sections_per_page)
+        for mode in ("legacy", "routed"):
+            with FakeWeaviate() as fake, tempfile.TemporaryDirectory() as tmp:
+                os.environ["WEAVIATE_URL"] = fake.url
+                kb_ingest.TERM_INDEX_DIR = Path(tmp) / "term_index"
+                start = time.perf_counter()
+                if mode == "legacy":
+                    legacy_ingest(md_text, domains)
+                else:
+                    ingest_markdown(md_text, manifest=CrawlManifest(Path(tmp) / "manifest.json"))
+                elapsed = time.perf_counter() - start
+                print(f"{domains:>7} {mode:>7} {elapsed:>9.2f} {fake.count():>9}")
+
+if __name__ == "__main__":
+    main()
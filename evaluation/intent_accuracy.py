@@ -1,4 +1,6 @@
+import argparse
 import json
+import time
 import pandas as pd
 import numpy as np
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
@@ -7,7 +9,11 @@ import seaborn as sns
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-from intent_emotion_router import classify_intent
+import intent_emotion_router
+from intent_emotion_router import (
+    DISTILLED_MIN_CONFIDENCE, DISTILLED_MODEL_PATH, _distilled_model, _emotion_pipe, _intent_pipe,
+    classify_intent_staged, detect_emotion_many, embedding_intent, nli_intent,
+)
 from dotenv import load_dotenv
 import os
 
@@ -21,7 +27,7 @@ def load_test_data(file_path):
     with open(file_path, 'r') as f:
         return json.load(f)
 
-def evaluate_intent_classifier(test_data):
+def evaluate_intent_classifier(test_data, cascade_margin=None, distilled_min_confidence=None):
     """Evaluate intent classifier on test data"""
     results = []
     
@@ -30,17 +36,90 @@ def evaluate_intent_classifier(test_data):
         true_intent = item['intent']
         
         # Get prediction from your classifier
-        predicted_intent = classify_intent(query)
+        start = time.perf_counter()
+        predicted_intent, stage = classify_intent_staged(query, cascade_margin,
+                                                         distilled_min_confidence)
+        latency_ms = (time.perf_counter() - start) * 1000
         
         results.append({
             'query': query,
             'true_intent': true_intent,
             'predicted_intent': predicted_intent,
-            'correct': predicted_intent == true_intent
+            'correct': predicted_intent == true_intent,
+            'stage': stage,
+            'latency_ms': latency_ms
         })
     
     return pd.DataFrame(results)
 
+def summarize_configuration(name, results_df):
+    """Accuracy, latency and NLI fallback rate for one classifier configuration"""
+    non_keyword = results_df[results_df['stage'] != 'keyword']
+    return {
+        'config': name,
+        'accuracy': accuracy_score(results_df['true_intent'], results_df['predicted_intent']),
+        'mean_latency_ms': results_df['latency_ms'].mean(),
+        'p95_latency_ms': results_df['latency_ms'].quantile(0.95),
+        # share of non-keyword queries that still needed the NLI model
+        'nli_fallback_rate': (non_keyword['stage'] == 'nli').mean() if len(non_keyword) else 0.0
+    }
+
+def distilled_unseen(test_data):
+    """Test items train_intent.py held out of the distilled model's training.
+    The rest of the test set is in its training data, so scoring it there
+    would overstate its accuracy. Empty for --holdout 0 or older artifacts."""
+    holdout = set(_distilled_model().holdout)
+    return [item for item in test_data if item['query'] in holdout]
+
+def compare_distilled(unseen):
+    """NLI only vs the distilled model on the same unseen test items"""
+    summaries = [summarize_configuration("nli_only", evaluate_intent_classifier(unseen))]
+    for threshold in (0.0, DISTILLED_MIN_CONFIDENCE):
+        distilled_df = evaluate_intent_classifier(unseen, distilled_min_confidence=threshold)
+        summaries.append(summarize_configuration(f"distilled@{threshold:g}", distilled_df))
+    return pd.DataFrame(summaries)
+
+def use_runtime(runtime):
+    """Switch the router's classifiers to ``runtime``; they reload on next use"""
+    intent_emotion_router.CLASSIFIER_RUNTIME = runtime
+    _intent_pipe.cache_clear()
+    _emotion_pipe.cache_clear()
+
+def compare_runtimes(test_data, runtimes):
+    """NLI-only accuracy and latency plus emotion latency per classifier runtime.
+
+    Agreement columns are measured against the first runtime listed, so put
+    the reference (normally torch) first.
+    """
+    queries = [item['query'] for item in test_data]
+    summaries, reference = [], None
+    for runtime in runtimes:
+        use_runtime(runtime)
+        start = time.perf_counter()
+        nli_intent(queries[0])
+        detect_emotion_many([queries[0]])
+        load_s = time.perf_counter() - start          # includes the one-off export
+
+        results_df = evaluate_intent_classifier(test_data)
+        emotions, emotion_ms = [], []
+        for q in queries:
+            start = time.perf_counter()
+            emotions.append(detect_emotion_many([q])[0])
+            emotion_ms.append((time.perf_counter() - start) * 1000)
+        intents = results_df['predicted_intent'].tolist()
+        if reference is None:
+            reference = (intents, emotions)
+
+        summary = summarize_configuration(runtime, results_df)
+        summary.update({
+            'intent_agreement': np.mean([a == b for a, b in zip(intents, reference[0])]),
+            'emotion_mean_latency_ms': np.mean(emotion_ms),
+            'emotion_agreement': np.mean([a == b for a, b in zip(emotions, reference[1])]),
+            'load_s': load_s,
+        })
+        summaries.append(summary)
+    return pd.DataFrame(summaries)
+
 def compute_metrics(results_df):
     """Compute classification metrics"""
     y_true = results_df['true_intent']
@@ -84,6 +163,14 @@ def analyze_errors(results_df):
     return errors
 
 def main():
+    parser = argparse.ArgumentParser(description="Evaluate intent classifier configurations.")
+    parser.add_argument("--margins", default="0.02,0.05,0.10",
+                        help="Comma-separated embedding-cascade margins to compare against NLI only")
+    parser.add_argument("--runtimes", default="",
+                        help="Comma-separated classifier runtimes to compare, reference first "
+                             "(e.g. torch,onnx,onnx-int8)")
+    args = parser.parse_args()
+
     # Define output directory inside evaluation
     output_dir = Path(__file__).parent / "output"
     output_dir.mkdir(exist_ok=True)
@@ -91,8 +178,12 @@ def main():
     # Load test data
     test_data = load_test_data('evaluation/intent_test_data.json')
     print(f"Loaded {len(test_data)} test examples")
+
+    # Warm up models so load time does not skew latency
+    nli_intent(test_data[0]['query'])
+    embedding_intent(test_data[0]['query'])
     
-    # Evaluate classifier
+    # Evaluate classifier (NLI only)
     results_df = evaluate_intent_classifier(test_data)
     
     # Compute metrics
@@ -118,6 +209,36 @@ def main():
     # Save results
     results_df.to_csv(output_dir / "classification_results.csv", index=False)
     errors.to_csv(output_dir / "misclassifications.csv", index=False)
+
+    # Compare embedding-cascade configurations against NLI only
+    summaries = [summarize_configuration("nli_only", results_df)]
+    for margin in (float(m) for m in args.margins.split(",") if m):
+        cascade_df = evaluate_intent_classifier(test_data, cascade_margin=margin)
+        summaries.append(summarize_configuration(f"cascade@{margin:g}", cascade_df))
+    summary_df = pd.DataFrame(summaries)
+    print("\nConfiguration comparison:")
+    print(summary_df.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    summary_df.to_csv(output_dir / "configuration_summary.csv", index=False)
+
+    # Distilled model (train_intent.py), only on the test queries it never trained on
+    if DISTILLED_MODEL_PATH.exists():
+        unseen = distilled_unseen(test_data)
+        if not unseen:
+            print("\nDistilled model: no held-out test queries in the artifact; "
+                  "retrain with train_intent.py --holdout > 0 to compare it")
+        else:
+            distilled_df = compare_distilled(unseen)
+            print(f"\nDistilled model on the {len(unseen)} test queries it was not trained on:")
+            print(distilled_df.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+            distilled_df.to_csv(output_dir / "distilled_holdout_summary.csv", index=False)
+
+    # Compare classifier runtimes (accuracy vs latency, agreement with the first)
+    runtimes = [r for r in args.runtimes.split(",") if r]
+    if runtimes:
+        runtime_df = compare_runtimes(test_data, runtimes)
+        print("\nRuntime comparison:")
+        print(runtime_df.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        runtime_df.to_csv(output_dir / "runtime_summary.csv", index=False)
     
     print("\nResults saved to evaluation/output directory")
 
@@ -0,0 +1,68 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from intent_emotion_router import LABEL_HYPOTHESES, _intent_pipe, nli_intent
+
+
+def load_queries(file_path, limit=None):
+    """Load query strings from the intent test set"""
+    with open(file_path, 'r') as f:
+        queries = [item['query'] for item in json.load(f)]
+    return queries[:limit] if limit else queries
+
+def nli_intent_sequential(msg):
+    """Reference path: one NLI forward pass per hypothesis (pre-batching)"""
+    nli = _intent_pipe()
+    best, score = None, 0.0
+    for intent, hyps in LABEL_HYPOTHESES.items():
+        for hyp in hyps:
+            res   = nli(f"{msg} </s></s> {hyp}")[0]
+            ent_d = next((x for x in res if x["label"].lower() == "entailment"), None)
+            if ent_d and ent_d["score"] > score:
+                best, score = intent, ent_d["score"]
+    return best, score
+
+def time_per_message(fn, queries):
+    """Return (per-message latencies in ms, predictions)"""
+    latencies, preds = [], []
+    for q in queries:
+        start = time.perf_counter()
+        preds.append(fn(q))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, preds
+
+def summarise(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(f"{name:<22} mean {statistics.mean(latencies):8.1f} ms   "
+          f"p50 {statistics.median(latencies):8.1f} ms   p95 {p95:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-message NLI intent latency: sequential vs batched.")
+    parser.add_argument("--data", default="evaluation/intent_test_data.json")
+    parser.add_argument("--limit", type=int, default=30, help="Number of queries to time")
+    parser.add_argument("--batch-sizes", default="8,16,48", help="Comma-separated batch sizes")
+    args = parser.parse_args()
+
+    queries = load_queries(args.data, args.limit)
+    print(f"Timing {len(queries)} queries against "
+          f"{sum(len(h) for h in LABEL_HYPOTHESES.values())} hypotheses")
+
+    nli_intent(queries[0])  # warm-up: load model, allocate buffers
+
+    baseline, base_preds = time_per_message(nli_intent_sequential, queries)
+    summarise("sequential", baseline)
+
+    for bs in (int(b) for b in args.batch_sizes.split(",")):
+        lat, preds = time_per_message(lambda q: nli_intent(q, batch_size=bs), queries)
+        agree = sum(a[0] == b[0] for a, b in zip(base_preds, preds))
+        summarise(f"batched (bs={bs})", lat)
+        print(f"{'':<22} speed-up x{statistics.mean(baseline) / statistics.mean(lat):.2f}   "
+              f"same best intent {agree}/{len(queries)}")
+
+if __name__ == "__main__":
+    main()
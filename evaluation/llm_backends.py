@@ -0,0 +1,89 @@
+import argparse
+import itertools
+import json
+import statistics
+import string
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from tools.llm_loader import LLMSettings, load_llm
+
+PROMPT_FILE = Path(__file__).parent.parent / "src" / "prompts" / "assistant_prompt.txt"
+QUESTIONS = [
+    "What's the price of the Bezza 1.3 Premium?",
+    "How do I reset my password?",
+    "Is the Honda City more fuel efficient than the Vios?",
+]
+
+
+def build_prompts():
+    """Return (constant prompt prefix, filled prompts)"""
+    template = PROMPT_FILE.read_text(encoding="utf-8")
+    prefix = next(string.Formatter().parse(template))[0]
+    return prefix, [template.format(emotion="neutral", intent="SalesInquiry",
+                                    context="", user=q) for q in QUESTIONS]
+
+def measure(llm, prompt, max_new_tokens):
+    """Return (time-to-first-token ms, total ms, generated tokens)"""
+    start = time.perf_counter()
+    first, pieces = None, []
+    for piece in llm(prompt, max_new_tokens=max_new_tokens, temperature=0.0, stream=True):
+        if first is None:
+            first = time.perf_counter()
+        pieces.append(piece)
+    end = time.perf_counter()
+    n_tokens = len(llm.tokenize("".join(pieces))) if pieces else 0
+    return (first - start) * 1000 if first else float("nan"), (end - start) * 1000, n_tokens
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LLM backends and CPU settings.")
+    parser.add_argument("--backends", default="ctransformers,llama_cpp")
+    parser.add_argument("--threads", default="", help="Comma-separated thread counts (default: from env)")
+    parser.add_argument("--batch-sizes", default="", help="Comma-separated prompt batch sizes")
+    parser.add_argument("--context-lengths", default="", help="Comma-separated context lengths")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--out", default="evaluation/output/llm_backends.json")
+    args = parser.parse_args()
+
+    def values(raw, cast):
+        return [cast(v) for v in raw.split(",") if v] or [None]
+
+    prefix, prompts = build_prompts()
+    results = []
+    grid = itertools.product(values(args.backends, str), values(args.threads, int),
+                             values(args.batch_sizes, int), values(args.context_lengths, int))
+    for backend, threads, batch_size, ctx in grid:
+        overrides = {"backend": backend}
+        if threads: overrides["threads"] = threads
+        if batch_size: overrides["batch_size"] = batch_size
+        if ctx: overrides["context_length"] = ctx
+        settings = LLMSettings.from_env(**overrides)
+
+        load_start = time.perf_counter()
+        llm = load_llm(prompt_prefix=prefix, settings=settings)
+        load_ms = (time.perf_counter() - load_start) * 1000
+        measure(llm, prompts[0], 4)                 # warm-up
+
+        runs = [measure(llm, p, args.max_new_tokens) for p in prompts]
+        ttft  = statistics.mean(r[0] for r in runs)
+        total = sum(r[1] for r in runs) / 1000
+        toks  = sum(r[2] for r in runs)
+        row = {
+            "backend": backend, "threads": settings.threads, "batch_size": settings.batch_size,
+            "context_length": settings.context_length, "load_ms": round(load_ms),
+            "ttft_ms": round(ttft, 1), "tokens_per_sec": round(toks / total, 2) if total else 0.0,
+        }
+        results.append(row)
+        print(f"{backend:<14} threads={settings.threads:<3} batch={settings.batch_size:<4} "
+              f"ctx={settings.context_length:<5} load {load_ms:7.0f} ms  "
+              f"TTFT {ttft:7.1f} ms  {row['tokens_per_sec']:6.2f} tok/s")
+        del llm
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    print(f"\nResults saved to {out}")
+
+if __name__ == "__main__":
+    main()
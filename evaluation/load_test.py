@@ -0,0 +1,214 @@
+"""End-to-end /chat load test.
+
+Replays queries from JSON (`[{"query": …}]`) or JSONL files at a fixed
+concurrency and reports throughput, p50/p95/p99 latency and error rates.
+
+  # against servers you started yourself (real models, real Weaviate)
+  python evaluation/load_test.py --targets flask=http://localhost:5000,asgi=http://localhost:5001
+
+  # self-contained: spawn the app with the stub LLM and an in-memory fake Weaviate
+  python evaluation/load_test.py --stub --servers flask,asgi --stub-tps 40
+
+Results are written as JSON; pass --compare <previous.json> to print deltas.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from fake_weaviate import FakeWeaviate
+
+ROOT = Path(__file__).parent.parent
+SERVER_COMMANDS = {
+    "flask": [sys.executable, str(ROOT / "src" / "app.py")],
+    "asgi":  [sys.executable, "-m", "uvicorn", "asgi_app:app", "--app-dir", str(ROOT / "src"),
+              "--host", "127.0.0.1", "--port", "{port}"],
+}
+STUB_DOCS = [
+    {"content": "The Perodua Bezza 1.3 Premium X is priced from RM 49,980 in Peninsular Malaysia.",
+     "category": "Sales", "headers": ["Perodua Bezza"]},
+    {"content": "To reset your password, open Account > Security and choose Reset password.",
+     "category": "Support", "headers": ["Account help"]},
+    {"content": "The Honda City 1.5 V uses an i-VTEC engine with a CVT and returns about 5.6 L/100 km.",
+     "category": "Specs", "headers": ["Honda City"]},
+    {"content": "Financing is available with down payments from 10% and tenures of up to 9 years.",
+     "category": "Sales", "headers": ["Car loans"]},
+]
+for _d in STUB_DOCS:
+    _d.update(snippet=_d["content"], token_count=len(_d["content"]) // 4 + 1)
+
+
+def load_queries(paths):
+    """Queries from .json lists or .jsonl lines (query / message / title field)"""
+    queries = []
+    for path in paths:
+        path = Path(path)
+        if not path.exists() and not path.is_absolute():
+            path = ROOT / path
+        if not path.exists():
+            print(f"  skipping missing {path}")
+            continue
+        if path.suffix == ".jsonl":
+            items = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+        else:
+            items = json.loads(path.read_text(encoding="utf-8"))
+        for item in items:
+            text = item.get("query") or item.get("message") or item.get("title")
+            if text:
+                queries.append(text)
+    return queries
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+async def run_target(base_url, queries, total, concurrency, timeout):
+    """Fire `total` POST /chat requests with `concurrency` in flight"""
+    latencies, statuses = [], {}
+    next_idx = 0
+
+    async def worker(client):
+        nonlocal next_idx
+        while next_idx < total:
+            i, next_idx = next_idx, next_idx + 1
+            start = time.perf_counter()
+            try:
+                resp = await client.post("/chat", json={"message": queries[i % len(queries)]})
+                status = resp.status_code
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    ok = statuses.get(200, 0)
+    return {
+        "url": base_url,
+        "requests": total,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(ok / wall, 3) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "error_rate": round(1 - ok / total, 4) if total else 0.0,
+        "busy_rate": round(statuses.get(503, 0) / total, 4) if total else 0.0,
+        "statuses": {str(k): v for k, v in statuses.items()},
+    }
+
+def wait_ready(base_url, proc, timeout):
+    """Poll /readyz until the spawned server has loaded its models"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{base_url} not ready after {timeout}s")
+
+def spawn_stub_server(kind, port, weaviate_url, tps):
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        "WEAVIATE_URL": weaviate_url,
+        "LLM_BACKEND": "stub",
+        "LLM_STUB_TPS": str(tps),
+        "RESPONSE_CACHE": "0",       # measure the full pipeline, not cache hits
+        "TIMING_LOG": "off",
+    }
+    cmd = [part.format(port=port) for part in SERVER_COMMANDS[kind]]
+    return subprocess.Popen(cmd, env=env, cwd=str(ROOT / "src"),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+def print_result(name, res, previous=None):
+    line = (f"  {res['throughput_rps']:.2f} req/s   p50 {res['p50_ms']} ms   p95 {res['p95_ms']} ms   "
+            f"p99 {res['p99_ms']} ms   errors {res['error_rate']:.1%}")
+    print(line)
+    if previous:
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate"):
+            old, new = previous.get(key), res.get(key)
+            if old:
+                print(f"    {key:<15} {old:>10} → {new:<10} ({(new - old) / old:+.1%})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /chat and record comparable JSON results.")
+    parser.add_argument("--targets", default="flask=http://localhost:5000,asgi=http://localhost:5001",
+                        help="Comma-separated name=url pairs of running servers (ignored with --stub)")
+    parser.add_argument("--stub", action="store_true",
+                        help="Spawn servers with the stub LLM and an in-memory fake Weaviate")
+    parser.add_argument("--servers", default="flask", help="With --stub: flask,asgi")
+    parser.add_argument("--stub-tps", type=float, default=40.0, help="Stub LLM tokens/sec")
+    parser.add_argument("--port", type=int, default=5100, help="With --stub: first port to use")
+    parser.add_argument("--data", default="evaluation/intent_test_data.json,requests.jsonl",
+                        help="Comma-separated .json/.jsonl query files to replay")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+    parser.add_argument("--out", default="evaluation/output/load_test.json")
+    parser.add_argument("--compare", help="Previous results JSON to diff against")
+    args = parser.parse_args()
+
+    queries = load_queries(args.data.split(","))
+    if not queries:
+        sys.exit("No queries loaded")
+    previous = json.loads(Path(args.compare).read_text())["results"] if args.compare else {}
+
+    results = {}
+    if args.stub:
+        with FakeWeaviate() as fake:
+            fake.add_objects("*", STUB_DOCS)
+            for i, kind in enumerate(args.servers.split(",")):
+                port = args.port + i
+                url = f"http://127.0.0.1:{port}"
+                print(f"[{kind}/stub] starting on {url} (stub LLM {args.stub_tps} tok/s)")
+                proc = spawn_stub_server(kind, port, fake.url, args.stub_tps)
+                try:
+                    wait_ready(url, proc, args.ready_timeout)
+                    print(f"[{kind}/stub] {args.requests} requests @ concurrency {args.concurrency}")
+                    res = asyncio.run(run_target(url, queries, args.requests, args.concurrency, args.timeout))
+                finally:
+                    proc.terminate()
+                    proc.wait(timeout=30)
+                results[f"{kind}-stub"] = res
+                print_result(kind, res, previous.get(f"{kind}-stub"))
+    else:
+        for pair in args.targets.split(","):
+            name, url = pair.split("=", 1)
+            print(f"[{name}] {args.requests} requests @ concurrency {args.concurrency} → {url}")
+            res = asyncio.run(run_target(url, queries, args.requests, args.concurrency, args.timeout))
+            results[name] = res
+            print_result(name, res, previous.get(name))
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("compare", "out")},
+        "queries": len(queries),
+        "results": results,
+    }, indent=2))
+    print(f"\nResults saved to {out}")
+
+if __name__ == "__main__":
+    main()
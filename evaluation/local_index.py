@@ -0,0 +1,100 @@
+"""Search latency of the on-disk vector index, and snapshot swaps under load.
+
+  python evaluation/local_index.py --rows 2000,20000,100000
+
+For each size a snapshot of random unit vectors (dim 384, four categories)
+is written to a temp dir and searched with and without a category
+pre-filter. Then reader threads search continuously while the writer
+swaps in new snapshots; every reader result must come from one complete
+snapshot (all ids share its generation tag). No models are needed.
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from tools.vector_index import SnapshotStore
+
+DIM = 384
+CATEGORIES = ("Sales", "Support", "Specs", "Uncategorised")
+
+
+def unit_vectors(rng, n):
+    v = rng.standard_normal((n, DIM)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+def rows_for(rng, n, tag):
+    vecs = unit_vectors(rng, n)
+    return [(f"{tag}-{i}", vecs[i], {"snippet": f"chunk {i}", "token_count": 75,
+                                     "category": CATEGORIES[i % len(CATEGORIES)]})
+            for i in range(n)]
+
+def time_search(index, queries, k, category):
+    lat = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q, k, category)
+        lat.append((time.perf_counter() - start) * 1000)
+    lat.sort()
+    return statistics.median(lat), lat[int(0.95 * (len(lat) - 1))]
+
+def swap_check(root, rng, rows, swaps, readers):
+    """Readers must only ever see ids from a single snapshot generation."""
+    store = SnapshotStore(root)
+    store.update(rows_for(rng, rows, "gen0"))
+    stop, bad, searches = threading.Event(), [], [0]
+    query = unit_vectors(rng, 1)[0]
+
+    def read():
+        reader_store = SnapshotStore(root)        # like a separate serving process
+        while not stop.is_set():
+            index = reader_store.current()
+            tags = {index.row(r)["id"].split("-")[0] for r, _ in index.search(query, 20)}
+            if len(tags) != 1:
+                bad.append(tags)
+            searches[0] += 1
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for gen in range(1, swaps + 1):               # full replacement each generation
+        old = {uid for uid in store.current().ids}
+        store.update(rows_for(rng, rows, f"gen{gen}"), deletes=old)
+    stop.set()
+    for t in threads:
+        t.join()
+    return searches[0], bad
+
+def main():
+    parser = argparse.ArgumentParser(description="Local vector index latency and swap safety.")
+    parser.add_argument("--rows", default="2000,20000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=8)
+    parser.add_argument("--swaps", type=int, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = unit_vectors(rng, args.queries)
+    print(f"{'rows':>8} {'filter':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(r) for r in args.rows.split(",")):
+            store = SnapshotStore(Path(tmp) / f"bench_{n}")
+            index = store.update(rows_for(rng, n, "gen0"))
+            for category in (None, "Sales"):
+                p50, p95 = time_search(index, queries, args.k, category)
+                print(f"{n:>8} {category or '-':>10} {p50:>8.3f} {p95:>8.3f}")
+
+        searches, bad = swap_check(Path(tmp) / "swap", rng, 2000, args.swaps, args.readers)
+        print(f"\n{args.swaps} snapshot swaps under {args.readers} readers: "
+              f"{searches} searches, {len(bad)} mixed results")
+    if bad:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
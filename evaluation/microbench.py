@@ -0,0 +1,200 @@
+"""Micro-benchmarks for the hot helpers on the request and ingest paths.
+
+  python evaluation/microbench.py --save-baseline      # record this machine's baseline
+  python evaluation/microbench.py                      # compare; exit 1 on regression
+  python evaluation/microbench.py --only build_prompt,domain_from_url --tolerance 0.25
+
+Each benchmark times one call over a fixed set of representative inputs,
+repeated --repeats times after a warm-up; the median per-call time is
+compared against the baseline. A benchmark regresses when it is slower
+than baseline × (1 + tolerance). A per-benchmark "tolerance" key in the
+baseline file overrides --tolerance for noisy entries (e.g. the GPU ones).
+Baselines are machine-specific – record one per box you compare on.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+BASELINE = Path(__file__).parent / "microbench_baseline.json"
+DATA     = Path(__file__).parent / "intent_test_data.json"
+
+KEYWORD_QUERIES = [
+    "The website login page shows an error",
+    "My app is broken after the update, is it a site issue?",
+    "What is the price of the Honda City car?",
+    "How much does it cost to buy a Toyota vehicle?",
+    "How does the engine feature on the Myvi work?",
+    "What is the difference in fuel consumption between these engines?",
+]
+EMOTION_QUERIES = [
+    "I'm so frustrated, the booking form keeps failing!",
+    "Thanks, that was really helpful.",
+    "Is the Axia available in red?",
+    "I'm worried the loan won't be approved in time.",
+]
+URLS = [
+    "https://www.carlist.my/new-cars/perodua/bezza",
+    "http://paultan.org:8080/2024/01/05/review",
+    "https://WWW.Example.com/a/b?c=d#e",
+    "https://docs.python.org/3/library/urllib.parse.html",
+    "https://sub.domain.co.uk",
+] * 20
+
+
+def load_queries(limit=None):
+    with open(DATA, "r") as f:
+        queries = [item["query"] for item in json.load(f)]
+    return queries[:limit] if limit else queries
+
+def synthetic_markdown(sections=400, seed=7):
+    """Deterministic crawl-like markdown: nested headers, prose, lists, tables."""
+    rng = random.Random(seed)
+    words = ("perodua myvi bezza axia honda city civic engine price loan financing "
+             "warranty service fuel consumption transmission airbags booking dealer "
+             "variant premium specs torque horsepower review owner kilometre").split()
+    sentence = lambda n: " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+    out = []
+    for s in range(sections):
+        out.append(f"{'#' * (1 + s % 4)} Section {s} {rng.choice(words)}")
+        out.extend(" ".join(sentence(rng.randint(8, 20)) for _ in range(rng.randint(3, 8)))
+                   for _ in range(rng.randint(1, 4)))
+        if s % 3 == 0:
+            out.extend(f"- {sentence(6)}" for _ in range(5))
+        if s % 5 == 0:
+            out.append("| Variant | Price | Engine |\n|---|---|---|")
+            out.extend(f"| {rng.choice(words)} | RM {rng.randint(30, 150)},000 | {rng.randint(10, 25) / 10}L |"
+                       for _ in range(6))
+        out.append("")
+    return "\n\n".join(out)
+
+# ── benchmarks: name → setup() returning a zero-arg callable and its call count
+def bench_classify_intent_keyword(args):
+    from intent_emotion_router import classify_intent_staged
+    stages = {classify_intent_staged(q)[1] for q in KEYWORD_QUERIES}
+    assert stages == {"keyword"}, f"keyword queries reached {stages}"
+    return lambda: [classify_intent_staged(q) for q in KEYWORD_QUERIES], len(KEYWORD_QUERIES)
+
+def bench_classify_intent_nli(args):
+    from intent_emotion_router import classify_intent_staged
+    queries = [q for q in load_queries() if classify_intent_staged(q)[1] == "nli"][:args.nli_queries]
+    return lambda: [classify_intent_staged(q) for q in queries], len(queries)
+
+def bench_detect_emotion(args):
+    from intent_emotion_router import detect_emotion
+    return lambda: [detect_emotion(q) for q in EMOTION_QUERIES], len(EMOTION_QUERIES)
+
+def bench_build_prompt(args):
+    from langchain.docstore.document import Document
+    from chat_engine import build_prompt
+    rng = random.Random(3)
+    corpus = synthetic_markdown(40).split("\n\n")
+    # half with precut snippets (current ingest), half legacy chunks cut on the fly
+    docs = [Document(page_content=" ".join(rng.sample(corpus, 6)),
+                     metadata={"token_count": 75} if i % 2 else {})
+            for i in range(8)]
+    queries = load_queries(20)
+    return (lambda: [build_prompt(q, docs, "ProductFAQ", "neutral") for q in queries]), len(queries)
+
+def bench_split_markdown(args):
+    from kb_ingest import split_markdown
+    text = Path(args.corpus).read_text(encoding="utf-8") if args.corpus else synthetic_markdown()
+    return lambda: split_markdown(text), 1
+
+def bench_domain_from_url(args):
+    from kb_ingest import domain_from_url
+    return lambda: [domain_from_url(u) for u in URLS], len(URLS)
+
+BENCHMARKS = {
+    "classify_intent_keyword": bench_classify_intent_keyword,
+    "classify_intent_nli":     bench_classify_intent_nli,
+    "detect_emotion":          bench_detect_emotion,
+    "build_prompt":            bench_build_prompt,
+    "split_markdown":          bench_split_markdown,
+    "domain_from_url":         bench_domain_from_url,
+}
+
+def run(name, args):
+    fn, calls = BENCHMARKS[name](args)
+    fn()                                            # warm-up: load models, fill caches
+    per_call = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        fn()
+        per_call.append((time.perf_counter() - start) * 1000 / calls)
+    return {"median_ms": round(statistics.median(per_call), 6),
+            "min_ms": round(min(per_call), 6),
+            "calls": calls, "repeats": args.repeats}
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table; return the names that regressed."""
+    regressed = []
+    print(f"\n{'benchmark':<26}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<26}{'—':>12}{res['median_ms']:>10.4f}ms   (no baseline)")
+            continue
+        change = res["median_ms"] / base["median_ms"] - 1
+        tol = base.get("tolerance", tolerance)
+        flag = "  REGRESSED" if change > tol else ""
+        print(f"{name:<26}{base['median_ms']:>10.4f}ms{res['median_ms']:>10.4f}ms{change:>+9.1%}{flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks with baseline regression check.")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {','.join(BENCHMARKS)}")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed slowdown vs baseline median (0.15 = 15%%)")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results as the new baseline instead of comparing")
+    parser.add_argument("--corpus", help="Markdown file for split_markdown (default: synthetic ~400 sections)")
+    parser.add_argument("--nli-queries", type=int, default=20)
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        sys.exit(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in names:
+        results[name] = run(name, args)
+        print(f"{name:<26} median {results[name]['median_ms']:10.4f} ms/call   "
+              f"min {results[name]['min_ms']:10.4f} ms/call")
+
+    path = Path(args.baseline)
+    if args.save_baseline:
+        previous = json.loads(path.read_text())["results"] if path.exists() else {}
+        for name, res in results.items():     # keep hand-set tolerances
+            if "tolerance" in previous.get(name, {}):
+                res["tolerance"] = previous[name]["tolerance"]
+        path.write_text(json.dumps({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "corpus": args.corpus or "synthetic",
+            "results": {**previous, **results},
+        }, indent=2))
+        print(f"\nBaseline saved to {path}")
+        return
+
+    if not path.exists():
+        sys.exit(f"No baseline at {path}; run with --save-baseline first")
+    regressed = compare(results, json.loads(path.read_text())["results"], args.tolerance)
+    if regressed:
+        sys.exit(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+    print("\nNo regressions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Peak Python heap of crawl → split → upload, buffered vs streamed.
+
+The fixture pages and the fake Weaviate run in a child process, so
+tracemalloc in this process only sees the ingest pipeline itself (the
+headless browser's memory is outside the Python heap in both modes).
+
+  python evaluation/pipeline_memory.py --pages 50,200 --page-kb 40
+
+"buffered" crawls every page into a list and then ingests it, as main()
+did before; "streamed" feeds crawl_stream() into a PageIngester page by
+page. The streamed peak should stay roughly flat as --pages grows; only
+the manifest grows with the crawl.
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+import kb_ingest
+from kb_ingest import CrawlManifest, PageIngester, crawl, crawl_stream, ingest_pages
+
+
+def serve(page_kb, ready, stop):
+    """Child process: fixture pages + fake Weaviate until ``stop`` is set."""
+    from crawl_benchmark import FixtureServer
+    from fake_weaviate import FakeWeaviate
+    server = FixtureServer(latency_ms=10, flaky_every=0, page_kb=page_kb)
+    with FakeWeaviate() as fake:
+        ready.put((server.port, fake.url))
+        stop.wait()
+    server.close()
+
+async def buffered(urls, manifest):
+    pages, _ = await crawl(urls, output=None, domain_rps=0)
+    return ingest_pages(pages, manifest)
+
+async def streamed(urls, manifest):
+    ingester = PageIngester(manifest)
+    async for page in crawl_stream(urls, domain_rps=0):
+        await asyncio.to_thread(ingester.add, page)
+    return ingester.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of buffered vs streamed ingest.")
+    parser.add_argument("--pages", default="50,200")
+    parser.add_argument("--page-kb", type=int, default=40)
+    args = parser.parse_args()
+
+    ready, stop = mp.Queue(), mp.Event()
+    child = mp.Process(target=serve, args=(args.page_kb, ready, stop), daemon=True)
+    child.start()
+    port, weaviate_url = ready.get(timeout=30)
+    os.environ["WEAVIATE_URL"] = weaviate_url
+
+    print(f"{'pages':>6} {'mode':>9} {'seconds':>8} {'peak MiB':>9}")
+    try:
+        for n in (int(p) for p in args.pages.split(",")):
+            urls = [f"http://127.0.0.1:{port}/page/{i}" for i in range(n)]
+            for name, run in (("buffered", buffered), ("streamed", streamed)):
+                with tempfile.TemporaryDirectory() as tmp:
+                    kb_ingest.TERM_INDEX_DIR = Path(tmp) / "term_index"
+                    manifest = CrawlManifest(Path(tmp) / "manifest.json")
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    asyncio.run(run(urls, manifest))
+                    elapsed = time.perf_counter() - start
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                print(f"{n:>6} {name:>9} {elapsed:>8.1f} {peak / 2**20:>9.1f}")
+    finally:
+        stop.set()
+        child.join(timeout=10)
+
+if __name__ == "__main__":
+    main()
@@ -211,11 +211,12 @@ test_data = [
     {"query": "Can you call me a taxi?", "intent": "UnknownIntent"}
 ]
 
-# Create directory if it doesn't exist
-os.makedirs('test_data', exist_ok=True)
+if __name__ == "__main__":
+    # Create directory if it doesn't exist
+    os.makedirs('test_data', exist_ok=True)
 
-# Save to JSON file
-with open('test_data/intent_test_data.json', 'w') as f:
-    json.dump(test_data, f, indent=2)
+    # Save to JSON file
+    with open('test_data/intent_test_data.json', 'w') as f:
+        json.dump(test_data, f, indent=2)
 
-print(f"Created test data with {len(test_data)} examples saved to test_data/intent_test_data.json")
\ No newline at end of file
+    print(f"Created test data with {len(test_data)} examples saved to test_data/intent_test_data.json")
@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from fake_weaviate import FakeWeaviate
+
+CLASS_NAME = "Domain_fake_local"
+DOCS = [
+    {"content": "The Perodua Bezza 1.3 Premium X is priced from RM 49,980.", "category": "Sales", "headers": ["Bezza"]},
+    {"content": "To reset your password, open Account > Security and choose Reset.", "category": "Support", "headers": ["Account"]},
+    {"content": "The Honda City uses a 1.5 litre i-VTEC engine with CVT.", "category": "Specs", "headers": ["City"]},
+]
+for d in DOCS:
+    d.update(snippet=d["content"], token_count=len(d["content"]) // 4)
+QUERIES = ["bezza premium price", "reset password", "honda city engine", "bezza engine"]
+
+
+def run(fake, label, make_retriever, n, callers):
+    """Invoke n retrievals from `callers` threads; report connections opened"""
+    conns, reqs = fake.connections, fake.requests
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        list(pool.map(lambda i: make_retriever().invoke(QUERIES[i % len(QUERIES)]), range(n)))
+    elapsed = time.perf_counter() - start
+    opened = fake.connections - conns
+    print(f"{label:<12} {n} retrievals  {elapsed * 1000 / n:6.2f} ms/req  "
+          f"{fake.requests - reqs:4d} HTTP requests  {opened:3d} TCP connections")
+    return opened
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-request Weaviate clients vs the shared client + retriever cache, against a local fake server.")
+    parser.add_argument("-n", type=int, default=200)
+    parser.add_argument("--callers", type=int, default=8)
+    args = parser.parse_args()
+
+    with FakeWeaviate() as fake:
+        fake.add_objects(CLASS_NAME, DOCS)
+        os.environ["WEAVIATE_URL"] = fake.url
+        import kb_ingest
+
+        per_request = run(fake, "per-request",
+                          lambda: kb_ingest._new_retriever(kb_ingest.create_weaviate_client(), CLASS_NAME, None),
+                          args.n, args.callers)
+        kb_ingest.reset_weaviate_client()
+        kb_ingest.get_weaviate_client()         # construction probes use their own connections
+        pooled = run(fake, "pooled",
+                     lambda: kb_ingest.build_retriever(CLASS_NAME),
+                     args.n, args.callers)
+
+    # the shared client keeps at most one keep-alive connection per calling thread
+    if pooled > args.callers or pooled >= per_request:
+        print("FAIL: connections were not reused")
+        sys.exit(1)
+    print("OK: connections reused")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,33 @@
+import gc
+import json
 import logging
-from flask import Flask, request, jsonify, render_template
+import os
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
 from pathlib import Path
 
-from chat_engine import chat_once   # your Phase‑4 function
+from chat_engine import (   # your Phase‑4 functions
+    CHAT_REQUESTS, ModelsLoading, chat_once, chat_stream, is_ready, llm_scheduler,
+    load_models, load_status, start_background_loading,
+)
+from tools import metrics
+from tools.inference_queue import DeadlineExceeded, QueueFull
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s  %(levelname)s  %(message)s"
 )
 
+# background: bind now, load models in a thread (default)
+# preload:    load before serving, e.g. in a pre-fork master (gunicorn --preload)
+#             so forked workers share the model pages copy-on-write
+MODEL_LOADING = os.getenv("MODEL_LOADING", "background")
+if MODEL_LOADING == "preload":
+    load_models()
+    gc.freeze()     # keep refcount/GC writes from un-sharing preloaded pages
+else:
+    start_background_loading()
+
 # Set static and template folders relative to project root
 BASE_DIR = Path(__file__).parent.parent.resolve()
 STATIC_DIR = BASE_DIR / "static"
@@ -22,30 +40,116 @@ app = Flask(
 )
 
 # Allow cross‑origin for the API only (you can tighten this in prod)
-CORS(app, resources={r"/chat": {"origins": "*"}})
+CORS(app, resources={r"/chat.*": {"origins": "*"}})
 
 @app.route("/")
 def home():
     # Renders templates/index.html
     return render_template("index.html")
 
-@app.route("/chat", methods=["POST"])
-def chat_endpoint():
+def _read_message():
+    """Return (user_msg, error_response) from the JSON request body."""
     data = request.get_json(silent=True)
     if not data or "message" not in data:
-        return jsonify(error="JSON body must contain 'message'"), 400
+        return None, (jsonify(error="JSON body must contain 'message'"), 400)
 
     user_msg = data["message"].strip()
     if not user_msg:
-        return jsonify(error="Empty message"), 400
+        return None, (jsonify(error="Empty message"), 400)
+    return user_msg, None
+
+def _busy(exc: Exception):
+    """503 telling the client (or load balancer) when to retry."""
+    if isinstance(exc, QueueFull):
+        retry_after = exc.retry_after
+    elif isinstance(exc, ModelsLoading):
+        retry_after = 10
+    else:
+        retry_after = llm_scheduler.retry_after()
+    CHAT_REQUESTS.inc(outcome="busy")
+    resp = jsonify(error="Server busy, please retry")
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp, 503
+
+def _sse(payload: dict, event: str | None = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(payload)}\n\n"
+
+@app.route("/chat", methods=["POST"])
+def chat_endpoint():
+    user_msg, error = _read_message()
+    if error:
+        return error
 
     try:
         reply = chat_once(user_msg)
         return jsonify(reply=reply.strip()), 200
+    except (ModelsLoading, QueueFull, DeadlineExceeded) as exc:
+        return _busy(exc)
     except Exception:
         logging.exception("chat_once failed")
+        CHAT_REQUESTS.inc(outcome="error")
         return jsonify(error="Internal server error"), 500
 
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream_endpoint():
+    """Server-Sent Events: one `data: {"token": ...}` frame per generated token,
+    then `event: done` (or `event: error`)."""
+    user_msg, error = _read_message()
+    if error:
+        return error
+
+    try:
+        tokens = chat_stream(user_msg)
+    except (ModelsLoading, QueueFull) as exc:
+        return _busy(exc)
+
+    def events():
+        try:
+            for token in tokens:
+                yield _sse({"token": token})
+            yield _sse({}, event="done")
+        except (QueueFull, DeadlineExceeded):
+            CHAT_REQUESTS.inc(outcome="busy")
+            yield _sse({"error": "Server busy, please retry"}, event="error")
+        except Exception:
+            logging.exception("chat_stream failed")
+            CHAT_REQUESTS.inc(outcome="error")
+            yield _sse({"error": "Internal server error"}, event="error")
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route("/healthz")
+def healthz():
+    """Liveness: the process is up; includes model loading progress.
+    500 once loading has failed, so the worker gets restarted."""
+    if load_status["state"] == "failed":
+        return jsonify(status="failed", models=load_status), 500
+    return jsonify(status="ok", models=load_status), 200
+
+@app.route("/readyz")
+def readyz():
+    """Readiness: 200 once every model is loaded and warmed, else 503."""
+    if is_ready():
+        return jsonify(ready=True, models=load_status), 200
+    resp = jsonify(ready=False, models=load_status)
+    resp.headers["Retry-After"] = "10"
+    return resp, 503
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition of stage latencies, tokens and queue state."""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route("/queue")
+def queue_stats():
+    """LLM queue depth, worker usage and wait times for monitoring."""
+    return jsonify(llm_scheduler.stats()), 200
+
 if __name__ == "__main__":
     # For development only; in production use a WSGI server
-    app.run(host="0.0.0.0", port=5000, threaded=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")), threaded=True)
\ No newline at end of file
@@ -0,0 +1,236 @@
+"""ASGI entry point serving the same `/`, `/chat` and `/chat/stream` routes
+as app.py.
+
+Run with:
+  uvicorn asgi_app:app --app-dir src --port 5001
+
+Classification and generation run in executors and retrieval is awaited,
+so an in-flight chat does not pin an OS thread while Weaviate answers.
+Each route has its own concurrency limit (CHAT_CONCURRENCY); requests over
+the limit get a fast 503 with Retry-After instead of piling up. /queue,
+/healthz, /readyz and /metrics match app.py.
+"""
+import asyncio
+import contextlib
+import gc
+import json
+import logging
+import os
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from chat_engine import (
+    CHAT_REQUESTS, ModelsLoading, achat_once, chat_stream, is_ready, llm_scheduler,
+    load_models, load_status, start_background_loading,
+)
+from tools import metrics
+from tools.inference_queue import DeadlineExceeded, QueueFull
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s  %(levelname)s  %(message)s"
+)
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+STATIC_DIR = BASE_DIR / "static"
+TEMPLATES_DIR = BASE_DIR / "templates"
+
+CHAT_CONCURRENCY = int(os.getenv("CHAT_CONCURRENCY", "32"))
+MODEL_LOADING    = os.getenv("MODEL_LOADING", "background")   # or "preload" (see app.py)
+
+if MODEL_LOADING == "preload":
+    load_models()
+    gc.freeze()
+
+# index.html is written for Flask; give it a compatible url_for
+_templates = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)), autoescape=True)
+_templates.globals["url_for"] = lambda endpoint, filename="": f"/{endpoint}/{filename}"
+
+
+class RouteLimit:
+    """Non-blocking per-route concurrency cap."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+
+    def try_acquire(self) -> bool:
+        # single event-loop thread: no lock needed
+        if self.active >= self.limit:
+            return False
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+
+
+_chat_limit = RouteLimit(CHAT_CONCURRENCY)
+_stream_limit = RouteLimit(CHAT_CONCURRENCY)
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that owns a RouteLimit slot and releases it however
+    the response ends: finished, failed, or the client gone before the body
+    iterator ever started."""
+
+    def __init__(self, content, limit: RouteLimit, **kwargs):
+        super().__init__(content, **kwargs)
+        self._limit = limit
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._limit.release()
+
+
+def _busy(retry_after: int) -> JSONResponse:
+    CHAT_REQUESTS.inc(outcome="busy")
+    return JSONResponse({"error": "Server busy, please retry"}, status_code=503,
+                        headers={"Retry-After": str(retry_after)})
+
+
+async def home(request: Request):
+    return HTMLResponse(_templates.get_template("index.html").render())
+
+
+async def _read_message(request: Request):
+    """Return (user_msg, error_response) from the JSON request body."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or "message" not in data:
+        return None, JSONResponse({"error": "JSON body must contain 'message'"}, status_code=400)
+
+    user_msg = str(data["message"]).strip()
+    if not user_msg:
+        return None, JSONResponse({"error": "Empty message"}, status_code=400)
+    return user_msg, None
+
+
+def _sse(payload: dict, event: str | None = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(payload)}\n\n"
+
+
+async def chat_endpoint(request: Request):
+    user_msg, error = await _read_message(request)
+    if error:
+        return error
+
+    if not _chat_limit.try_acquire():
+        return _busy(llm_scheduler.retry_after())
+    try:
+        reply = await achat_once(user_msg)
+        return JSONResponse({"reply": reply.strip()})
+    except QueueFull as exc:
+        return _busy(exc.retry_after)
+    except DeadlineExceeded:
+        return _busy(llm_scheduler.retry_after())
+    except ModelsLoading:
+        return _busy(10)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logging.exception("achat_once failed")
+        CHAT_REQUESTS.inc(outcome="error")
+        return JSONResponse({"error": "Internal server error"}, status_code=500)
+    finally:
+        _chat_limit.release()
+
+
+async def chat_stream_endpoint(request: Request):
+    """Server-Sent Events, same framing as app.py's /chat/stream."""
+    user_msg, error = await _read_message(request)
+    if error:
+        return error
+
+    if not _stream_limit.try_acquire():
+        return _busy(llm_scheduler.retry_after())
+    try:
+        tokens = await run_in_threadpool(chat_stream, user_msg)
+    except QueueFull as exc:
+        _stream_limit.release()
+        return _busy(exc.retry_after)
+    except ModelsLoading:
+        _stream_limit.release()
+        return _busy(10)
+    except BaseException:
+        _stream_limit.release()
+        raise
+
+    async def events():
+        try:
+            async for token in iterate_in_threadpool(tokens):
+                yield _sse({"token": token})
+            yield _sse({}, event="done")
+        except (QueueFull, DeadlineExceeded):
+            CHAT_REQUESTS.inc(outcome="busy")
+            yield _sse({"error": "Server busy, please retry"}, event="error")
+        except Exception:
+            logging.exception("chat_stream failed")
+            CHAT_REQUESTS.inc(outcome="error")
+            yield _sse({"error": "Internal server error"}, event="error")
+
+    return SlotStreamingResponse(events(), _stream_limit, media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def healthz(request: Request):
+    if load_status["state"] == "failed":
+        return JSONResponse({"status": "failed", "models": load_status}, status_code=500)
+    return JSONResponse({"status": "ok", "models": load_status})
+
+
+async def readyz(request: Request):
+    if is_ready():
+        return JSONResponse({"ready": True, "models": load_status})
+    return JSONResponse({"ready": False, "models": load_status}, status_code=503,
+                        headers={"Retry-After": "10"})
+
+
+async def queue_stats(request: Request):
+    """LLM queue depth, worker usage and wait times for monitoring."""
+    return JSONResponse(llm_scheduler.stats())
+
+
+async def metrics_endpoint(request: Request):
+    return Response(metrics.REGISTRY.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    if MODEL_LOADING != "preload":
+        start_background_loading()
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/", home),
+        Route("/chat", chat_endpoint, methods=["POST"]),
+        Route("/chat/stream", chat_stream_endpoint, methods=["POST"]),
+        Route("/healthz", healthz),
+        Route("/readyz", readyz),
+        Route("/metrics", metrics_endpoint),
+        Route("/queue", queue_stats),
+        Mount("/static", app=StaticFiles(directory=str(STATIC_DIR)), name="static"),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["POST"])],
+    lifespan=lifespan,
+)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "5001")))
@@ -4,26 +4,54 @@ Phase 4 runtime core (API‑ready)
 
 • analyse()  → intent & emotion
 • build_retriever()  → KB context
-• load_llm() → Zephyr‑7B GGUF via ctransformers
+• load_llm() → Zephyr‑7B GGUF via the LLM_BACKEND chosen in tools/llm_loader
+  (llama‑cpp caches the KV state of the constant system-prompt prefix)
 • chat_once(user_msg) returns one reply string
+• chat_stream(user_msg) yields reply tokens as they are generated
+• achat_once(user_msg) is the asyncio variant used by asgi_app.py
+• reply_cache answers repeat questions before any model runs, until the
+  next ingest (near-duplicates of the same intent too with
+  RESPONSE_CACHE_SEMANTIC=1)
+• load_models() / start_background_loading() load + warm every model;
+  the chat entry points raise ModelsLoading until that has finished
+• every turn feeds per-stage latency / token histograms (tools.metrics,
+  served at /metrics); TIMING_LOG=json logs one structured line per turn
+  (CHAT_PIPELINE=concurrent overlaps emotion + speculative retrieval
+   with intent classification; per-stage timings are logged)
 
 This module is imported by app.py (Flask) — no CLI REPL code.
 """
 
 import os
 import json
+import asyncio
+import string
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from textwrap import shorten
+from typing import Iterator
 
-from intent_emotion_router import analyse
-from kb_ingest import build_retriever
+from intent_emotion_router import (
+    DISTILLED_MIN_CONFIDENCE, INTENT_CASCADE, INTENT_DISTILLED,
+    _distilled_model, _embedding_index, _emotion_pipe, _intent_pipe,
+    classify_intent, detect_emotion, detect_emotion_many, nli_intent,
+)
+from kb_ingest import EMBEDS_LOCALLY, aretrieve, build_retriever
+from tools.embedder import embed_query
+from tools.inference_queue import InferenceScheduler
 from tools.llm_loader import load_llm
-from transformers import AutoTokenizer
+from tools.metrics import RATE_BUCKETS, REGISTRY, TOKEN_BUCKETS
+from tools.response_cache import ResponseCache
 
 # ───────────────────────── settings ─────────────────────────
+LATEST_CLASS_JSON = Path(__file__).parent / "output" / "latest_class.json"
+
 def get_latest_class_name():
     """Get the latest class name from JSON file or use default."""
-    json_path = Path(__file__).parent / "output" / "latest_class.json"
+    json_path = LATEST_CLASS_JSON
     if json_path.exists():
         try:
             with open(json_path, "r", encoding="utf-8") as f:
@@ -38,54 +66,514 @@ CHUNK_MAX_CHARS  = 500
 MAX_NEW_TOKENS   = 100
 TEMPERATURE      = 0.5
 MAX_PROMPT_TOKENS = 300
+EST_SNIPPET_TOKENS = 75    # typical stored snippet size, sizes the retrieval k
+RETRIEVE_K       = max(1, MAX_PROMPT_TOKENS // EST_SNIPPET_TOKENS)
+PIPELINE_MODE    = os.getenv("CHAT_PIPELINE", "concurrent")   # or "sequential"
+MIN_FILTERED_DOCS = 2      # re-query with the category filter below this
+
+# Reply cache: exact normalized text, checked before classification; the
+# embedding-similarity fallback (same intent and content terms required) is opt-in
+RESPONSE_CACHE            = os.getenv("RESPONSE_CACHE", "1") == "1"
+RESPONSE_CACHE_SEMANTIC   = os.getenv("RESPONSE_CACHE_SEMANTIC", "0") == "1"
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+RESPONSE_CACHE_TTL        = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_MAX_MB     = float(os.getenv("RESPONSE_CACHE_MAX_MB", "16"))
+
+# LLM admission control: model workers, waiting-room size, per-request deadline
+LLM_WORKERS        = int(os.getenv("LLM_WORKERS", "1"))
+LLM_MAX_QUEUE      = int(os.getenv("LLM_MAX_QUEUE", "8"))
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "60"))
+
+# Threads for the concurrent pipeline's side stages: by default two per chat
+# the server lets in at once. When all are busy, chat_once / chat_stream run
+# their stages inline instead of queueing. achat_once has a pool of the same
+# size to itself, so /chat work never hides in the stage pool's slot count
+STAGE_POOL_WORKERS = int(os.getenv("STAGE_POOL_WORKERS",
+                                   str(2 * int(os.getenv("CHAT_CONCURRENCY", "32")))))
+
+# Instrumentation
+TIMING_LOG    = os.getenv("TIMING_LOG", "text")      # text | json | off
+TOKEN_METRICS = os.getenv("TOKEN_METRICS", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+def _new_stage_pool():
+    global _stage_pool, _stage_slots, _async_pool
+    _stage_pool = ThreadPoolExecutor(max_workers=STAGE_POOL_WORKERS,
+                                     thread_name_prefix="chat-stage")
+    _stage_slots = threading.BoundedSemaphore(STAGE_POOL_WORKERS)
+    _async_pool = ThreadPoolExecutor(max_workers=STAGE_POOL_WORKERS,
+                                     thread_name_prefix="chat-async")
+
+_new_stage_pool()
+os.register_at_fork(after_in_child=_new_stage_pool)   # pool threads don't survive fork
 
 SCRIPT_DIR = Path(__file__).parent
 PROMPT_TEMPLATE = (SCRIPT_DIR / "prompts" / "assistant_prompt.txt").read_text(encoding="utf-8")
+# Constant text before the first {field}; its KV state can be cached by the LLM
+PROMPT_PREFIX   = next(string.Formatter().parse(PROMPT_TEMPLATE))[0]
+
+
+llm  = None                # set by load_models()
+template_tokens = 0        # tokens of the template's fixed text, counted at load
+llm_scheduler = InferenceScheduler(max_queue=LLM_MAX_QUEUE)
+reply_cache = ResponseCache(
+    embed_fn=embed_query if RESPONSE_CACHE_SEMANTIC else None,
+    similarity=RESPONSE_CACHE_SIMILARITY,
+    ttl=RESPONSE_CACHE_TTL,
+    max_bytes=int(RESPONSE_CACHE_MAX_MB * 2**20),
+    version_file=LATEST_CLASS_JSON,
+) if RESPONSE_CACHE else None
+
+# ───────────────────── metrics ──────────────────────────────
+STAGE_SECONDS    = REGISTRY.histogram("chat_stage_seconds",
+                                      "Latency of each chat turn stage", ["stage"])
+PROMPT_TOKENS    = REGISTRY.histogram("chat_prompt_tokens",
+                                      "Prompt length in tokens", buckets=TOKEN_BUCKETS)
+GENERATED_TOKENS = REGISTRY.histogram("chat_generated_tokens",
+                                      "Reply length in tokens", buckets=TOKEN_BUCKETS)
+TOKENS_PER_SEC   = REGISTRY.histogram("chat_generation_tokens_per_second",
+                                      "Generated tokens per second of generation time",
+                                      buckets=RATE_BUCKETS)
+CHAT_REQUESTS    = REGISTRY.counter("chat_requests_total",
+                                    "Chat turns by outcome", ["outcome"])
+REGISTRY.gauge("llm_queue_depth", "Requests waiting for an LLM worker",
+               lambda: llm_scheduler.stats()["queue_depth"])
+REGISTRY.gauge("llm_busy_workers", "LLM workers currently generating",
+               lambda: llm_scheduler.stats()["busy_workers"])
+REGISTRY.gauge("llm_queue_wait_avg_seconds", "Mean time spent queued for an LLM worker",
+               lambda: llm_scheduler.stats()["avg_wait_ms"] / 1000)
+REGISTRY.callback_counter("llm_rejected_total", "Requests rejected because the LLM queue was full",
+                          lambda: llm_scheduler.stats()["rejected"])
+if reply_cache is not None:
+    for _key in ("entries", "hits_exact", "hits_semantic", "misses", "evictions"):
+        REGISTRY.gauge(f"reply_cache_{_key}", f"Reply cache {_key.replace('_', ' ')}",
+                       lambda k=_key: reply_cache.stats()[k])
+
+# ───────────────────── model loading / readiness ────────────
+class ModelsLoading(Exception):
+    """Raised by the chat entry points until load_models() has finished."""
+
+WARM_UP_MESSAGE = "What's the price of the Bezza 1.3 Premium?"
+
+_ready = threading.Event()
+_load_lock = threading.Lock()
+_background_warm_up = None     # set by start_background_loading()
+load_status = {"state": "idle", "components": {}, "error": None}
+
+def _load_component(name: str, fn):
+    load_status["components"][name] = "loading"
+    start = time.perf_counter()
+    result = fn()
+    load_status["components"][name] = f"ready in {time.perf_counter() - start:.1f}s"
+    return result
+
+def _load_llms(warm_up: bool):
+    global llm, template_tokens
+    # Each extra worker holds its own model copy
+    models = [load_llm(prompt_prefix=PROMPT_PREFIX) for _ in range(max(1, LLM_WORKERS))]
+    # Tokenized once, before the workers own the models
+    template_tokens = len(models[0].tokenize(
+        PROMPT_TEMPLATE.format(emotion="", intent="", context="", user="")))
+    if warm_up:
+        prompt = PROMPT_TEMPLATE.format(emotion="neutral", intent="SalesInquiry",
+                                        context="", user=WARM_UP_MESSAGE)
+        for m in models:
+            m(prompt, max_new_tokens=1, temperature=TEMPERATURE, stream=False)
+    llm = models[0]
+    return models
 
+def load_models(warm_up: bool = True):
+    """Load every model and, with ``warm_up``, push one message through each
+    pipeline. Idempotent and thread-safe; call it before forking worker
+    processes so they share the model pages copy-on-write."""
+    with _load_lock:
+        if _ready.is_set():
+            return
+        load_status.update(state="loading", error=None)
+        try:
+            models = _load_component("llm", lambda: _load_llms(warm_up))
+            if not (INTENT_DISTILLED and DISTILLED_MIN_CONFIDENCE <= 0):   # NLI never needed
+                _load_component("intent", lambda: nli_intent(WARM_UP_MESSAGE) if warm_up
+                                                  else _intent_pipe())
+            _load_component("emotion", lambda: detect_emotion_many([WARM_UP_MESSAGE]) if warm_up
+                                               else _emotion_pipe())
+            if (reply_cache is not None and RESPONSE_CACHE_SEMANTIC) or INTENT_CASCADE \
+                    or INTENT_DISTILLED or EMBEDS_LOCALLY:
+                _load_component("embedder", lambda: embed_query(WARM_UP_MESSAGE))
+            if INTENT_DISTILLED:
+                _load_component("intent_distilled", _distilled_model)
+            if INTENT_CASCADE:
+                _load_component("intent_index", _embedding_index)
+            llm_scheduler.start(models)
+        except Exception as exc:
+            load_status.update(state="failed", error=repr(exc))
+            logger.exception("Model loading failed")
+            raise
+        load_status["state"] = "ready"
+        _ready.set()
+        logger.info("Models ready: %s", load_status["components"])
+
+def start_background_loading(warm_up: bool = True) -> threading.Thread:
+    """Run load_models() in a daemon thread so the server can bind at once.
+    If the process forks before loading has finished, the child restarts it
+    (see _restart_loading_after_fork)."""
+    global _background_warm_up
+    _background_warm_up = warm_up
+
+    def run():
+        try:
+            load_models(warm_up)
+        except Exception:
+            pass            # recorded in load_status for /readyz
+    thread = threading.Thread(target=run, name="model-loader", daemon=True)
+    thread.start()
+    return thread
 
-_tok = AutoTokenizer.from_pretrained("HuggingFaceH4/zephyr-7b-beta", legacy=False)
-llm  = load_llm()
+def _restart_loading_after_fork():
+    """The loader thread does not survive fork (gunicorn --preload with
+    MODEL_LOADING=background), and may have held _load_lock when it
+    forked: give an unready child a fresh lock and its own loader."""
+    global _load_lock
+    if _ready.is_set() or _background_warm_up is None:
+        return
+    _load_lock = threading.Lock()
+    load_status.update(state="idle", components={}, error=None)
+    logger.info("Restarting model loading in forked worker %d", os.getpid())
+    start_background_loading(_background_warm_up)
+
+os.register_at_fork(after_in_child=_restart_loading_after_fork)
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+def _ensure_ready():
+    if not _ready.is_set():
+        raise ModelsLoading(f"models {load_status['state']}")
 
 # ───────────────────── helper: prompt build ─────────────────
-def _count_tokens(text: str) -> int:
-    return len(_tok.encode(text))
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1          # ~4 chars per token
 
-def build_prompt(user_msg: str, docs, intent: str, emotion: str) -> str:
-    context_pieces, token_total = [], 0
-    for d in docs[:1]:                                  # top‑2 chunks
-        snippet = shorten(d.page_content.replace("\n", " "), 300)
-        needed  = _count_tokens(snippet)
-        if token_total + needed > MAX_PROMPT_TOKENS:
-            break
-        context_pieces.append(snippet)
-        token_total += needed
+def _snippet(doc):
+    """(snippet, token_count) from the stored chunk fields; chunks ingested
+    without them are cut here and estimated at ~4 chars per token."""
+    count = doc.metadata.get("token_count")
+    if count is not None:
+        return doc.page_content, int(count)
+    snippet = shorten(doc.page_content.replace("\n", " "), 300)
+    return snippet, _estimate_tokens(snippet)
 
-    context_block = "\n\n---\n\n".join(context_pieces)
+def pack_context(docs, budget: int = MAX_PROMPT_TOKENS):
+    """Greedily fill ``budget`` with snippets in rank order, skipping any that
+    no longer fit. Returns (snippets, their token total); no tokenization
+    happens here."""
+    pieces, token_total = [], 0
+    for d in docs:
+        snippet, needed = _snippet(d)
+        if token_total + needed > budget:
+            continue
+        pieces.append(snippet)
+        token_total += needed
+    return pieces, token_total
 
-    return PROMPT_TEMPLATE.format(
+def _build_prompt(user_msg: str, docs, intent: str, emotion: str):
+    """(prompt, prompt tokens). The count is the template's tokens from
+    load time, the packed snippets' stored counts and an estimate for the
+    short per-turn fields, so the request path never tokenizes."""
+    pieces, context_tokens = pack_context(docs)
+    prompt = PROMPT_TEMPLATE.format(
         emotion=emotion,
         intent=intent,
-        context=context_block,
+        context="\n\n---\n\n".join(pieces),
         user=user_msg,
     )
+    return prompt, template_tokens + context_tokens + _estimate_tokens(user_msg + emotion + intent)
+
+def build_prompt(user_msg: str, docs, intent: str, emotion: str) -> str:
+    return _build_prompt(user_msg, docs, intent, emotion)[0]
+
+# ───────────────────── helper: analyse + retrieve ───────────
+def _timed(timings: dict, stage: str, fn, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        timings[stage] = (time.perf_counter() - start) * 1000
+
+def _category_for(intent: str):
+    return {"TechSupport": "Support",
+            "SalesInquiry": "Sales"}.get(intent)
+
+def _retrieve(user_msg: str, category):
+    return build_retriever(CLASS_NAME, category=category, k=RETRIEVE_K).invoke(user_msg)
+
+def _reserve_stage_slots(n: int):
+    """Take ``n`` idle stage-pool threads, or none (returns None) if fewer are free."""
+    slots = _stage_slots
+    for taken in range(n):
+        if not slots.acquire(blocking=False):
+            for _ in range(taken):
+                slots.release()
+            return None
+    return slots
+
+def _speculate(user_msg: str, timings: dict):
+    """Concurrent pipeline: start emotion + unfiltered retrieval before the
+    intent (and so the category filter) is known. None when sequential, or
+    when the stage pool is saturated and the stages should run inline."""
+    slots = _reserve_stage_slots(2) if PIPELINE_MODE == "concurrent" else None
+    if slots is None:
+        return None
+    spec = (_stage_pool.submit(_timed, timings, "emotion", detect_emotion, user_msg),
+            _stage_pool.submit(_timed, timings, "retrieval", _retrieve, user_msg, None))
+    for f in spec:
+        f.add_done_callback(lambda _: slots.release())
+    return spec
+
+def _classify(user_msg: str, timings: dict):
+    """Speculative stages, then the intent classified while they run."""
+    spec = _speculate(user_msg, timings)
+    return _timed(timings, "intent", classify_intent, user_msg), spec
+
+def _cancel(spec):
+    """Drop speculative stages a cache hit or rejection made unnecessary;
+    ones already running finish in the background."""
+    for f in spec or ():
+        f.cancel()
+
+def _cached_reply(user_msg: str, timings: dict):
+    """Exact reply-cache hit, looked up before any model runs."""
+    if reply_cache is None:
+        return None
+    return _timed(timings, "cache_lookup", reply_cache.get, user_msg)
+
+def _similar_reply(user_msg: str, intent: str, timings: dict):
+    """Opt-in semantic reply-cache hit; gated on the intent, so it can only
+    be looked up after classification."""
+    if reply_cache is None or not reply_cache.semantic:
+        return None
+    return _timed(timings, "cache_similar", reply_cache.get_similar, user_msg, intent)
+
+def _cache_hit(reply: str, timings: dict, start: float, spec=None) -> str:
+    """Finish a turn answered from the reply cache. Its timings leave out
+    stages still running speculatively."""
+    _cancel(spec)
+    hit = {k: timings[k] for k in ("cache_lookup", "intent", "cache_similar") if k in timings}
+    hit["total"] = (time.perf_counter() - start) * 1000
+    _record_turn(hit, "cache_hit")
+    return reply
+
+def _admit(spec):
+    try:
+        llm_scheduler.check_admission()
+    except Exception:
+        _cancel(spec)
+        raise
+
+def _analyse_retrieve_sequential(user_msg: str, intent: str, timings: dict, spec=None):
+    emotion = _timed(timings, "emotion", detect_emotion, user_msg)
+    docs    = _timed(timings, "retrieval", _retrieve, user_msg, _category_for(intent))
+    return emotion, docs
+
+def _analyse_retrieve_concurrent(user_msg: str, intent: str, timings: dict, spec):
+    """Apply the category filter to the speculative hits of _speculate."""
+    emotion_f, spec_f = spec
+    category = _category_for(intent)
+    docs     = spec_f.result()
+    if category:
+        kept = [d for d in docs if d.metadata.get("category") == category]
+        if len(kept) < MIN_FILTERED_DOCS:
+            kept = _timed(timings, "retrieval_filtered", _retrieve, user_msg, category)
+        docs = kept
+    return emotion_f.result(), docs
+
+def _record_queue_wait(timings: dict):
+    """on_start callback for llm_scheduler: time spent waiting for a worker."""
+    return lambda wait: timings.__setitem__("queue_wait", wait * 1000)
+
+def _generation_ms(timings: dict, gen_start: float) -> float:
+    """Generation time since ``gen_start``, excluding the LLM queue wait."""
+    return max(0.0, (time.perf_counter() - gen_start) * 1000 - timings.get("queue_wait", 0.0))
+
+def _llm_stream(prompt: str, deadline: float, timings: dict) -> Iterator[str]:
+    return llm_scheduler.stream(prompt,
+                                deadline=deadline,
+                                on_start=_record_queue_wait(timings),
+                                max_new_tokens=MAX_NEW_TOKENS,
+                                temperature=TEMPERATURE)
+
+def _generate(prompt: str, deadline: float, timings: dict):
+    """(reply, generated tokens). Generation is streamed so every backend
+    yields one piece per token and the reply needs no tokenizing."""
+    pieces = list(_llm_stream(prompt, deadline, timings))
+    return "".join(pieces), len(pieces)
+
+def _prepare(user_msg: str, intent: str, spec, timings: dict):
+    """Steps 2-3 plus prompt build for a classified message; returns the
+    prompt for generation and its token count."""
+    analyse_retrieve = (_analyse_retrieve_concurrent if spec is not None
+                        else _analyse_retrieve_sequential)
+    emotion, docs = _timed(timings, "analyse_retrieve",
+                           analyse_retrieve, user_msg, intent, timings, spec)
+    return _timed(timings, "prompt", _build_prompt, user_msg, docs, intent, emotion)
+
+def _record_turn(timings: dict, outcome: str = "ok", prompt_tokens: int = None,
+                 generated_tokens: int = None):
+    """Feed one turn's stage timings and token counts into the metrics
+    registry and the per-request timing log."""
+    CHAT_REQUESTS.inc(outcome=outcome)
+    for stage, ms in timings.items():
+        STAGE_SECONDS.observe(ms / 1000, stage=stage)
+
+    tokens = {}
+    if TOKEN_METRICS and prompt_tokens is not None:
+        tokens["prompt_tokens"] = prompt_tokens
+        PROMPT_TOKENS.observe(prompt_tokens)
+    if TOKEN_METRICS and generated_tokens is not None:
+        n = tokens["generated_tokens"] = generated_tokens
+        GENERATED_TOKENS.observe(n)
+        if n and timings.get("generate"):
+            tokens["tokens_per_sec"] = round(n / (timings["generate"] / 1000), 2)
+            TOKENS_PER_SEC.observe(tokens["tokens_per_sec"])
+
+    if TIMING_LOG == "json":
+        logger.info(json.dumps({
+            "event": "chat_turn", "pipeline": PIPELINE_MODE, "outcome": outcome,
+            "timings_ms": {k: round(v, 1) for k, v in timings.items()}, **tokens,
+        }))
+    elif TIMING_LOG == "text":
+        logger.info("chat_once [%s] %s %s", PIPELINE_MODE, outcome,
+                    "  ".join([f"{k}={v:.0f}ms" for k, v in timings.items()] +
+                              [f"{k}={v}" for k, v in tokens.items()]))
 
 # ───────────────────── public API: one turn ─────────────────
 def chat_once(user_msg: str) -> str:
-    # 1 Intent & emotion
-    intent, emotion = analyse(user_msg)
-
-    # 2 Category filter
-    category = {"TechSupport": "Support",
-                "SalesInquiry": "Sales"}.get(intent)
-
-    # 3 Retrieve KB
-    retriever = build_retriever(CLASS_NAME, category=category)
-    docs      = retriever.invoke(user_msg)
-
-    # 4 LLM generation
-    prompt = build_prompt(user_msg, docs, intent, emotion)
-    reply  = llm(prompt,
-                 max_new_tokens=MAX_NEW_TOKENS,
-                 temperature=TEMPERATURE,
-                 stream=False)
-    return reply.strip()
+    """One turn. Raises ModelsLoading before the models are ready and
+    QueueFull / DeadlineExceeded (tools.inference_queue) when the LLM is
+    saturated."""
+    _ensure_ready()
+    timings = {}
+    start = time.perf_counter()
+    deadline = time.monotonic() + REQUEST_DEADLINE_S
+
+    # 0 Reply cache, before any model runs
+    cached = _cached_reply(user_msg, timings)
+    if cached is not None:
+        return _cache_hit(cached, timings, start)
+
+    # 1 Intent (speculative stages start alongside), then similar replies
+    intent, spec = _classify(user_msg, timings)
+    cached = _similar_reply(user_msg, intent, timings)
+    if cached is not None:
+        return _cache_hit(cached, timings, start, spec)
+    _admit(spec)
+
+    # 2-3 Emotion, category filter, KB retrieval
+    prompt, prompt_tokens = _prepare(user_msg, intent, spec, timings)
+
+    # 4 LLM generation (queue wait recorded separately)
+    gen_start = time.perf_counter()
+    reply, generated = _generate(prompt, deadline, timings)
+    reply = reply.strip()
+    timings["generate"] = _generation_ms(timings, gen_start)
+    timings["total"] = (time.perf_counter() - start) * 1000
+    _record_turn(timings, prompt_tokens=prompt_tokens, generated_tokens=generated)
+    if reply_cache is not None and reply:
+        reply_cache.put(user_msg, reply, intent)
+    return reply
+
+def chat_stream(user_msg: str) -> Iterator[str]:
+    """Same turn as chat_once, but returns an iterator of reply tokens.
+
+    Admission is checked before returning, so QueueFull surfaces to the
+    caller before any response has been started."""
+    _ensure_ready()
+    timings = {}
+    start = time.perf_counter()
+    cached = _cached_reply(user_msg, timings)
+    if cached is not None:
+        return iter([_cache_hit(cached, timings, start)])
+    intent, spec = _classify(user_msg, timings)
+    cached = _similar_reply(user_msg, intent, timings)
+    if cached is not None:
+        return iter([_cache_hit(cached, timings, start, spec)])
+    _admit(spec)
+    return _stream_tokens(user_msg, intent, spec, timings, start)
+
+def _stream_tokens(user_msg: str, intent: str, spec, timings: dict,
+                   start: float) -> Iterator[str]:
+    deadline = time.monotonic() + REQUEST_DEADLINE_S
+    prompt, prompt_tokens = _prepare(user_msg, intent, spec, timings)
+
+    gen_start, first, parts = time.perf_counter(), True, []
+    for token in _llm_stream(prompt, deadline, timings):
+        if first:
+            timings["first_token"] = (time.perf_counter() - start) * 1000
+            first = False
+        parts.append(token)
+        yield token
+    timings["generate"] = _generation_ms(timings, gen_start)
+    timings["total"] = (time.perf_counter() - start) * 1000
+    reply = "".join(parts).strip()
+    _record_turn(timings, prompt_tokens=prompt_tokens, generated_tokens=len(parts))
+    if reply_cache is not None and reply:
+        reply_cache.put(user_msg, reply, intent)
+
+# ───────────────────── async variant (asgi_app.py) ──────────
+async def _atimed(timings: dict, stage: str, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[stage] = (time.perf_counter() - start) * 1000
+
+async def achat_once(user_msg: str) -> str:
+    """chat_once for an event loop: models run in executors, retrieval is
+    awaited over HTTP, so no thread is held while Weaviate answers."""
+    _ensure_ready()
+    loop = asyncio.get_running_loop()
+    timings = {}
+    start = time.perf_counter()
+    deadline = time.monotonic() + REQUEST_DEADLINE_S
+
+    # The exact cache lookup is a dict probe: no executor needed
+    cached = _cached_reply(user_msg, timings)
+    if cached is not None:
+        return _cache_hit(cached, timings, start)
+
+    # Emotion + unfiltered retrieval run while intent is classified
+    stage_start = time.perf_counter()
+    emotion_f = loop.run_in_executor(_async_pool, _timed, timings, "emotion",
+                                     detect_emotion, user_msg)
+    docs_f = asyncio.ensure_future(
+        _atimed(timings, "retrieval", aretrieve(CLASS_NAME, user_msg, None, RETRIEVE_K)))
+    intent = await loop.run_in_executor(_async_pool, _timed, timings, "intent",
+                                        classify_intent, user_msg)
+    if reply_cache is not None and reply_cache.semantic:
+        cached = await loop.run_in_executor(_async_pool, _similar_reply, user_msg, intent, timings)
+        if cached is not None:
+            return _cache_hit(cached, timings, start, (emotion_f, docs_f))
+    _admit((emotion_f, docs_f))
+
+    emotion, docs = await asyncio.gather(emotion_f, docs_f)
+    category = _category_for(intent)
+    if category:
+        kept = [d for d in docs if d.metadata.get("category") == category]
+        if len(kept) < MIN_FILTERED_DOCS:
+            kept = await _atimed(timings, "retrieval_filtered",
+                                 aretrieve(CLASS_NAME, user_msg, category, RETRIEVE_K))
+        docs = kept
+    timings["analyse_retrieve"] = (time.perf_counter() - stage_start) * 1000
+
+    prompt, prompt_tokens = _timed(timings, "prompt", _build_prompt,
+                                   user_msg, docs, intent, emotion)
+    gen_start = time.perf_counter()
+    reply, generated = await loop.run_in_executor(None, _generate, prompt, deadline, timings)
+    reply = reply.strip()
+    timings["generate"] = _generation_ms(timings, gen_start)
+    timings["total"] = (time.perf_counter() - start) * 1000
+    await loop.run_in_executor(_async_pool, _record_turn, timings, "ok", prompt_tokens, generated)
+    if reply_cache is not None and reply:
+        await loop.run_in_executor(_async_pool, reply_cache.put, user_msg, reply, intent)
+    return reply
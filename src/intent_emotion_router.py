@@ -1,29 +1,100 @@
 import functools
-from typing import Tuple
+import importlib.util
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
 from transformers import (
     pipeline, AutoTokenizer, AutoModelForSequenceClassification
 )
 
+from tools.embedder import EMBED_MODEL, ONNX_DIR, embed, embed_query
+from tools.intent_model import IntentModel
+from tools.microbatch import MicroBatcher
+
+NLI_BATCH_SIZE = int(os.getenv("NLI_BATCH_SIZE", "16"))
+
+# Classifier runtime: "torch", "onnx" or "onnx-int8" (dynamic int8 quantized,
+# CPU only; both ONNX variants need optimum[onnxruntime] and are exported
+# once into models/onnx/). Device "auto" picks cuda:0 when available.
+CLASSIFIER_RUNTIME = os.getenv("CLASSIFIER_RUNTIME", "torch")
+CLASSIFIER_DEVICE  = os.getenv("CLASSIFIER_DEVICE", "auto")
+INTENT_MODEL       = "facebook/bart-large-mnli"
+EMOTION_MODEL      = "j-hartmann/emotion-english-distilroberta-base"
+
+# Cross-request micro-batching (queue classifier work from concurrent callers)
+MICROBATCH             = os.getenv("CLASSIFIER_MICROBATCH", "0") == "1"
+MICROBATCH_MAX_SIZE    = int(os.getenv("MICROBATCH_MAX_SIZE", "8"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+
+# Embedding-similarity first stage; NLI runs only when the top-two margin is small
+INTENT_CASCADE = os.getenv("INTENT_CASCADE", "0") == "1"
+CASCADE_MARGIN = float(os.getenv("CASCADE_MARGIN", "0.05"))
+EXAMPLES_PATH  = Path(__file__).parent.parent / "evaluation" / "test_data.py"
+
+# Distilled intent model (train_intent.py) in place of NLI; answers below
+# DISTILLED_MIN_CONFIDENCE fall back to NLI (0 = never fall back)
+INTENT_DISTILLED         = os.getenv("INTENT_DISTILLED", "0") == "1"
+DISTILLED_MIN_CONFIDENCE = float(os.getenv("DISTILLED_MIN_CONFIDENCE", "0.6"))
+DISTILLED_MODEL_PATH     = Path(__file__).parent / "models" / "intent_classifier.npz"
+
 # ── lazy pipelines ────────────────────────────────────────────────────────
-@functools.lru_cache(1)
-def _intent_pipe():
-    mdl = "facebook/bart-large-mnli"
+def _device() -> str:
+    if CLASSIFIER_DEVICE != "auto":
+        return CLASSIFIER_DEVICE
+    return "cuda:0" if torch.cuda.is_available() else "cpu"
+
+def _onnx_classifier(mdl: str, quantize: bool, device: str):
+    """ONNX Runtime copy of ``mdl``, exported (and with ``quantize``
+    dynamically int8-quantized) once into models/onnx/."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    import onnxruntime
+
+    path = ONNX_DIR / mdl.replace("/", "__")
+    if not path.exists():
+        ORTModelForSequenceClassification.from_pretrained(mdl, export=True).save_pretrained(path)
+    file_name = "model.onnx"
+    if quantize:
+        qpath, file_name = path / "int8", "model_quantized.onnx"
+        if not (qpath / file_name).exists():
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            ORTQuantizer.from_pretrained(path).quantize(save_dir=qpath, quantization_config=qconfig)
+        path = qpath
+    # int8 kernels are CPU-only; fp32 ONNX uses CUDA when asked and available
+    use_cuda = (not quantize and device.startswith("cuda")
+                and "CUDAExecutionProvider" in onnxruntime.get_available_providers())
+    return ORTModelForSequenceClassification.from_pretrained(
+        path, file_name=file_name,
+        provider="CUDAExecutionProvider" if use_cuda else "CPUExecutionProvider")
+
+def _classifier_pipe(mdl: str):
+    """Text-classification pipeline for ``mdl`` on CLASSIFIER_RUNTIME."""
+    device = _device()
+    if CLASSIFIER_RUNTIME == "torch":
+        model = AutoModelForSequenceClassification.from_pretrained(mdl)
+    elif CLASSIFIER_RUNTIME in ("onnx", "onnx-int8"):
+        model = _onnx_classifier(mdl, CLASSIFIER_RUNTIME == "onnx-int8", device)
+        device = model.device
+    else:
+        raise ValueError(f"Unknown CLASSIFIER_RUNTIME {CLASSIFIER_RUNTIME!r}")
     return pipeline(
         "text-classification",
-        model=AutoModelForSequenceClassification.from_pretrained(mdl),
+        model=model,
         tokenizer=AutoTokenizer.from_pretrained(mdl),
         top_k=None,                # modern arg; returns scores
-        device=0                  # set 0 for GPU
+        device=device,
     )
 
+@functools.lru_cache(1)
+def _intent_pipe():
+    return _classifier_pipe(INTENT_MODEL)
+
 @functools.lru_cache(1)
 def _emotion_pipe():
-    return pipeline(
-        "text-classification",
-        model="j-hartmann/emotion-english-distilroberta-base",
-        top_k=None,
-        device=0                  # set 0 for GPU
-    )
+    return _classifier_pipe(EMOTION_MODEL)
 
 # ── intent helper ─────────────────────────────────────────────────────────
 LABEL_HYPOTHESES = {
@@ -97,21 +168,147 @@ LABEL_HYPOTHESES = {
     ]
 }
 
+@functools.lru_cache(1)
+def _hypothesis_index() -> Tuple[Tuple[str, str], ...]:
+    """Flattened (intent, hypothesis) pairs in LABEL_HYPOTHESES order."""
+    return tuple((intent, hyp)
+                 for intent, hyps in LABEL_HYPOTHESES.items()
+                 for hyp in hyps)
+
+def nli_entailment(pairs: Sequence[Tuple[str, str]],
+                   batch_size: Optional[int] = None) -> List[float]:
+    """Entailment probability for each (premise, hypothesis) pair.
+
+    Pairs are tokenised together and run through the NLI model as padded
+    batches of ``batch_size`` (default ``NLI_BATCH_SIZE``).
+    """
+    if not pairs:
+        return []
+    pipe = _intent_pipe()
+    tok, model = pipe.tokenizer, pipe.model
+    ent_idx = {k.lower(): v for k, v in model.config.label2id.items()}["entailment"]
+    bs = batch_size or NLI_BATCH_SIZE
+
+    scores: List[float] = []
+    for start in range(0, len(pairs), bs):
+        chunk = pairs[start:start + bs]
+        enc = tok([p for p, _ in chunk], [h for _, h in chunk],
+                  padding=True, truncation=True, return_tensors="pt")
+        enc = {k: v.to(pipe.device) for k, v in enc.items()}
+        with torch.no_grad():
+            logits = model(**enc).logits
+        scores.extend(logits.softmax(dim=-1)[:, ent_idx].tolist())
+    return scores
+
+def _best_hypothesis(scores: Sequence[float]) -> Tuple[Optional[str], float]:
+    """Pick (intent, score) of the highest-scoring hypothesis; first wins ties."""
+    best, score = None, 0.0
+    for (intent, _), s in zip(_hypothesis_index(), scores):
+        if s > score:
+            best, score = intent, s
+    return best, score
+
+def nli_intent_many(msgs: Sequence[str],
+                    batch_size: Optional[int] = None) -> List[Tuple[Optional[str], float]]:
+    """Best (intent, score) for each message, scoring all pairs in one go."""
+    index = _hypothesis_index()
+    pairs = [(m, hyp) for m in msgs for _, hyp in index]
+    scores = nli_entailment(pairs, batch_size)
+    n = len(index)
+    return [_best_hypothesis(scores[i * n:(i + 1) * n]) for i in range(len(msgs))]
+
+def nli_intent(msg: str, batch_size: Optional[int] = None) -> Tuple[Optional[str], float]:
+    """Score ``msg`` against every hypothesis and return the best (intent, score)."""
+    return nli_intent_many([msg], batch_size)[0]
+
+@functools.lru_cache(1)
+def _intent_batcher() -> MicroBatcher:
+    return MicroBatcher(nli_intent_many,
+                        max_batch_size=MICROBATCH_MAX_SIZE,
+                        max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+                        name="intent-microbatch")
+
+# ── embedding cascade ─────────────────────────────────────────────────────
+def _labelled_examples() -> List[Tuple[str, str]]:
+    """(query, intent) pairs from evaluation/test_data.py, if present."""
+    if not EXAMPLES_PATH.exists():
+        return []
+    spec = importlib.util.spec_from_file_location("_intent_examples", EXAMPLES_PATH)
+    mod  = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return [(ex["query"], ex["intent"]) for ex in mod.test_data]
+
+@functools.lru_cache(1)
+def _embedding_index() -> Tuple[np.ndarray, Tuple[str, ...], np.ndarray]:
+    """Embeddings of every hypothesis + labelled example, their intents and
+    the per-row intent id used for max-pooling similarities per intent."""
+    rows = [(hyp, intent) for intent, hyp in _hypothesis_index()] + _labelled_examples()
+    intents = tuple(dict.fromkeys(intent for _, intent in rows))
+    ids  = np.array([intents.index(intent) for _, intent in rows])
+    return embed([text for text, _ in rows]), intents, ids
+
+def embedding_intent(msg: str) -> Tuple[str, float]:
+    """Nearest-intent match by cosine similarity; returns (intent, top-two margin)."""
+    matrix, intents, ids = _embedding_index()
+    sims = matrix @ embed([msg])[0]
+    per_intent = np.full(len(intents), -1.0, dtype=np.float32)
+    np.maximum.at(per_intent, ids, sims)
+    order = np.argsort(per_intent)[::-1]
+    margin = float(per_intent[order[0]] - per_intent[order[1]]) if len(order) > 1 else 1.0
+    return intents[order[0]], margin
+
+# ── distilled model ───────────────────────────────────────────────────────
+@functools.lru_cache(1)
+def _distilled_model() -> IntentModel:
+    model = IntentModel.load(DISTILLED_MODEL_PATH)
+    if model.embed_model != EMBED_MODEL:
+        raise ValueError(f"{DISTILLED_MODEL_PATH.name} was trained on {model.embed_model}, "
+                         f"not EMBED_MODEL={EMBED_MODEL}; re-run train_intent.py")
+    return model
+
+def distilled_intent(msg: str) -> Tuple[str, float]:
+    """(intent, probability) from the distilled model. The query embedding
+    is memoized, so retrieval embedding the same message reuses it."""
+    return _distilled_model().predict(embed_query(msg))
+
 def classify_intent(msg: str) -> str:
+    return classify_intent_staged(msg, CASCADE_MARGIN if INTENT_CASCADE else None,
+                                  DISTILLED_MIN_CONFIDENCE if INTENT_DISTILLED else None)[0]
+
+def classify_intent_staged(msg: str, cascade_margin: Optional[float] = None,
+                           distilled_min_confidence: Optional[float] = None) -> Tuple[str, str]:
+    """Return (intent, stage) where stage is "keyword", "distilled",
+    "embedding" or "nli".
+
+    With ``distilled_min_confidence`` set, the distilled model answers
+    whenever its probability reaches it. With ``cascade_margin`` set, the
+    embedding matcher answers whenever its top-two margin reaches the
+    threshold. Otherwise NLI decides.
+    """
     msg_lower = msg.lower()
     
     # Direct classification for very clear patterns
     if any(word in msg_lower for word in ["website", "app", "login", "site"]) and \
        any(word in msg_lower for word in ["error", "broken", "not working", "issue", "problem"]):
-        return "TechSupport"
+        return "TechSupport", "keyword"
     
     if any(word in msg_lower for word in ["price", "cost", "buy", "purchase"]) and \
        any(word in msg_lower for word in ["car", "vehicle", "honda", "toyota"]):
-        return "SalesInquiry"
+        return "SalesInquiry", "keyword"
         
     if any(word in msg_lower for word in ["how", "what is", "explain", "difference"]) and \
        any(word in msg_lower for word in ["feature", "engine", "specification", "consumption"]):
-        return "ProductFAQ"
+        return "ProductFAQ", "keyword"
+
+    if distilled_min_confidence is not None:
+        intent, prob = distilled_intent(msg)
+        if prob >= distilled_min_confidence:
+            return intent, "distilled"
+
+    if cascade_margin is not None:
+        intent, margin = embedding_intent(msg)
+        if margin >= cascade_margin:
+            return intent, "embedding"
     
 
     # Strong keyword signals for specific misclassification patterns
@@ -129,36 +326,43 @@ def classify_intent(msg: str) -> str:
     sales_count = sum(1 for word in sales_signals if word in msg_lower)
     product_count = sum(1 for word in product_signals if word in msg_lower)
     
-    # Regular NLI classification
-    nli = _intent_pipe()
-    best, score = None, 0.0
-    for intent, hyps in LABEL_HYPOTHESES.items():
-        for hyp in hyps:
-            res   = nli(f"{msg} </s></s> {hyp}")[0]
-            ent_d = next((x for x in res if x["label"].lower() == "entailment"), None)
-            if ent_d and ent_d["score"] > score:
-                best, score = intent, ent_d["score"]
+    # Regular NLI classification (all hypotheses batched)
+    best, score = _intent_batcher().submit(msg) if MICROBATCH else nli_intent(msg)
     
      # Handle ambiguous cases with keyword signals
     if best == "ProductFAQ" and score < 0.8:
         if tech_count > 2 and tech_count > product_count:
-            return "TechSupport"
+            return "TechSupport", "nli"
         if sales_count > 2 and sales_count > product_count:
-            return "SalesInquiry"
+            return "SalesInquiry", "nli"
     
 
     if score < 0.30:  # 
         if tech_count >= 2:
-            return "TechSupport"
+            return "TechSupport", "nli"
         if sales_count >= 2:  
-            return "SalesInquiry"
+            return "SalesInquiry", "nli"
         if product_count >= 2:  
-            return "ProductFAQ"
-        return "UnknownIntent"
+            return "ProductFAQ", "nli"
+        return "UnknownIntent", "nli"
     
-    return best or "UnknownIntent"
+    return best or "UnknownIntent", "nli"
+
+def detect_emotion_many(msgs: Sequence[str]) -> List[str]:
+    """Top emotion label for each message, run as one pipeline batch."""
+    preds = _emotion_pipe()(list(msgs), batch_size=len(msgs))
+    return [max(p, key=lambda x: x["score"])["label"] for p in preds]
+
+@functools.lru_cache(1)
+def _emotion_batcher() -> MicroBatcher:
+    return MicroBatcher(detect_emotion_many,
+                        max_batch_size=MICROBATCH_MAX_SIZE,
+                        max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+                        name="emotion-microbatch")
 
 def detect_emotion(msg: str) -> str:
+    if MICROBATCH:
+        return _emotion_batcher().submit(msg)
     preds = _emotion_pipe()(msg)[0]                  
     return max(preds, key=lambda x: x["score"])["label"]
 
@@ -11,25 +11,37 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import functools
+import hashlib
 import logging
 import os
+import random
 import re
 import textwrap
+import threading
+import time
 import json
 import urllib.parse
 from collections import defaultdict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Optional
 from uuid import uuid5, NAMESPACE_URL
 
 
+import httpx
 from dotenv import load_dotenv
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
 from langchain.docstore.document import Document
+from langchain.schema import BaseRetriever
 from langchain.text_splitter import MarkdownHeaderTextSplitter, TokenTextSplitter
-from langchain_community.vectorstores import Weaviate
+from transformers import AutoTokenizer
 import weaviate
 
+from tools.embedder import EMBED_MODEL, embed, embed_query
+from tools.term_index import TermSnapshotStore, chunk_terms
+from tools.vector_index import SnapshotStore
+
 # ---------------------------------------------------------------------------
 # Config & logging
 # ---------------------------------------------------------------------------
@@ -37,6 +49,52 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 OUTPUT_DIR = SCRIPT_DIR / "output"
 CONTENT_MD = OUTPUT_DIR / "content.md"
 
+# Prompt-ready snippet stored next to each chunk, with its token count under
+# the generator's tokenizer, so the request path never has to tokenize.
+SNIPPET_CHARS    = 300
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "HuggingFaceH4/zephyr-7b-beta")
+
+# Crawl parallelism and politeness
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))       # pages in flight
+CRAWL_DOMAIN_RPS  = float(os.getenv("CRAWL_DOMAIN_RPS", "2"))      # per domain; 0 = unlimited
+CRAWL_RETRIES     = int(os.getenv("CRAWL_RETRIES", "3"))
+CRAWL_BACKOFF_S   = float(os.getenv("CRAWL_BACKOFF_S", "1.0"))
+RETRY_STATUS      = {429, 500, 502, 503, 504}
+GONE_STATUS       = {404, 410}
+PROGRESS_EVERY    = 25
+
+# Streaming ingest: crawled pages waiting for split/upload before the
+# crawl workers block, and whether to keep the raw content.md dump
+PIPELINE_MAX_PENDING = int(os.getenv("PIPELINE_MAX_PENDING", "16"))
+CRAWL_DUMP           = os.getenv("CRAWL_DUMP", "0") == "1"
+
+# Embed chunks and queries in-process instead of via Weaviate's
+# text2vec-transformers container; chunks are embedded this many at a time
+CLIENT_EMBEDDINGS  = os.getenv("CLIENT_EMBEDDINGS", "0") == "1"
+EMBED_INGEST_BATCH = int(os.getenv("EMBED_INGEST_BATCH", "256"))
+
+# "local" serves retrieval from an on-disk NumPy index (tools.vector_index)
+# written by this script, with no Weaviate at all; vectors are always local
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "weaviate")
+INDEX_DIR         = OUTPUT_DIR / "vector_index"
+EMBEDS_LOCALLY    = CLIENT_EMBEDDINGS or RETRIEVER_BACKEND == "local"
+
+# Inverted index over chunk terms (tools.term_index), kept next to either
+# backend; queries naming a model/trim from the headers are answered from
+# it or fused with the vector hits (reciprocal rank fusion, constant RRF_K)
+TERM_INDEX     = os.getenv("TERM_INDEX", "1") == "1"
+TERM_INDEX_DIR = OUTPUT_DIR / "term_index"
+RRF_K          = 60
+
+# Local vector / term index writes are applied as a snapshot swap whenever
+# this many upserts + deletes are buffered, so ingest memory stays bounded
+SNAPSHOT_FLUSH_ROWS = int(os.getenv("SNAPSHOT_FLUSH_ROWS", "20000"))
+
+# url → {hash, etag, last_modified, class, chunks} from the last ingest;
+# objects the manifest does not own are swept on the first run and on --full
+MANIFEST_PATH   = OUTPUT_DIR / "manifest.json"
+SWEEP_PAGE_SIZE = 500
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)-8s | %(message)s",
@@ -54,29 +112,91 @@ def create_weaviate_client() -> weaviate.Client:
     return weaviate.Client(url=url)
 
 
+# Long-lived client shared by request threads (its HTTP session keeps
+# connections alive); health is re-checked at most every interval.
+HEALTH_CHECK_INTERVAL = float(os.getenv("WEAVIATE_HEALTH_INTERVAL", "30"))
+
+_client_lock = threading.RLock()
+_shared_client: weaviate.Client | None = None
+_last_health_check = 0.0
+_retriever_cache: dict[tuple[str, str | None, int], object] = {}
+
+
+def get_weaviate_client() -> weaviate.Client:
+    """Return the shared client, reconnecting if it stops reporting ready."""
+    global _shared_client, _last_health_check
+    with _client_lock:
+        now = time.monotonic()
+        if _shared_client is not None:
+            if now - _last_health_check < HEALTH_CHECK_INTERVAL:
+                return _shared_client
+            try:
+                healthy = _shared_client.is_ready()
+            except Exception:
+                healthy = False
+            if healthy:
+                _last_health_check = now
+                return _shared_client
+            logger.warning("Weaviate client not ready – reconnecting")
+            _retriever_cache.clear()
+
+        _shared_client = create_weaviate_client()
+        _last_health_check = now
+        return _shared_client
+
+
+def reset_weaviate_client():
+    """Drop the shared client and every cached retriever."""
+    global _shared_client
+    with _client_lock:
+        _shared_client = None
+        _retriever_cache.clear()
+        _class_fields.clear()
+
+
+def _class_properties(vect_module: str) -> list[dict]:
+    # prompt-only fields are not vectorized
+    skip = {"moduleConfig": {vect_module: {"skip": True}}} if vect_module != "none" else {}
+    return [
+        {"name": "headers",  "dataType": ["text[]"]},
+        {"name": "content",  "dataType": ["text"]},
+        {"name": "category", "dataType": ["text"]},
+        {"name": "snippet",  "dataType": ["text"], **skip},
+        {"name": "token_count", "dataType": ["int"]},
+        {"name": "source",   "dataType": ["text"], **skip},
+    ]
+
+
 def ensure_class(client: weaviate.Client, class_name: str):
-    existing = {c["class"] for c in client.schema.get().get("classes", [])}
+    """Create ``class_name`` if needed. An existing class that predates a
+    property (e.g. ``snippet`` on classes from before precut snippets)
+    gets the missing properties added, so imports never rely on
+    auto-schema."""
+    existing = {c["class"]: c for c in client.schema.get().get("classes", [])}
     if class_name in existing:
+        current = existing[class_name]
+        have = {p["name"] for p in current.get("properties", [])}
+        for prop in _class_properties(current.get("vectorizer", "none")):
+            if prop["name"] not in have:
+                client.schema.property.create(class_name, prop)
+                logger.info("Added property '%s' to existing class '%s'", prop["name"], class_name)
         return
 
-    vect_module = os.getenv("VECTORIZER_MODULE", "text2vec-transformers")
-    model_name  = os.getenv("TRANSFORMERS_MODEL_NAME",
-                            "sentence-transformers/all-MiniLM-L6-v2")
+    if CLIENT_EMBEDDINGS:
+        # vectors come from tools.embedder at ingest and query time
+        vect_module, model_name, module_config = "none", EMBED_MODEL, {}
+    else:
+        vect_module = os.getenv("VECTORIZER_MODULE", "text2vec-transformers")
+        model_name  = os.getenv("TRANSFORMERS_MODEL_NAME",
+                                "sentence-transformers/all-MiniLM-L6-v2")
+        module_config = {vect_module: {"model": model_name}}
 
     schema = {
         "class": class_name,
         "description": f"KB content for {class_name}",
         "vectorizer": vect_module,
-        "moduleConfig": {
-            vect_module: {
-                "model": model_name
-            }
-        },
-        "properties": [
-            {"name": "headers",  "dataType": ["text[]"]},
-            {"name": "content",  "dataType": ["text"]},
-            {"name": "category", "dataType": ["text"]},
-        ],
+        "moduleConfig": module_config,
+        "properties": _class_properties(vect_module),
     }
 
     client.schema.create_class(schema)
@@ -84,6 +204,8 @@ def ensure_class(client: weaviate.Client, class_name: str):
         "Created Weaviate class '%s' using module '%s' (model=%s)",
         class_name, vect_module, model_name
     )
+
+
 # ---------------------------------------------------------------------------
 # Markdown splitting
 # ---------------------------------------------------------------------------
@@ -108,6 +230,16 @@ def split_markdown(text: str, *, max_tokens: int = 1536, overlap: int = 0) -> Li
             docs.append(Document(page_content=chunk, metadata=doc.metadata))
     return docs
 
+@functools.lru_cache(1)
+def _prompt_tokenizer():
+    return AutoTokenizer.from_pretrained(PROMPT_TOKENIZER, legacy=False)
+
+
+def make_snippet(content: str) -> tuple[str, int]:
+    """Precut prompt snippet for a chunk and its token count."""
+    snippet = textwrap.shorten(content.replace("\n", " "), SNIPPET_CHARS)
+    return snippet, len(_prompt_tokenizer().encode(snippet))
+
 # ---------------------------------------------------------------------------
 # Crawling
 # ---------------------------------------------------------------------------
@@ -117,50 +249,541 @@ def domain_from_url(url: str) -> str:
     return re.sub(r"^www\.", "", netloc).split(":")[0]  # strip www & port
 
 
-async def crawl(urls: List[str]):
+class DomainThrottle:
+    """Space requests to the same domain at least ``1 / rps`` seconds apart.
+
+    Slots are reserved under a per-domain lock and slept on outside it, so
+    callers for other domains (and later slots) are never held up.
+    """
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._next: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def wait(self, domain: str):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._locks[domain]:
+            now = loop.time()
+            slot = max(now, self._next.get(domain, now))
+            self._next[domain] = slot + self.interval
+        await asyncio.sleep(slot - now)
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    markdown: str | None = None          # None: failed, gone or not modified
+    status: int | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False           # answered 304 to a conditional request
+
+    @property
+    def gone(self) -> bool:
+        return self.status in GONE_STATUS
+
+
+def _header(headers: dict | None, name: str) -> str | None:
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+async def _not_modified(http: httpx.AsyncClient, url: str, validators: dict) -> bool:
+    """Conditional GET with the stored ETag / Last-Modified; True on 304."""
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    if not headers:
+        return False
+    try:
+        async with http.stream("GET", url, headers=headers) as resp:   # body never read
+            return resp.status_code == 304
+    except httpx.HTTPError:
+        return False
+
+
+async def _fetch(crawler, url: str, config, throttle: DomainThrottle,
+                 slots: asyncio.Semaphore, retries: int, backoff: float) -> CrawledPage:
+    """Crawl ``url``, retrying failures and 429/5xx with jittered exponential
+    backoff; 404/410 are final. ``markdown`` is None if no attempt succeeded."""
+    domain = domain_from_url(url)
+    reason = ""
+    for attempt in range(retries + 1):
+        await throttle.wait(domain)
+        try:
+            async with slots:
+                result = await crawler.arun(url, config=config)
+            status = getattr(result, "status_code", None)
+            if status in GONE_STATUS:
+                return CrawledPage(url, status=status)
+            if result.success and status not in RETRY_STATUS:
+                headers = getattr(result, "response_headers", None)
+                return CrawledPage(url, result.markdown, status,
+                                   etag=_header(headers, "etag"),
+                                   last_modified=_header(headers, "last-modified"))
+            reason = result.error_message or f"HTTP {status}"
+        except Exception as exc:
+            reason = repr(exc)
+        if attempt < retries:
+            delay = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.warning("Retrying %s in %.1fs (%s)", url, delay, reason)
+            await asyncio.sleep(delay)
+    logger.error("Giving up on %s after %d attempts: %s", url, retries + 1, reason)
+    return CrawledPage(url)
+
+
+async def crawl_stream(urls: Iterable[str], *, concurrency: int = CRAWL_CONCURRENCY,
+                       domain_rps: float = CRAWL_DOMAIN_RPS, retries: int = CRAWL_RETRIES,
+                       backoff: float = CRAWL_BACKOFF_S, output: Path | None = None,
+                       validators: dict[str, dict] | None = None,
+                       max_pending: int = PIPELINE_MAX_PENDING,
+                       stats: dict | None = None) -> AsyncIterator[CrawledPage]:
+    """Yield crawled pages as they finish.
+
+    ``concurrency`` workers pull URLs from ``urls`` (consumed lazily) and
+    hand pages over through a queue of ``max_pending``. When the consumer
+    falls behind, the workers block, so memory stays bounded by the queue
+    and not by the crawl. Each domain is hit at most ``domain_rps`` times per
+    second. URLs with ``validators`` (``etag`` / ``last_modified``) are first
+    checked with a conditional GET and skip the browser on a 304. With
+    ``output``, every crawled page is also appended to that markdown dump.
+    ``stats`` (if given) is updated in place.
+    """
     config = CrawlerRunConfig(
         excluded_tags=["header", "footer", "nav", "section.article-relatives"],
         word_count_threshold=10,
         exclude_external_links=True,
         exclude_social_media_links=True,
     )
+    validators = validators or {}
+    stats = stats if stats is not None else {}
+    stats.update(done=0, failed=0, not_modified=0)
+    logger.info("Crawling (concurrency %d, %.1f req/s per domain)%s", concurrency, domain_rps,
+                f", raw markdown to {output}" if output else "")
 
-    OUTPUT_DIR.mkdir(exist_ok=True)
-    logger.info("Writing raw markdown to %s", CONTENT_MD)
+    throttle = DomainThrottle(domain_rps)
+    slots = asyncio.Semaphore(max(1, concurrency))
+    pending: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_pending))
+    url_iter = iter(urls)
+    start = time.perf_counter()
 
-    async with AsyncWebCrawler() as crawler:
-        with CONTENT_MD.open("w", encoding="utf-8") as fp:  # normal sync file I/O
-            for url in urls:
-                logger.info("Scraping %s", url)
-                result = await crawler.arun(url, config=config)
-                markdown = result.markdown or f"No markdown content for {url}"
-                fp.write(f"## {url}\n\n{markdown}\n\n")
-    logger.info("Finished scraping – combined markdown saved.")
+    async def crawl_one(crawler, http, url):
+        if url in validators:
+            await throttle.wait(domain_from_url(url))
+            async with slots:
+                if await _not_modified(http, url, validators[url]):
+                    return CrawledPage(url, status=304, not_modified=True)
+        return await _fetch(crawler, url, config, throttle, slots, retries, backoff)
+
+    async def worker(crawler, http):
+        try:
+            for url in url_iter:             # shared iterator: each URL goes to one worker
+                await pending.put(await crawl_one(crawler, http, url))
+        finally:
+            await pending.put(None)
+
+    if output:
+        output.parent.mkdir(exist_ok=True)
+    fp = output.open("w", encoding="utf-8") if output else None
+    async with AsyncWebCrawler() as crawler, \
+            httpx.AsyncClient(follow_redirects=True, timeout=15.0) as http:
+        workers = [asyncio.create_task(worker(crawler, http)) for _ in range(max(1, concurrency))]
+        try:
+            running = len(workers)
+            while running:
+                page = await pending.get()
+                if page is None:
+                    running -= 1
+                    continue
+                if page.not_modified:
+                    stats["not_modified"] += 1
+                elif page.markdown is None:
+                    stats["failed"] += 1
+                if fp and not page.not_modified:
+                    fp.write(f"## {page.url}\n\n"
+                             f"{page.markdown or f'No markdown content for {page.url}'}\n\n")
+                    fp.flush()
+                stats["done"] += 1
+                if stats["done"] % PROGRESS_EVERY == 0:
+                    _log_progress(stats, start)
+                yield page
+            await asyncio.gather(*workers)          # surface worker errors
+        finally:
+            for task in workers:
+                task.cancel()
+            if fp:
+                fp.close()
+
+    stats["elapsed_s"] = time.perf_counter() - start
+    stats["pages_per_s"] = stats["done"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+    _log_progress(stats, start)
+    logger.info("Finished scraping.")
+
+
+def _log_progress(stats: dict, start: float):
+    elapsed = time.perf_counter() - start
+    logger.info("Crawled %d pages – %.2f pages/s, %d not modified, %d failed",
+                stats["done"], stats["done"] / elapsed if elapsed else 0.0,
+                stats["not_modified"], stats["failed"])
+
+
+async def crawl(urls: List[str], *, output: Path | None = CONTENT_MD,
+                **kwargs) -> tuple[list[CrawledPage], dict]:
+    """Collect :func:`crawl_stream` into a list; return (pages, run stats).
+    Pages are in completion order, not input order."""
+    stats: dict = {"pages": len(urls)}
+    pages = [page async for page in crawl_stream(urls, output=output, stats=stats, **kwargs)]
+    return pages, stats
 
 # ---------------------------------------------------------------------------
 # Ingestion pipeline per domain
 # ---------------------------------------------------------------------------
 
-def ingest_markdown(md_text: str, class_name: str):
-    client = create_weaviate_client()
-    ensure_class(client, class_name)
-
-    docs = split_markdown(md_text)
-    logger.info("%d chunks generated for class %s", len(docs), class_name)
-
-    client.batch.configure(batch_size=100, dynamic=True, timeout_retries=3)
-    uploaded = 0
-    with client.batch as batch:
-        for d in docs:
-            obj = {
-                "headers": list(d.metadata.values()),
-                "content": d.page_content,
-                "category": d.metadata.get("Header1", "Uncategorised"),
-            }
-            uid = uuid5(NAMESPACE_URL, d.page_content)
-            batch.add_data_object(obj, class_name, uuid=uid)
-            uploaded += 1
-    logger.info("Uploaded %d objects to %s", uploaded, class_name)
+def class_name_for(domain: str) -> str:
+    return f"Domain_{re.sub(r'[^0-9A-Za-z]', '_', domain)}"
+
+
+def _chunk_object(d: Document, source: str) -> dict:
+    snippet, token_count = make_snippet(d.page_content)
+    return {
+        "headers": list(d.metadata.values()),
+        "content": d.page_content,
+        "category": d.metadata.get("Header1", "Uncategorised"),
+        "snippet": snippet,
+        "token_count": token_count,
+        "source": source,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Incremental re-ingestion
+# ---------------------------------------------------------------------------
+
+class CrawlManifest:
+    """What the last ingest stored for each URL: content hash, HTTP
+    validators, target class and chunk UUIDs. Saved atomically as JSON;
+    with ``path=None`` it is kept in memory only."""
+
+    def __init__(self, path: Path | None = MANIFEST_PATH):
+        self.path = path
+        self.pages: dict[str, dict] = {}
+        if path is not None and path.exists():
+            self.pages = json.loads(path.read_text(encoding="utf-8")).get("pages", {})
+
+    def validators(self) -> dict[str, dict]:
+        return {url: {"etag": e.get("etag"), "last_modified": e.get("last_modified")}
+                for url, e in self.pages.items()
+                if e.get("etag") or e.get("last_modified")}
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"pages": self.pages}, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def content_hash(markdown: str) -> str:
+    return hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+
+
+def chunk_uuid(url: str, content: str) -> str:
+    """Stable per-page chunk id: identical text on two pages stays two
+    objects, so deleting one page never removes the other's chunks."""
+    return str(uuid5(NAMESPACE_URL, f"{url}\n{content}"))
+
+
+def _delete_chunks(client: weaviate.Client, class_name: str, uuids) -> int:
+    deleted = 0
+    for uid in uuids:
+        try:
+            client.data_object.delete(uid, class_name=class_name)
+            deleted += 1
+        except weaviate.exceptions.UnexpectedStatusCodeException as exc:
+            if exc.status_code != 404:          # already gone is fine
+                raise
+    return deleted
+
+
+class _WeaviateSink:
+    """Chunk writes through the Weaviate client's auto-flushing batch."""
+
+    def __init__(self):
+        self.client = create_weaviate_client()
+        self.client.batch.configure(batch_size=100, dynamic=True, timeout_retries=3)
+        self._ensured: set[str] = set()
+
+    def add(self, class_name: str, uid: str, obj: dict, vector=None):
+        if class_name not in self._ensured:
+            ensure_class(self.client, class_name)
+            self._ensured.add(class_name)
+        self.client.batch.add_data_object(obj, class_name, uuid=uid,
+                                          vector=None if vector is None else vector.tolist())
+
+    def delete(self, class_name: str, uuids) -> int:
+        return _delete_chunks(self.client, class_name, uuids)
+
+    def ids(self, class_name: str) -> Iterator[str]:
+        """Every object id in ``class_name``, paged with the cursor API."""
+        if not self.client.schema.exists(class_name):
+            return
+        after = None
+        while True:
+            page = self.client.data_object.get(class_name=class_name, limit=SWEEP_PAGE_SIZE,
+                                               after=after) or {}
+            objects = page.get("objects") or []
+            if not objects:
+                return
+            yield from (o["id"] for o in objects)
+            after = objects[-1]["id"]
+
+    def flush(self):
+        self.client.batch.flush()
+
+
+class _SnapshotSink:
+    """Chunk writes collected per class and applied to a snapshot store
+    (``store(class_name)``) as one swap per class, on flush and whenever
+    SNAPSHOT_FLUSH_ROWS writes are buffered."""
+
+    def __init__(self, store: Callable[[str], SnapshotStore]):
+        self._store = store
+        self._upserts: dict[str, list] = defaultdict(list)
+        self._deletes: dict[str, set] = defaultdict(set)
+        self._buffered = 0
+
+    def _add(self, class_name: str, upsert: tuple):
+        self._upserts[class_name].append(upsert)
+        self._grow(1)
+
+    def delete(self, class_name: str, uuids) -> int:
+        uuids = list(uuids)
+        self._deletes[class_name].update(uuids)
+        self._grow(len(uuids))
+        return len(uuids)
+
+    def _grow(self, n: int):
+        self._buffered += n
+        if self._buffered >= SNAPSHOT_FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        for class_name in set(self._upserts) | set(self._deletes):
+            self._store(class_name).update(self._upserts.pop(class_name, []),
+                                           self._deletes.pop(class_name, set()))
+        self._buffered = 0
+
+
+class _LocalIndexSink(_SnapshotSink):
+    """Chunk writes to the local vector index."""
+
+    def __init__(self):
+        super().__init__(local_store)
+
+    def add(self, class_name: str, uid: str, obj: dict, vector):
+        row = {k: obj[k] for k in ("snippet", "token_count", "category")}
+        self._add(class_name, (uid, vector, row))
+
+    def ids(self, class_name: str) -> Iterable[str]:
+        index = local_store(class_name).current()
+        return index.ids if index is not None else []
+
+
+class _TermIndexSink(_SnapshotSink):
+    """Chunk terms written to the term index."""
+
+    def __init__(self):
+        super().__init__(term_store)
+
+    def add(self, class_name: str, uid: str, obj: dict):
+        row = {k: obj[k] for k in ("snippet", "token_count", "category")}
+        self._add(class_name, (uid, chunk_terms(obj["content"], obj["headers"]), row))
+
+
+class PageIngester:
+    """Apply crawled pages one at a time, using ``manifest`` as the previous
+    state, so a crawl can be ingested while it is running.
+
+    Unchanged pages (304 or same content hash) are skipped. Changed pages
+    are re-split, and only chunks whose UUID is new are uploaded; chunks
+    that no longer appear are deleted. Pages that 404/410 or are passed
+    to :meth:`remove` lose all their chunks. Failed crawls keep what they
+    had. ``full`` re-uploads every crawled chunk regardless. Chunks go to
+    Weaviate, or with RETRIEVER_BACKEND=local to the on-disk vector index;
+    :meth:`close` flushes the rest, saves the manifest and returns the
+    report. When vectors are computed here (CLIENT_EMBEDDINGS or the local
+    backend), chunks are held back and embedded EMBED_INGEST_BATCH at a time.
+    With TERM_INDEX the same writes also update the term index. Local index
+    and term index writes are published every SNAPSHOT_FLUSH_ROWS writes.
+    """
+
+    def __init__(self, manifest: CrawlManifest, full: bool = False,
+                 class_name: str | None = None):
+        self.manifest = manifest
+        self.full = full
+        self.class_name = class_name          # None: each page's domain class
+        self.report: dict[str, int] = defaultdict(int)
+        self._sink = _LocalIndexSink() if RETRIEVER_BACKEND == "local" else _WeaviateSink()
+        self._pending: list[tuple[dict, str, str]] = []     # awaiting client-side embedding
+        self._terms = _TermIndexSink() if TERM_INDEX else None
+
+    def remove(self, url: str):
+        entry = self.manifest.pages.pop(url, None)
+        if entry:
+            self.report["chunks_deleted"] += self._delete(entry["class"], entry["chunks"])
+            self.report["pages_removed"] += 1
+
+    def add(self, page: CrawledPage):
+        report, entry = self.report, self.manifest.pages.get(page.url)
+        if page.gone:
+            return self.remove(page.url)
+        if page.not_modified:
+            report["pages_not_modified"] += 1
+            report["chunks_skipped"] += len(entry["chunks"]) if entry else 0
+            return
+        if page.markdown is None:
+            report["pages_failed"] += 1
+            return
+
+        digest = content_hash(page.markdown)
+        class_name = self.class_name or class_name_for(domain_from_url(page.url))
+        validators = {"etag": page.etag, "last_modified": page.last_modified}
+        if entry and not self.full and entry["hash"] == digest and entry["class"] == class_name:
+            entry.update(validators)
+            report["pages_unchanged"] += 1
+            report["chunks_skipped"] += len(entry["chunks"])
+            return
+
+        chunks = {chunk_uuid(page.url, d.page_content): d for d in split_markdown(page.markdown)}
+        old = set(entry["chunks"]) if entry and entry["class"] == class_name else set()
+        for uid, d in chunks.items():
+            if self.full or uid not in old:
+                self._upload(_chunk_object(d, page.url), class_name, uid)
+                report["chunks_uploaded"] += 1
+            else:
+                report["chunks_skipped"] += 1
+        if entry:
+            stale = set(entry["chunks"]) - set(chunks) if entry["class"] == class_name \
+                else entry["chunks"]
+            report["chunks_deleted"] += self._delete(entry["class"], stale)
+        report["pages_changed" if entry else "pages_new"] += 1
+        self.manifest.pages[page.url] = {"hash": digest, "class": class_name,
+                                         "chunks": sorted(chunks), **validators}
+
+    def _delete(self, class_name: str, uuids) -> int:
+        uuids = list(uuids)
+        if self._terms:
+            self._terms.delete(class_name, uuids)
+        return self._sink.delete(class_name, uuids)
+
+    def _upload(self, obj: dict, class_name: str, uid: str):
+        if self._terms:
+            self._terms.add(class_name, uid, obj)
+        if not EMBEDS_LOCALLY:
+            self._sink.add(class_name, uid, obj)
+            return
+        self._pending.append((obj, class_name, uid))
+        if len(self._pending) >= EMBED_INGEST_BATCH:
+            self._flush_pending()
+
+    def _flush_pending(self):
+        """Embed buffered chunks in one call and pass them on with their vectors."""
+        if not self._pending:
+            return
+        vectors = embed([obj["content"] for obj, _, _ in self._pending])
+        for (obj, class_name, uid), vec in zip(self._pending, vectors):
+            self._sink.add(class_name, uid, obj, vec)
+        self._pending.clear()
+
+    def sweep(self, class_names: Iterable[str]):
+        """Delete objects in ``class_names`` that no manifest entry owns,
+        e.g. chunks uploaded before the manifest existed (under the old
+        content-only UUIDs). Call after every page has been added."""
+        for class_name in class_names:
+            owned = {uid for entry in self.manifest.pages.values()
+                     if entry["class"] == class_name for uid in entry["chunks"]}
+            stale = [uid for uid in self._sink.ids(class_name) if uid not in owned]
+            if stale:
+                logger.info("Sweeping %d objects of %s not in the manifest", len(stale), class_name)
+            self.report["chunks_swept"] += self._delete(class_name, stale)
+
+    def close(self) -> dict:
+        self._flush_pending()
+        self._sink.flush()
+        if self._terms:
+            self._terms.flush()
+        self.manifest.save()
+        return dict(self.report)
+
+
+def ingest_pages(pages: Iterable[CrawledPage], manifest: CrawlManifest,
+                 removed: Iterable[str] = (), full: bool = False,
+                 sweep: Iterable[str] = (), class_name: str | None = None) -> dict:
+    """Run ``pages`` and ``removed`` URLs through a :class:`PageIngester`,
+    then sweep the ``sweep`` classes of objects the manifest does not own."""
+    ingester = PageIngester(manifest, full, class_name)
+    for url in removed:
+        ingester.remove(url)
+    for page in pages:
+        ingester.add(page)
+    ingester.sweep(sweep)
+    return ingester.close()
+
+_DUMP_SOURCE_RE = re.compile(r"^## (https?://\S+)[ \t]*$", re.MULTILINE)
+
+
+def pages_from_dump(lines: Iterable[str]) -> Iterator[CrawledPage]:
+    """Cut a content.md dump (an open file or any iterable of lines) back
+    into its pages, keyed by source URL – each page starts with the
+    ``## <url>`` line crawl_stream() writes. Only one page is held at a time."""
+    url, body = None, []
+
+    def flush():
+        text = "".join(body).strip()
+        if url and text and text != f"No markdown content for {url}":
+            return CrawledPage(url, text, 200)
+
+    for line in lines:
+        mark = _DUMP_SOURCE_RE.match(line)
+        if mark:
+            page = flush()
+            if page:
+                yield page
+            url, body = mark.group(1), []
+        else:
+            body.append(line)
+    page = flush()
+    if page:
+        yield page
+
+
+def ingest_markdown(md_text: str, class_name: str | None = None, *,
+                    manifest: CrawlManifest | None = None, full: bool = False) -> dict:
+    """Ingest a content.md dump. The corpus is split once, page by page;
+    each chunk goes to ``class_name`` if given, else only to its own page's
+    domain class. Markdown without ``## <url>`` page markers is ingested as
+    one page (``markdown:<class_name>``), which needs ``class_name``.
+
+    Pages are tracked in ``manifest`` if one is passed; otherwise in a
+    throwaway in-memory manifest, so the crawl's output/manifest.json is
+    neither read nor rewritten."""
+    if _DUMP_SOURCE_RE.search(md_text):
+        pages = pages_from_dump(md_text.splitlines(keepends=True))
+    elif class_name is None:
+        raise ValueError("markdown has no '## <url>' page markers; pass class_name")
+    else:
+        text = md_text.strip()
+        pages = [CrawledPage(f"markdown:{class_name}", text, 200)] if text else []
+    return ingest_pages(pages, manifest or CrawlManifest(None), full=full,
+                        class_name=class_name)
 
 # ---------------------------------------------------------------------------
 # Save Class Name
@@ -187,26 +810,282 @@ def save_latest_class_info(class_name: str):
 # Build Retriever
 # ---------------------------------------------------------------------------
 
-def build_retriever(class_name: str, category: str | None = None):
-    client = create_weaviate_client()
-    store  = Weaviate(
-        client=client,
-        index_name=class_name,
-        text_key="content",
-        attributes=["category", "headers"]
-    )
-    search_kwargs = {"k": 8}
-    if category:
-        search_kwargs["filters"] = {
-            "path": ["category"],
-            "operator": "Equal",
-            "valueText": category
-        }
-    return store.as_retriever(search_kwargs=search_kwargs)
+def build_retriever(class_name: str, category: str | None = None, k: int = 8):
+    """Retriever for ``class_name`` (optionally category-filtered), cached per
+    (class_name, category, k) on top of the shared Weaviate client.
+
+    Documents carry only the precut ``snippet`` as page_content plus
+    ``token_count`` and ``category`` metadata (classes and objects from
+    before snippets fall back to shortened ``content``). With CLIENT_EMBEDDINGS the
+    query is embedded locally (memoized) and searched with nearVector; with
+    RETRIEVER_BACKEND=local it is searched in the on-disk vector index.
+    With TERM_INDEX the retriever goes through :func:`hybrid_search`.
+    """
+    with _client_lock:
+        key = (class_name, category, k)
+        client = get_weaviate_client() if RETRIEVER_BACKEND != "local" else None
+        if key not in _retriever_cache:
+            retriever = (LocalRetriever(class_name=class_name, category=category, k=k)
+                         if client is None else _new_retriever(client, class_name, category, k))
+            if TERM_INDEX:
+                retriever = HybridRetriever(vector=retriever, class_name=class_name,
+                                            category=category, k=k)
+            _retriever_cache[key] = retriever
+        return _retriever_cache[key]
+
+
+def _new_retriever(client: weaviate.Client, class_name: str, category: str | None, k: int = 8):
+    return WeaviateRetriever(client=client, class_name=class_name, category=category, k=k)
+
+
+# Get fields per class: current classes return the precut snippet (and the
+# object id, to fetch content for objects stored before snippets existed);
+# classes created before snippets only have content.
+SNIPPET_FIELDS = "snippet token_count category _additional {id}"
+LEGACY_FIELDS  = "content category"
+
+_class_fields: dict[str, tuple[str, float]] = {}     # class → (fields, re-probe after)
+
+
+def _cached_fields(class_name: str) -> str | None:
+    entry = _class_fields.get(class_name)
+    return entry[0] if entry and time.monotonic() < entry[1] else None
+
+
+def _remember_fields(class_name: str, schema: dict | None) -> str:
+    """Fields for ``class_name`` given its schema (None = no such class yet).
+    Snippet classes are final; others are re-probed after a health interval
+    so a re-ingest that migrates the class is picked up."""
+    names = {p["name"] for p in (schema or {}).get("properties", [])}
+    if schema is None or "snippet" in names:
+        fields, ttl = SNIPPET_FIELDS, float("inf") if schema else HEALTH_CHECK_INTERVAL
+    else:
+        fields, ttl = LEGACY_FIELDS, HEALTH_CHECK_INTERVAL
+    _class_fields[class_name] = (fields, time.monotonic() + ttl)
+    return fields
+
+
+def _get_query(class_name: str, query: str, vector, category: str | None,
+               k: int, fields: str) -> str:
+    where = (f' where: {{path: ["category"] operator: Equal valueText: {json.dumps(category)}}}'
+             if category else "")
+    if vector is not None:
+        near = f"nearVector: {{vector: {json.dumps(vector.tolist())}}}"
+    else:
+        near = f"nearText: {{concepts: [{json.dumps(query)}]}}"
+    return f"{{Get{{{class_name}({near} limit: {k}{where}){{{fields}}}}}}}"
+
+
+def _get_hits(payload: dict, class_name: str) -> list[dict]:
+    if "errors" in payload:
+        raise ValueError(f"Error during query: {payload['errors']}")
+    return payload["data"]["Get"][class_name] or []
+
+
+def _missing_snippets(hits: list[dict]) -> list[dict]:
+    """Hits of a snippet class stored before snippets (snippet is null)."""
+    return [h for h in hits if "snippet" in h and h["snippet"] is None]
+
+
+def _hit_document(hit: dict) -> Document:
+    hit.pop("_additional", None)
+    text = hit.pop("snippet", None)
+    if text is None:                           # legacy object: cut content here
+        hit.pop("token_count", None)
+        text = textwrap.shorten((hit.get("content") or "").replace("\n", " "), SNIPPET_CHARS)
+    hit.pop("content", None)
+    return Document(page_content=text, metadata=hit)
+
+
+class WeaviateRetriever(BaseRetriever):
+    """nearText (or, with CLIENT_EMBEDDINGS, nearVector) Get through a
+    Weaviate client; the same query and hit handling as :func:`aretrieve`."""
+
+    client: Any
+    class_name: str
+    category: Optional[str] = None
+    k: int = 8
+
+    def _fields(self) -> str:
+        fields = _cached_fields(self.class_name)
+        if fields is None:
+            try:
+                schema = self.client.schema.get(self.class_name)
+            except weaviate.exceptions.UnexpectedStatusCodeException as exc:
+                if exc.status_code != 404:
+                    raise
+                schema = None
+            fields = _remember_fields(self.class_name, schema)
+        return fields
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        vector = embed_query(query) if CLIENT_EMBEDDINGS else None   # LRU hit for repeat queries
+        gql = _get_query(self.class_name, query, vector, self.category, self.k, self._fields())
+        hits = _get_hits(self.client.query.raw(gql), self.class_name)
+        for hit in _missing_snippets(hits):
+            obj = self.client.data_object.get_by_id(hit["_additional"]["id"], class_name=self.class_name)
+            hit["content"] = (obj or {}).get("properties", {}).get("content")
+        return [_hit_document(hit) for hit in hits]
+
+# ---------------------------------------------------------------------------
+# Local vector index backend (RETRIEVER_BACKEND=local)
+# ---------------------------------------------------------------------------
+
+_local_stores: dict[Path, SnapshotStore] = {}
+
+
+def local_store(class_name: str) -> SnapshotStore:
+    root = INDEX_DIR / class_name
+    with _client_lock:
+        if root not in _local_stores:
+            _local_stores[root] = SnapshotStore(root)
+        return _local_stores[root]
+
+
+def local_search(class_name: str, query: str, category: str | None = None,
+                 k: int = 8) -> list[Document]:
+    """Top-``k`` snippets from the live snapshot (empty until first ingest).
+    A re-ingest swaps the snapshot; the next call picks it up."""
+    index = local_store(class_name).current()
+    if index is None:
+        return []
+    return [_row_document(index.row(row)) for row, _ in index.search(embed_query(query), k, category)]
+
+
+def _row_document(hit: dict) -> Document:
+    return Document(page_content=hit["snippet"],
+                    metadata={"token_count": hit["token_count"], "category": hit["category"]})
+
+
+class LocalRetriever(BaseRetriever):
+    """Drop-in for the Weaviate retriever, backed by :func:`local_search`."""
+
+    class_name: str
+    category: Optional[str] = None
+    k: int = 8
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return local_search(self.class_name, query, self.category, self.k)
+
+# ---------------------------------------------------------------------------
+# Term index fast path (TERM_INDEX)
+# ---------------------------------------------------------------------------
+
+_term_stores: dict[Path, TermSnapshotStore] = {}
+
+
+def term_store(class_name: str) -> TermSnapshotStore:
+    root = TERM_INDEX_DIR / class_name
+    with _client_lock:
+        if root not in _term_stores:
+            _term_stores[root] = TermSnapshotStore(root)
+        return _term_stores[root]
+
+
+def term_lookup(class_name: str, query: str, category: str | None = None,
+                k: int = 8) -> tuple[list[Document], bool]:
+    """Term-index hits for a query naming a model/trim, and whether they
+    answer it exactly (see ``TermIndex.lookup``). ``([], False)`` when
+    the index is off, not built yet, or the query names no entity."""
+    index = term_store(class_name).current() if TERM_INDEX else None
+    if index is None:
+        return [], False
+    hits, exact = index.lookup(query, k, category)
+    return [_row_document(index.row(row)) for row, _ in hits], exact
+
+
+def fuse(*rankings: list[Document], k: int = 8) -> list[Document]:
+    """Reciprocal rank fusion of several ranked lists, deduplicated by snippet."""
+    scores: dict[str, float] = defaultdict(float)
+    docs: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            scores[doc.page_content] += 1.0 / (RRF_K + rank + 1)
+            docs.setdefault(doc.page_content, doc)
+    return [docs[text] for text in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+
+def hybrid_search(class_name: str, query: str, category: str | None, k: int,
+                  vector_search: Callable[[], list[Document]]) -> list[Document]:
+    """Exact term-index answers skip ``vector_search`` entirely; partial
+    matches are fused with its hits; other queries use it alone."""
+    lexical, exact = term_lookup(class_name, query, category, k)
+    if exact:
+        return lexical
+    vector = vector_search()
+    return fuse(lexical, vector, k=k) if lexical else vector
+
+
+class HybridRetriever(BaseRetriever):
+    """Wraps a vector retriever with the term-index fast path."""
+
+    vector: BaseRetriever
+    class_name: str
+    category: Optional[str] = None
+    k: int = 8
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return hybrid_search(self.class_name, query, self.category, self.k,
+                             lambda: self.vector.invoke(query))
+
+# ---------------------------------------------------------------------------
+# Async retrieval (ASGI serving path)
+# ---------------------------------------------------------------------------
+
+_async_client: httpx.AsyncClient | None = None
+
+
+def _async_http() -> httpx.AsyncClient:
+    """Shared keep-alive client; create it from inside the serving event loop."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            base_url=os.getenv("WEAVIATE_URL", "http://localhost:8080"),
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
+    return _async_client
+
+
+async def aretrieve(class_name: str, query: str, category: str | None = None,
+                    k: int = 8) -> list[Document]:
+    """Non-blocking equivalent of ``build_retriever(...).invoke(query)``:
+    the same nearText (or, with CLIENT_EMBEDDINGS, nearVector) Get query,
+    sent straight to Weaviate's GraphQL API. The local backend searches
+    in a worker thread instead. The term-index lookup runs inline (it is
+    a few posting-list reads) before any vector search."""
+    lexical, exact = term_lookup(class_name, query, category, k)
+    if exact:
+        return lexical
+    vector = await _avector_search(class_name, query, category, k)
+    return fuse(lexical, vector, k=k) if lexical else vector
+
+
+async def _avector_search(class_name: str, query: str, category: str | None,
+                          k: int) -> list[Document]:
+    if RETRIEVER_BACKEND == "local":
+        return await asyncio.to_thread(local_search, class_name, query, category, k)
+    http = _async_http()
+    fields = _cached_fields(class_name)
+    if fields is None:
+        resp = await http.get(f"/v1/schema/{class_name}")
+        if resp.status_code != 404:
+            resp.raise_for_status()
+        fields = _remember_fields(class_name, resp.json() if resp.status_code != 404 else None)
+    vector = await asyncio.to_thread(embed_query, query) if CLIENT_EMBEDDINGS else None
+    resp = await http.post("/v1/graphql",
+                           json={"query": _get_query(class_name, query, vector, category, k, fields)})
+    resp.raise_for_status()
+    hits = _get_hits(resp.json(), class_name)
+    for hit in _missing_snippets(hits):
+        obj = await http.get(f"/v1/objects/{class_name}/{hit['_additional']['id']}")
+        hit["content"] = obj.json().get("properties", {}).get("content") if obj.status_code == 200 else None
+    return [_hit_document(hit) for hit in hits]
+
 # ---------------------------------------------------------------------------
 # Main driver
 # ---------------------------------------------------------------------------
-async def main():
+def read_urls() -> List[str]:
     links_file = SCRIPT_DIR / "input" / "links.txt"
     urls = []
     if links_file.exists():
@@ -219,40 +1098,96 @@ async def main():
     else:
         print("Tip: If you have many URLs, just put each on its own line in input/links.txt and rerun.")
         urls = input("Enter website URLs (space‑separated): ").strip().split()
+    return urls
+
+
+async def main(full: bool = False, prune: bool = True, from_dump: bool = False,
+               dump: bool = CRAWL_DUMP, **crawl_kwargs):
+    manifest = CrawlManifest()
+    first_run = not manifest.path.exists()
+    if from_dump:
+        # re-split the last crawl's content.md without touching the network
+        with CONTENT_MD.open("r", encoding="utf-8") as fp:
+            urls = [m.group(1) for m in map(_DUMP_SOURCE_RE.match, fp) if m]
+    else:
+        urls = read_urls()
     if not urls:
         print("No URLs provided – exiting.")
         return
 
-    # 1) scrape all URLs to single markdown file
-    await crawl(urls)
-    md_text = CONTENT_MD.read_text("utf-8")
+    # 1) pages dropped from the list (for the domains crawled this run)
+    domains = dict.fromkeys(domain_from_url(u) for u in urls)
+    listed = set(urls)
+    removed = [] if not prune or from_dump else [u for u in manifest.pages
+                                                 if u not in listed and domain_from_url(u) in domains]
 
-    # 2) Group URLs by domain and ingest each group into its own class
-    domain_groups: dict[str, list[str]] = defaultdict(list)
-    for u in urls:
-        domain_groups[domain_from_url(u)].append(u)
+    # 2) crawl → split → upload as a pipeline: each page is split and its
+    #    changed chunks queued for upload as soon as it arrives, while the
+    #    crawl workers keep going until PIPELINE_MAX_PENDING pages are waiting
+    ingester = PageIngester(manifest, full)
+    for url in removed:
+        ingester.remove(url)
+    crawl_stats = {"not_modified": 0}
+    if from_dump:
+        with CONTENT_MD.open("r", encoding="utf-8") as fp:
+            for page in pages_from_dump(fp):
+                ingester.add(page)
+    else:
+        validators = {} if full else manifest.validators()
+        async for page in crawl_stream(urls, validators=validators, stats=crawl_stats,
+                                       output=CONTENT_MD if dump else None, **crawl_kwargs):
+            await asyncio.to_thread(ingester.add, page)
+    if first_run or full:
+        # objects from before the manifest (old UUID scheme, whole-corpus copies)
+        ingester.sweep(class_name_for(d) for d in domains)
+    report = ingester.close()
 
-    latest_class = None
-    for domain in domain_groups:
-        class_name = f"Domain_{re.sub(r'[^0-9A-Za-z]', '_', domain)}"
-        ingest_markdown(md_text, class_name)
-        latest_class = class_name  # Keep track of the last class processed
+    logger.info(
+        "Ingest report: %d new, %d changed, %d unchanged, %d not modified (304), "
+        "%d removed, %d failed pages | chunks: %d uploaded, %d skipped, %d deleted, %d swept",
+        *(report.get(k, 0) for k in ("pages_new", "pages_changed", "pages_unchanged",
+                                      "pages_not_modified", "pages_removed", "pages_failed",
+                                      "chunks_uploaded", "chunks_skipped", "chunks_deleted",
+                                      "chunks_swept")))
+    saved = report.get("chunks_skipped", 0)
+    total = saved + report.get("chunks_uploaded", 0)
+    if total:
+        logger.info("Saved %d browser renders and %d of %d chunk uploads (%.0f%%)",
+                    crawl_stats["not_modified"], saved, total, 100 * saved / total)
 
-    # Save the latest class info to a JSON file
-    if latest_class:
+    # Save the latest class info to a JSON file (only when the index changed,
+    # so reply caches keyed on it are not flushed needlessly)
+    latest_class = class_name_for(list(domains)[-1])
+    changed = any(report.get(k) for k in ("chunks_uploaded", "chunks_deleted", "chunks_swept"))
+    latest_file = OUTPUT_DIR / "latest_class.json"
+    if changed or not latest_file.exists() or \
+            json.loads(latest_file.read_text("utf-8")).get("latest_class") != latest_class:
         save_latest_class_info(latest_class)
 
-    logger.info("All done! Domains ingested: %s", ", ".join(domain_groups))
+    logger.info("All done! Domains ingested: %s", ", ".join(domains))
 
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Crawl URLs and ingest into Weaviate.")
     parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
+    parser.add_argument("--concurrency", type=int, default=CRAWL_CONCURRENCY,
+                        help="Pages crawled in parallel")
+    parser.add_argument("--domain-rps", type=float, default=CRAWL_DOMAIN_RPS,
+                        help="Max requests per second to any one domain (0 = unlimited)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest's hashes and validators and re-upload every chunk")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="Keep chunks of URLs no longer listed in links.txt")
+    parser.add_argument("--from-dump", action="store_true",
+                        help=f"Skip crawling and ingest the pages in {CONTENT_MD.name}")
+    parser.add_argument("--dump", action="store_true", default=CRAWL_DUMP,
+                        help=f"Also write raw markdown to {CONTENT_MD.name} (for debugging / --from-dump)")
     args = parser.parse_args()
 
     if args.verbose:
         logger.setLevel(logging.DEBUG)
     try:
-        asyncio.run(main())
+        asyncio.run(main(full=args.full, prune=not args.no_prune, from_dump=args.from_dump,
+                         dump=args.dump, concurrency=args.concurrency, domain_rps=args.domain_rps))
     except KeyboardInterrupt:
         print("Interrupted by user.")
@@ -0,0 +1,66 @@
+import functools
+import os
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+EMBED_MODEL       = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_BATCH_SIZE  = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_RUNTIME     = os.getenv("EMBED_RUNTIME", "torch")          # or "onnx" (CPU, needs optimum)
+EMBED_QUERY_CACHE = int(os.getenv("EMBED_QUERY_CACHE", "2048"))  # memoized query vectors
+ONNX_DIR          = Path(__file__).parent.parent / "models" / "onnx"
+
+# ── lazy encoder ──────────────────────────────────────────────────────────
+def _onnx_model():
+    """ONNX Runtime copy of EMBED_MODEL, exported once into models/onnx/."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    path = ONNX_DIR / EMBED_MODEL.replace("/", "__")
+    if path.exists():
+        return ORTModelForFeatureExtraction.from_pretrained(path, provider="CPUExecutionProvider")
+    model = ORTModelForFeatureExtraction.from_pretrained(
+        EMBED_MODEL, export=True, provider="CPUExecutionProvider")
+    model.save_pretrained(path)
+    return model
+
+@functools.lru_cache(1)
+def _encoder():
+    tok   = AutoTokenizer.from_pretrained(EMBED_MODEL)
+    model = _onnx_model() if EMBED_RUNTIME == "onnx" else AutoModel.from_pretrained(EMBED_MODEL).eval()
+    return tok, model
+
+def embed(texts: Sequence[str], batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """Mean-pooled, L2-normalised sentence embeddings as a float32 matrix.
+
+    Texts are encoded in length order so each batch pads to similar
+    lengths; rows come back in input order.
+    """
+    tok, model = _encoder()
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    out = []
+    for start in range(0, len(order), batch_size):
+        enc = tok([texts[i] for i in order[start:start + batch_size]],
+                  padding=True, truncation=True, return_tensors="pt")
+        with torch.no_grad():
+            hidden = model(**enc).last_hidden_state
+        mask   = enc["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+        out.append(torch.nn.functional.normalize(pooled, dim=-1).numpy())
+    if not out:
+        return np.zeros((0, model.config.hidden_size), dtype=np.float32)
+    result = np.empty((len(texts), out[0].shape[1]), dtype=np.float32)
+    result[order] = np.vstack(out)
+    return result
+
+@functools.lru_cache(EMBED_QUERY_CACHE)
+def _embed_query(text: str) -> np.ndarray:
+    vec = embed([text])[0]
+    vec.setflags(write=False)          # shared between callers
+    return vec
+
+def embed_query(text: str) -> np.ndarray:
+    """Embedding of one query, memoized (LRU of EMBED_QUERY_CACHE) so
+    repeated questions skip the model."""
+    return _embed_query(" ".join(text.split()))
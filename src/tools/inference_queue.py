@@ -0,0 +1,189 @@
+import math
+import os
+import queue
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+
+class QueueFull(Exception):
+    """Raised at admission when the request queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM queue full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before it could be served."""
+
+
+_DONE = object()
+
+
+class _Request:
+    __slots__ = ("prompt", "kwargs", "stream", "deadline", "on_start", "enqueued",
+                 "out", "cancelled")
+
+    def __init__(self, prompt, kwargs, stream, deadline, on_start=None):
+        self.prompt, self.kwargs, self.stream = prompt, kwargs, stream
+        self.deadline, self.on_start = deadline, on_start
+        self.enqueued = time.monotonic()
+        self.out: "queue.Queue" = queue.Queue()
+        self.cancelled = False
+
+
+class InferenceScheduler:
+    """Bounded queue in front of a fixed pool of model workers.
+
+    Each worker thread owns one model (called like the ctransformers model).
+    Requests beyond ``max_queue`` waiting are rejected immediately with
+    :class:`QueueFull`; requests whose deadline passes while queued are
+    dropped with :class:`DeadlineExceeded` without touching a model.
+    ``on_start(wait_s)``, if given, is called from the worker when it picks
+    a request up, with the seconds the request spent queued.
+    """
+
+    def __init__(self, models: Optional[List[Callable]] = None, *, max_queue: int = 8):
+        self.max_queue = max_queue
+        self._models: List[Callable] = []
+        self._reset_runtime()
+        self.completed = self.rejected = self.expired = 0
+        self._wait_total = self._service_total = 0.0
+        self._wait_max = 0.0
+        # worker threads do not survive fork(); restart them in the child
+        os.register_at_fork(after_in_child=self._after_fork)
+        if models:
+            self.start(models)
+
+    @property
+    def workers(self) -> int:
+        return len(self._models)
+
+    def start(self, models: List[Callable]):
+        """Attach models (one worker thread each). Requests may be queued
+        before this is called; they are served once workers exist."""
+        if not models:
+            raise ValueError("InferenceScheduler needs at least one model")
+        if self._models:
+            raise RuntimeError("InferenceScheduler already started")
+        self._models = list(models)
+        self._start_workers()
+
+    def _reset_runtime(self):
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._busy = 0
+
+    def _start_workers(self):
+        for i, model in enumerate(self._models):
+            threading.Thread(target=self._worker, args=(model,),
+                             name=f"llm-worker-{i}", daemon=True).start()
+
+    def _after_fork(self):
+        self._reset_runtime()
+        if self._models:
+            self._start_workers()
+
+    # ── admission ────────────────────────────────────────────────────────
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from mean service time."""
+        with self._lock:
+            per_req = self._service_total / self.completed if self.completed else 5.0
+        backlog = self._queue.qsize() + 1
+        return max(1, math.ceil(per_req * backlog / max(self.workers, 1)))
+
+    def check_admission(self):
+        """Fail fast before doing any upstream work for a doomed request."""
+        if self._queue.qsize() >= self.max_queue:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+    def _submit(self, prompt, kwargs, stream, deadline, on_start=None) -> _Request:
+        req = _Request(prompt, kwargs, stream, deadline, on_start)
+        with self._lock:
+            admitted = self._queue.qsize() < self.max_queue
+            if admitted:
+                self._queue.put(req)
+            else:
+                self.rejected += 1
+        if not admitted:
+            raise QueueFull(self.retry_after())
+        return req
+
+    # ── public API ───────────────────────────────────────────────────────
+    def generate(self, prompt: str, *, deadline: Optional[float] = None,
+                 on_start: Optional[Callable[[float], None]] = None, **kwargs) -> str:
+        """Blocking generation; ``deadline`` is a time.monotonic() timestamp."""
+        return "".join(self._results(self._submit(prompt, kwargs, False, deadline, on_start)))
+
+    def stream(self, prompt: str, *, deadline: Optional[float] = None,
+               on_start: Optional[Callable[[float], None]] = None, **kwargs) -> Iterator[str]:
+        """Admit the request now and return an iterator over generated text."""
+        return self._results(self._submit(prompt, kwargs, True, deadline, on_start))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "workers": self.workers,
+                "busy_workers": self._busy,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "avg_wait_ms": 1000 * self._wait_total / self.completed if self.completed else 0.0,
+                "max_wait_ms": 1000 * self._wait_max,
+            }
+
+    # ── internals ────────────────────────────────────────────────────────
+    def _results(self, req: _Request) -> Iterator[str]:
+        try:
+            while True:
+                timeout = None if req.deadline is None else max(0.0, req.deadline - time.monotonic())
+                try:
+                    item = req.out.get(timeout=timeout)
+                except queue.Empty:
+                    raise DeadlineExceeded("LLM request deadline exceeded") from None
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            req.cancelled = True        # lets the worker stop early
+
+    def _worker(self, model):
+        while True:
+            req = self._queue.get()
+            started = time.monotonic()
+            if req.cancelled or (req.deadline is not None and started > req.deadline):
+                with self._lock:
+                    self.expired += 1
+                req.out.put(DeadlineExceeded("LLM request expired in queue"))
+                continue
+
+            wait = started - req.enqueued
+            with self._lock:
+                self._busy += 1
+            try:
+                if req.on_start is not None:
+                    req.on_start(wait)
+                if req.stream:
+                    for piece in model(req.prompt, stream=True, **req.kwargs):
+                        if req.cancelled:
+                            break
+                        req.out.put(piece)
+                else:
+                    req.out.put(model(req.prompt, stream=False, **req.kwargs))
+                req.out.put(_DONE)
+            except Exception as exc:
+                req.out.put(exc)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self.completed += 1
+                    self._wait_total += wait
+                    self._wait_max = max(self._wait_max, wait)
+                    self._service_total += time.monotonic() - started
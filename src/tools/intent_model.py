@@ -0,0 +1,69 @@
+"""Small intent classifier over sentence embeddings (softmax regression).
+
+Trained offline by train_intent.py from NLI-labelled and gold queries;
+serving only needs one (dim × intents) matrix product per query on top
+of the query embedding.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class IntentModel:
+    labels: Tuple[str, ...]
+    weights: np.ndarray         # (dim, len(labels))
+    bias: np.ndarray            # (len(labels),)
+    embed_model: str            # embedder the weights were fitted on
+    holdout: Tuple[str, ...] = ()   # labelled queries left out of training
+
+    def predict_proba(self, vectors: np.ndarray) -> np.ndarray:
+        logits = np.atleast_2d(vectors) @ self.weights + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict(self, vector: np.ndarray) -> Tuple[str, float]:
+        """(intent, probability) for one embedding."""
+        probs = self.predict_proba(vector)[0]
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, labels=np.array(self.labels), weights=self.weights,
+                 bias=self.bias, embed_model=np.array(self.embed_model),
+                 holdout=np.array(self.holdout, dtype=str))
+
+    @classmethod
+    def load(cls, path: Path) -> "IntentModel":
+        with np.load(path) as data:
+            holdout = tuple(str(q) for q in data["holdout"]) if "holdout" in data else ()
+            return cls(tuple(str(l) for l in data["labels"]), data["weights"].astype(np.float32),
+                       data["bias"].astype(np.float32), str(data["embed_model"]), holdout)
+
+
+def fit(vectors: np.ndarray, labels: Sequence[str], embed_model: str, *,
+        sample_weight: Optional[Sequence[float]] = None, l2: float = 1e-3,
+        lr: float = 1.0, epochs: int = 500) -> IntentModel:
+    """Full-batch gradient descent on weighted, L2-regularised cross-entropy.
+    Classes are re-weighted to equal total weight so a rare intent such as
+    UnknownIntent is not drowned out."""
+    names = tuple(sorted(set(labels)))
+    y = np.array([names.index(l) for l in labels])
+    x = np.asarray(vectors, dtype=np.float32)
+    w = np.ones(len(y)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    for c in range(len(names)):
+        w[y == c] *= len(y) / (len(names) * w[y == c].sum())
+    w = (w / w.sum()).astype(np.float32)[:, None]
+
+    onehot = np.eye(len(names), dtype=np.float32)[y]
+    model = IntentModel(names, np.zeros((x.shape[1], len(names)), dtype=np.float32),
+                        np.zeros(len(names), dtype=np.float32), embed_model)
+    for _ in range(epochs):
+        grad = (model.predict_proba(x) - onehot) * w
+        model.weights -= lr * (x.T @ grad + l2 * model.weights)
+        model.bias -= lr * grad.sum(axis=0)
+    return model
@@ -1,14 +1,262 @@
+"""LLM backends for chat_engine.
+
+Every backend is called like the original ctransformers model:
+``llm(prompt, max_new_tokens=…, temperature=…, stream=…)`` returns the reply
+string, or an iterator of text pieces when ``stream=True``.
+
+Backend and CPU tuning come from ``LLMSettings.from_env()``:
+
+  LLM_BACKEND         ctransformers | llama_cpp | stub
+  LLM_THREADS         generation threads (default: half the logical CPUs)
+  LLM_BATCH_SIZE      prompt-eval batch size
+  LLM_CONTEXT_LENGTH  context window; the prompt is ~600 tokens, so 2048 is plenty
+  LLM_GPU_LAYERS      layers to offload (0 on CPU-only nodes)
+  LLM_MMAP / LLM_MLOCK  1/0
+  LLM_STUB_TPS        tokens/sec emitted by the stub backend
+"""
+import hashlib
+import inspect
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
-from ctransformers import AutoModelForCausalLM
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
 
 GGUF_PATH = str(Path(__file__).parent.parent / "models" / "zephyr-7b-beta.Q4_K_M.gguf")
+PREFIX_STATE_DIR = Path(os.getenv("PREFIX_STATE_DIR", Path(GGUF_PATH).parent / "prefix_cache"))
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class LLMSettings:
+    backend: str = "ctransformers"
+    model_path: str = GGUF_PATH
+    threads: int = max(1, (os.cpu_count() or 2) // 2)
+    batch_size: int = 512
+    context_length: int = 2048
+    gpu_layers: int = 0
+    mmap: bool = True
+    mlock: bool = False
+    stub_tokens_per_sec: float = 50.0
+
+    @classmethod
+    def from_env(cls, **overrides) -> "LLMSettings":
+        d = cls()
+        settings = cls(
+            backend=os.getenv("LLM_BACKEND", d.backend),
+            model_path=os.getenv("LLM_MODEL_PATH", d.model_path),
+            threads=int(os.getenv("LLM_THREADS", d.threads)),
+            batch_size=int(os.getenv("LLM_BATCH_SIZE", d.batch_size)),
+            context_length=int(os.getenv("LLM_CONTEXT_LENGTH", d.context_length)),
+            gpu_layers=int(os.getenv("LLM_GPU_LAYERS", d.gpu_layers)),
+            mmap=_env_flag("LLM_MMAP", "1"),
+            mlock=_env_flag("LLM_MLOCK", "0"),
+            stub_tokens_per_sec=float(os.getenv("LLM_STUB_TPS", d.stub_tokens_per_sec)),
+        )
+        return replace(settings, **overrides)
+
+
+# ── ctransformers ─────────────────────────────────────────────────────────
+class CTransformersBackend:
+    def __init__(self, settings: LLMSettings):
+        from ctransformers import AutoModelForCausalLM
+
+        self._model = AutoModelForCausalLM.from_pretrained(
+            settings.model_path,
+            model_type="mistral",   # Zephyr is Mistral‑architecture
+            context_length=settings.context_length,
+            gpu_layers=settings.gpu_layers,
+            threads=settings.threads,
+            batch_size=settings.batch_size,
+            mmap=settings.mmap,
+            mlock=settings.mlock,
+        )
+        self._lock = threading.Lock()
+
+    def tokenize(self, text: str) -> List[int]:
+        return self._model.tokenize(text)
+
+    def __call__(self, prompt: str, max_new_tokens: int = 256,
+                 temperature: float = 0.8, stream: bool = False) -> Union[str, Iterator[str]]:
+        if stream:
+            return self._stream(prompt, max_new_tokens, temperature)
+        with self._lock:
+            return self._model(prompt, max_new_tokens=max_new_tokens,
+                               temperature=temperature, stream=False)
+
+    def _stream(self, prompt, max_new_tokens, temperature):
+        with self._lock:
+            yield from self._model(prompt, max_new_tokens=max_new_tokens,
+                                   temperature=temperature, stream=True)
+
+
+# ── llama-cpp-python (with prompt-prefix KV cache) ────────────────────────
+class LlamaCppBackend:
+    """llama-cpp-python model that evaluates a constant prompt prefix once.
+
+    The KV state after the prefix is kept in memory (and saved under
+    ``state_dir`` as plain arrays so it survives restarts). A call restores
+    it only when the model's evaluated tokens no longer start with the
+    prefix; otherwise llama.cpp reuses the matching tokens itself. Either
+    way it only has to prefill the tokens after the prefix.
+    """
+
+    def __init__(self, settings: LLMSettings, prefix: Optional[str] = None,
+                 state_dir: Optional[Path] = PREFIX_STATE_DIR):
+        from llama_cpp import Llama
+
+        self._llm = Llama(
+            model_path=settings.model_path,
+            n_ctx=settings.context_length,
+            n_threads=settings.threads,
+            n_batch=settings.batch_size,
+            n_gpu_layers=settings.gpu_layers,
+            use_mmap=settings.mmap,
+            use_mlock=settings.mlock,
+            verbose=False,
+        )
+        self._lock = threading.Lock()
+        self.prefix = prefix
+        self._state = None
+        self._prefix_tokens: List[int] = []
+        if prefix:
+            self._prefix_tokens = self._llm.tokenize(prefix.encode("utf-8"))
+            key = hashlib.sha256(
+                f"{settings.model_path}|{settings.context_length}|{prefix}".encode()
+            ).hexdigest()[:16]
+            self._state_path = Path(state_dir) / f"{key}.npz" if state_dir else None
+            self._state = self._load_or_build_state()
+
+    def _load_or_build_state(self):
+        if self._state_path and self._state_path.exists():
+            try:
+                state = self._read_state(self._state_path)
+                self._llm.load_state(state)
+                logger.info("Loaded prompt-prefix state from %s", self._state_path)
+                return state
+            except Exception:
+                logger.warning("Could not load prefix state %s – rebuilding", self._state_path)
+
+        self._llm.reset()
+        self._llm.eval(self._prefix_tokens)
+        state = self._llm.save_state()
+        if self._state_path:
+            self._state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._state_path.with_suffix(".tmp.npz")
+            np.savez(tmp, **{name: np.asarray(getattr(state, name)) if name != "llama_state"
+                             else np.frombuffer(state.llama_state, dtype=np.uint8)
+                             for name in self._state_fields() if hasattr(state, name)})
+            tmp.replace(self._state_path)
+            logger.info("Saved prompt-prefix state to %s", self._state_path)
+        return state
+
+    @staticmethod
+    def _state_fields() -> List[str]:
+        from llama_cpp import LlamaState
+
+        return [n for n in inspect.signature(LlamaState).parameters if n != "self"]
+
+    def _read_state(self, path: Path):
+        """Rebuild a ``LlamaState`` from a saved .npz. Arrays only – no
+        pickles – and the tokens must be exactly this backend's prefix."""
+        from llama_cpp import LlamaState
+
+        with np.load(path, allow_pickle=False) as data:
+            fields = {name: data[name] for name in self._state_fields()}
+        n_tokens = int(fields["n_tokens"])
+        if fields["input_ids"][:n_tokens].tolist() != self._prefix_tokens:
+            raise ValueError("prefix tokens do not match")
+        if int(fields["llama_state_size"]) != fields["llama_state"].size:
+            raise ValueError("truncated llama state")
+        fields["llama_state"] = fields["llama_state"].tobytes()
+        for name in ("n_tokens", "llama_state_size", "seed"):
+            if name in fields:
+                fields[name] = int(fields[name])
+        return LlamaState(**fields)
+
+    def _restore_prefix(self):
+        """Load the prefix state unless the evaluated tokens already start
+        with the prefix (e.g. the previous call used the same prefix)."""
+        if self._state is None:
+            return
+        n = len(self._prefix_tokens)
+        if self._llm.n_tokens < n or self._llm.input_ids[:n].tolist() != self._prefix_tokens:
+            self._llm.load_state(self._state)
+
+    def tokenize(self, text: str) -> List[int]:
+        return self._llm.tokenize(text.encode("utf-8"))
+
+    def __call__(self, prompt: str, max_new_tokens: int = 256,
+                 temperature: float = 0.8, stream: bool = False) -> Union[str, Iterator[str]]:
+        if stream:
+            return self._stream(prompt, max_new_tokens, temperature)
+        with self._lock:
+            self._restore_prefix()
+            out = self._llm.create_completion(prompt, max_tokens=max_new_tokens,
+                                              temperature=temperature)
+        return out["choices"][0]["text"]
+
+    def _stream(self, prompt, max_new_tokens, temperature):
+        with self._lock:
+            self._restore_prefix()
+            for chunk in self._llm.create_completion(prompt, max_tokens=max_new_tokens,
+                                                     temperature=temperature, stream=True):
+                yield chunk["choices"][0]["text"]
+
+
+# ── stub (tests / load tests) ─────────────────────────────────────────────
+class StubBackend:
+    """Model-free stand-in that emits a canned reply at a fixed token rate."""
+
+    REPLY = ("Thanks for your question! Based on our listings, I can help with that. "
+             "Could you tell me which model and budget you have in mind?")
+
+    def __init__(self, settings: LLMSettings):
+        self.tokens_per_sec = settings.stub_tokens_per_sec
+
+    def tokenize(self, text: str) -> List[int]:
+        return list(range(len(text.split())))
+
+    def __call__(self, prompt: str, max_new_tokens: int = 256,
+                 temperature: float = 0.8, stream: bool = False) -> Union[str, Iterator[str]]:
+        tokens = self._stream(max_new_tokens)
+        return tokens if stream else "".join(tokens)
+
+    def _stream(self, max_new_tokens):
+        delay = 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+        for i, word in enumerate(self.REPLY.split()[:max_new_tokens]):
+            if delay:
+                time.sleep(delay)
+            yield word if i == 0 else " " + word
+
+
+BACKENDS = {
+    "ctransformers": CTransformersBackend,
+    "llama_cpp": LlamaCppBackend,
+    "stub": StubBackend,
+}
 
-def load_llm():
-    return AutoModelForCausalLM.from_pretrained(
-        GGUF_PATH,
-        model_type="mistral",   # Zephyr is Mistral‑architecture
-        context_length=8192,
-        gpu_layers=28,# >0 if you have VRAM                      
-    )
 
+def load_llm(prompt_prefix: Optional[str] = None, settings: Optional[LLMSettings] = None):
+    """Build the configured backend.
 
+    ``prompt_prefix`` is the constant start of every prompt; backends that
+    support it (llama_cpp) cache its KV state.
+    """
+    settings = settings or LLMSettings.from_env()
+    if settings.backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND {settings.backend!r}; "
+                         f"choose from {', '.join(BACKENDS)}")
+    logger.info("Loading LLM backend %s (%s)", settings.backend, settings)
+    if settings.backend == "llama_cpp":
+        return LlamaCppBackend(settings, prefix=prompt_prefix)
+    return BACKENDS[settings.backend](settings)
@@ -0,0 +1,142 @@
+"""Minimal in-process metrics with Prometheus text exposition.
+
+Counters and histograms are labelled and thread-safe; gauges and callback
+counters (totals kept by another component) are evaluated at scrape time. ``REGISTRY.render()`` returns the body for a
+``/metrics`` endpoint (content type ``CONTENT_TYPE``).
+"""
+import math
+import threading
+from typing import Callable, Dict, Iterable, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS   = (8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+RATE_BUCKETS    = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}      # key → [bucket counts…, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = f'le="{_fmt_value(bound)}"'
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {count}"
+            yield f"{self.name}_bucket{_fmt_labels(self.labelnames, key, _INF_LABEL)} {series[-1]}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(series[-2])}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, key)} {series[-1]}"
+
+
+class Gauge:
+    """Value read from ``fn`` at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float]):
+        self.name, self.help, self.fn = name, help, fn
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield f"{self.name} {_fmt_value(self.fn())}"
+
+
+class CallbackCounter(Gauge):
+    """Monotonic total read from ``fn`` at scrape time."""
+
+    type = "counter"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn) -> Gauge:
+        return self._register(Gauge(name, help, fn))
+
+    def callback_counter(self, name, help, fn) -> CallbackCounter:
+        return self._register(CallbackCounter(name, help, fn))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for m in metrics:
+            try:
+                lines.extend(m.render())
+            except Exception:        # a failing gauge must not break the scrape
+                continue
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,75 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collect items from concurrent callers and process them in batches.
+
+    A single worker thread pulls queued items and calls ``process`` with up
+    to ``max_batch_size`` of them, flushing early once the oldest item has
+    waited ``max_wait_ms``. ``process`` must return one result per item, in
+    order; each caller of :meth:`submit` blocks until its own result is ready.
+    """
+
+    def __init__(self, process: Callable[[Sequence[T]], Sequence[R]], *,
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0,
+                 name: str = "microbatch"):
+        self._process = process
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._start()
+        # the worker thread does not survive fork(); restart it in the child
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self._queue: "queue.Queue[tuple[T, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item: T) -> R:
+        return self.submit_async(item).result()
+
+    def submit_async(self, item: T) -> Future:
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        return fut
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self._process([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"batch function returned {len(results)} results for {len(batch)} items")
+            except Exception as exc:
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, fut), res in zip(batch, results):
+                fut.set_result(res)
@@ -0,0 +1,187 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, FrozenSet, Optional
+
+import numpy as np
+
+from tools.term_index import terms
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive cache key."""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", text.lower())).strip()
+
+
+@dataclass
+class _Entry:
+    reply: str
+    intent: Optional[str]
+    terms: FrozenSet[str]
+    vector: Optional[np.ndarray]
+    expires: float
+    size: int
+
+
+class ResponseCache:
+    """Reply cache keyed by normalized message text, with an optional
+    embedding similarity fallback for near-duplicates.
+
+    :meth:`get` is the exact lookup and needs nothing but the message, so
+    callers can try it before classifying anything. The fallback,
+    :meth:`get_similar`, is off unless ``embed_fn`` (one text → unit
+    vector) is given. Even then a similar message only counts when it has
+    the same intent and exactly the same content terms
+    (tools.term_index.terms), so "Bezza 1.0 price" never answers
+    "Bezza 1.3 price".
+
+    Entries expire after ``ttl`` seconds and are evicted least-recently-used
+    once ``max_entries`` or ``max_bytes`` is exceeded. When ``version_file``
+    (``output/latest_class.json``) changes, the whole cache is dropped so
+    replies never outlive the knowledge base they were built from.
+    """
+
+    def __init__(self, *, embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+                 similarity: float = 0.95, ttl: float = 3600.0,
+                 max_entries: int = 1024, max_bytes: int = 16 * 2**20,
+                 version_file: Optional[Path] = None):
+        self._embed = embed_fn
+        self.similarity = similarity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._version_file = version_file
+        self._version_mtime: Optional[float] = None
+        self._version = None
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits_exact = self.hits_semantic = self.misses = 0
+        self.evictions = self.invalidations = 0
+
+    # ── public API ───────────────────────────────────────────────────────
+    @property
+    def semantic(self) -> bool:
+        """Whether :meth:`get_similar` can hit."""
+        return self._embed is not None
+
+    def get(self, msg: str) -> Optional[str]:
+        """Reply to the same normalized message. A miss is counted here
+        unless the similarity fallback will be asked next."""
+        self._check_version()
+        key, now = normalize(msg), time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits_exact += 1
+                    return entry.reply
+                self._drop(key)
+            if not self.semantic:
+                self.misses += 1
+        return None
+
+    def get_similar(self, msg: str, intent: Optional[str]) -> Optional[str]:
+        """Reply to a similar message of the same ``intent`` and content
+        terms; call after :meth:`get` missed."""
+        if not self.semantic:
+            return None
+        msg_terms, now = frozenset(terms(msg)), time.monotonic()
+        with self._lock:
+            candidates = self._candidates(intent, msg_terms, now)
+        if candidates:
+            vec = self._embed(msg)
+            with self._lock:
+                hit = self._nearest(vec, intent, msg_terms, now)
+                if hit is not None:
+                    self._entries.move_to_end(hit)
+                    self.hits_semantic += 1
+                    return self._entries[hit].reply
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, msg: str, reply: str, intent: Optional[str] = None):
+        """Store ``reply``; ``intent`` gates later :meth:`get_similar` hits."""
+        self._check_version()
+        key = normalize(msg)
+        vec = self._embed(msg) if self._embed is not None else None
+        size = len(key) + len(reply.encode("utf-8")) + (vec.nbytes if vec is not None else 0)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(reply, intent, frozenset(terms(msg)), vec,
+                                        time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits_exact": self.hits_exact,
+                "hits_semantic": self.hits_semantic,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    # ── internals (call with the lock held) ──────────────────────────────
+    def _drop(self, key: str):
+        self._bytes -= self._entries.pop(key).size
+
+    def _candidates(self, intent: Optional[str], msg_terms: FrozenSet[str], now: float):
+        """Live entries a similar message may reuse: same intent, same terms."""
+        return [k for k, e in self._entries.items()
+                if e.intent == intent and e.terms == msg_terms
+                and e.vector is not None and e.expires > now]
+
+    def _nearest(self, vec: np.ndarray, intent: Optional[str], msg_terms: FrozenSet[str],
+                 now: float) -> Optional[str]:
+        keys = self._candidates(intent, msg_terms, now)
+        if not keys:
+            return None
+        sims = np.stack([self._entries[k].vector for k in keys]) @ vec
+        best = int(np.argmax(sims))
+        return keys[best] if sims[best] >= self.similarity else None
+
+    def _check_version(self):
+        """Clear the cache when the KB version file has been rewritten."""
+        if self._version_file is None:
+            return
+        try:
+            mtime = os.stat(self._version_file).st_mtime
+        except OSError:
+            return
+        if mtime == self._version_mtime:
+            return
+        try:
+            version = json.loads(Path(self._version_file).read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return
+        with self._lock:
+            self._version_mtime = mtime
+            if self._version is not None and version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self.invalidations += 1
+            self._version = version
@@ -0,0 +1,185 @@
+"""Inverted index over chunk terms for exact model / trim / price lookups.
+
+A snapshot is an immutable directory holding
+
+  postings.npy        int32 row numbers grouped by term (sorted within a term)
+  offsets.npy         int64; term t's rows are postings[offsets[t]:offsets[t + 1]]
+  token_count.npy     int32 per row
+  category_codes.npy  int32 per row, indexing meta["categories"]
+  meta.json           sorted terms, ids, snippets and the category names
+
+Terms taken from a chunk's markdown headers are indexed a second time
+under ``HEADER_PREFIX`` ("h:bezza"), which is what marks a query word as
+an entity (model or trim name) rather than ordinary prose. Snapshots are
+published through the same ``CURRENT`` pointer swap as the vector index.
+"""
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tools.vector_index import SnapshotStore
+
+HEADER_PREFIX = "h:"
+TERM_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")            # keeps "1.3", "1.5l"
+STOPWORDS = frozenset("""
+    a about an and any are at be can do does for from get have how i in is it
+    me much my of on or please s the there this to want what which with you your
+""".split())
+
+
+def terms(text: str) -> List[str]:
+    """Lower-cased word / number tokens of ``text`` minus stopwords, in
+    first-seen order without repeats."""
+    return list(dict.fromkeys(t for t in TERM_RE.findall(text.lower()) if t not in STOPWORDS))
+
+
+def chunk_terms(content: str, headers: Iterable[str]) -> List[str]:
+    """Index terms of one chunk: its content words plus prefixed header words."""
+    head = terms(" ".join(headers))
+    return list(dict.fromkeys(terms(content) + head + [HEADER_PREFIX + t for t in head]))
+
+
+class TermIndex:
+    """One read-only snapshot."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.terms: List[str] = meta["terms"]
+        self.ids: List[str] = meta["ids"]
+        self.snippets: List[str] = meta["snippets"]
+        self.categories: List[str] = meta["categories"]
+        self.postings = np.load(path / "postings.npy", mmap_mode="r")
+        self.offsets = np.load(path / "offsets.npy")
+        self.token_counts = np.load(path / "token_count.npy")
+        self.category_codes = np.load(path / "category_codes.npy")
+        self._term_ids: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows_for(self, term: str) -> Optional[np.ndarray]:
+        t = self._term_ids.get(term)
+        return None if t is None else self.postings[self.offsets[t]:self.offsets[t + 1]]
+
+    def lookup(self, query: str, k: int, category: Optional[str] = None
+               ) -> Tuple[List[Tuple[int, float]], bool]:
+        """Top-``k`` (row, score) pairs for an entity-style ``query`` and
+        whether they are an exact answer.
+
+        Only queries naming at least one header term are looked up; others
+        return ``([], False)`` and are left to vector search. Rows score the
+        idf of each query term they contain, counted again when the term is
+        in their headers. The result is exact when every query term is
+        known to the index and some rows contain all of them; only those
+        rows are returned then. Otherwise rows matching any term are.
+        """
+        words = terms(query)
+        known = [t for t in words if t in self._term_ids]
+        if k <= 0 or not len(self) or not any(HEADER_PREFIX + t in self._term_ids for t in known):
+            return [], False
+        n = len(self)
+        scores = np.zeros(n, dtype=np.float32)
+        matched = np.zeros(n, dtype=np.int32)
+        for t in known:
+            body, head = self.rows_for(t), self.rows_for(HEADER_PREFIX + t)
+            idf = math.log(1 + n / len(body))
+            scores[body] += idf
+            if head is not None:
+                scores[head] += idf                 # named in the chunk's headers
+                body = np.union1d(body, head)
+            matched[body] += 1
+
+        candidates = np.flatnonzero(matched)
+        if category is not None:
+            code = self.categories.index(category) if category in self.categories else -1
+            candidates = candidates[self.category_codes[candidates] == code]
+        full = candidates[matched[candidates] == len(known)]
+        exact = len(known) == len(words) and len(full) > 0
+        if exact:
+            candidates = full
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+        return [(int(r), float(scores[r])) for r in top], exact
+
+    def row(self, i: int) -> dict:
+        return {"id": self.ids[i], "snippet": self.snippets[i],
+                "token_count": int(self.token_counts[i]),
+                "category": self.categories[self.category_codes[i]]}
+
+
+def write_term_snapshot(path: Path, vocab: Sequence[str], postings: np.ndarray,
+                        offsets: np.ndarray, ids: Sequence[str], snippets: Sequence[str],
+                        token_counts: Sequence[int], categories: Sequence[str]):
+    path.mkdir(parents=True)
+    names = sorted(set(categories))
+    code = {c: i for i, c in enumerate(names)}
+    np.save(path / "postings.npy", np.asarray(postings, dtype=np.int32))
+    np.save(path / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+    np.save(path / "token_count.npy", np.asarray(token_counts, dtype=np.int32))
+    np.save(path / "category_codes.npy", np.asarray([code[c] for c in categories], dtype=np.int32))
+    (path / "meta.json").write_text(json.dumps(
+        {"terms": list(vocab), "ids": list(ids), "snippets": list(snippets),
+         "categories": names}), encoding="utf-8")
+
+
+class TermSnapshotStore(SnapshotStore):
+    """:class:`SnapshotStore` of :class:`TermIndex` snapshots."""
+
+    index_class = TermIndex
+
+    def update(self, upserts: Iterable[Tuple[str, Sequence[str], dict]] = (),
+               deletes: Iterable[str] = ()) -> TermIndex:
+        """Write a new snapshot = current rows − ``deletes`` − replaced ids +
+        ``upserts`` (id, chunk terms, {snippet, token_count, category}),
+        then make it live. Existing postings are remapped, not re-tokenized."""
+        upserts = list(upserts)
+        drop = set(deletes) | {uid for uid, _, _ in upserts}
+        ids, snippets, counts, cats = [], [], [], []
+        old_terms: List[str] = []
+        pair_terms, pair_rows = [], []
+        base = self.current()
+        if base is not None:
+            keep = np.asarray([uid not in drop for uid in base.ids], dtype=bool)
+            kept = np.flatnonzero(keep)
+            ids += [base.ids[i] for i in kept]
+            snippets += [base.snippets[i] for i in kept]
+            counts += base.token_counts[kept].tolist()
+            cats += [base.categories[c] for c in base.category_codes[kept]]
+            new_row = np.cumsum(keep) - 1                # old row → row in the new snapshot
+            rows = np.asarray(base.postings)
+            term_of = np.repeat(np.arange(len(base.terms)), np.diff(base.offsets))
+            live = keep[rows]
+            old_terms = base.terms
+            pair_terms.append(term_of[live])
+            pair_rows.append(new_row[rows[live]])
+
+        new_terms = {t for _, chunk, _ in upserts for t in chunk}
+        vocab = sorted(set(old_terms) | new_terms)
+        term_id = {t: i for i, t in enumerate(vocab)}
+        if pair_terms:                                   # old term ids → merged vocabulary
+            remap = np.asarray([term_id[t] for t in old_terms], dtype=np.int64)
+            pair_terms[0] = remap[pair_terms[0]]
+        for uid, chunk, row in upserts:
+            pair_terms.append(np.asarray([term_id[t] for t in chunk], dtype=np.int64))
+            pair_rows.append(np.full(len(chunk), len(ids), dtype=np.int64))
+            ids.append(uid)
+            snippets.append(row["snippet"])
+            counts.append(int(row["token_count"]))
+            cats.append(row["category"])
+
+        t = np.concatenate(pair_terms) if pair_terms else np.zeros(0, dtype=np.int64)
+        r = np.concatenate(pair_rows) if pair_rows else np.zeros(0, dtype=np.int64)
+        df = np.bincount(t, minlength=len(vocab))
+        used = df > 0                                    # drop terms whose rows all went
+        compact = np.cumsum(used) - 1
+        vocab = [v for v, u in zip(vocab, used) if u]
+        t = compact[t]
+        order = np.lexsort((r, t))
+        offsets = np.concatenate([[0], np.cumsum(df[used])])
+
+        return self._publish(lambda path: write_term_snapshot(
+            path, vocab, r[order], offsets, ids, snippets, counts, cats))
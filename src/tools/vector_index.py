@@ -0,0 +1,159 @@
+"""On-disk vector index for single-node retrieval without Weaviate.
+
+A snapshot is an immutable directory holding
+
+  vectors.npy         float32 (rows × dim), L2-normalised, memory-mapped
+  token_count.npy     int32 per row
+  category_codes.npy  int32 per row, indexing meta["categories"]
+  meta.json           ids, snippets and the category names
+
+``SnapshotStore`` keeps snapshots under one root and points at the live
+one with a ``CURRENT`` file replaced atomically, so readers switch to a
+new snapshot between queries and never see a half-written one.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KEEP_SNAPSHOTS = 2          # live + previous (in-flight readers may still hold it)
+
+
+class VectorIndex:
+    """One read-only snapshot."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.ids: List[str] = meta["ids"]
+        self.snippets: List[str] = meta["snippets"]
+        self.categories: List[str] = meta["categories"]
+        self.vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        self.token_counts = np.load(path / "token_count.npy")
+        self.category_codes = np.load(path / "category_codes.npy")
+        # pre-filter masks: category → row numbers
+        self._rows: Dict[str, np.ndarray] = {
+            c: np.flatnonzero(self.category_codes == i) for i, c in enumerate(self.categories)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: np.ndarray, k: int, category: Optional[str] = None
+               ) -> List[Tuple[int, float]]:
+        """Top-``k`` (row, cosine score) pairs, best first, optionally only
+        among rows of ``category``."""
+        if category is None:
+            rows, matrix = None, self.vectors
+        else:
+            rows = self._rows.get(category)
+            if rows is None or not len(rows):
+                return []
+            matrix = self.vectors[rows]
+        if not len(matrix) or k <= 0:
+            return []
+        scores = matrix @ np.asarray(query, dtype=np.float32)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]) if rows is not None else int(i), float(scores[i])) for i in top]
+
+    def row(self, i: int) -> dict:
+        return {"id": self.ids[i], "snippet": self.snippets[i],
+                "token_count": int(self.token_counts[i]),
+                "category": self.categories[self.category_codes[i]]}
+
+
+def write_snapshot(path: Path, ids: Sequence[str], vectors: np.ndarray,
+                   snippets: Sequence[str], token_counts: Sequence[int],
+                   categories: Sequence[str]):
+    path.mkdir(parents=True)
+    names = sorted(set(categories))
+    code = {c: i for i, c in enumerate(names)}
+    np.save(path / "vectors.npy", np.ascontiguousarray(vectors, dtype=np.float32))
+    np.save(path / "token_count.npy", np.asarray(token_counts, dtype=np.int32))
+    np.save(path / "category_codes.npy", np.asarray([code[c] for c in categories], dtype=np.int32))
+    (path / "meta.json").write_text(json.dumps(
+        {"ids": list(ids), "snippets": list(snippets), "categories": names}), encoding="utf-8")
+
+
+class SnapshotStore:
+    """Versioned snapshots under ``root`` with an atomically swapped
+    ``CURRENT`` pointer; :meth:`current` reloads when the pointer moves.
+    Subclasses set ``index_class`` and implement their own ``update``."""
+
+    index_class = VectorIndex
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._index: Optional[VectorIndex] = None
+        self._pointer_stamp = None
+
+    @property
+    def _pointer(self) -> Path:
+        return self.root / "CURRENT"
+
+    def current(self) -> Optional[VectorIndex]:
+        try:
+            st = self._pointer.stat()
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns)      # os.replace gives a new inode
+        if stamp != self._pointer_stamp:
+            with self._lock:
+                if stamp != self._pointer_stamp:
+                    name = self._pointer.read_text(encoding="utf-8").strip()
+                    self._index = self.index_class(self.root / name)
+                    self._pointer_stamp = stamp
+        return self._index
+
+    def update(self, upserts: Iterable[Tuple[str, np.ndarray, dict]] = (),
+               deletes: Iterable[str] = ()) -> VectorIndex:
+        """Write a new snapshot = current rows − ``deletes`` − replaced ids +
+        ``upserts`` (id, vector, {snippet, token_count, category}), then
+        make it live."""
+        upserts = list(upserts)
+        drop = set(deletes) | {uid for uid, _, _ in upserts}
+        ids, vecs, snippets, counts, cats = [], [], [], [], []
+        base = self.current()
+        if base is not None:
+            keep = [i for i, uid in enumerate(base.ids) if uid not in drop]
+            ids += [base.ids[i] for i in keep]
+            snippets += [base.snippets[i] for i in keep]
+            counts += base.token_counts[keep].tolist()
+            cats += [base.categories[c] for c in base.category_codes[keep]]
+            vecs.append(np.asarray(base.vectors[keep]))
+        for uid, vec, row in upserts:
+            ids.append(uid)
+            snippets.append(row["snippet"])
+            counts.append(int(row["token_count"]))
+            cats.append(row["category"])
+        if upserts:
+            vecs.append(np.vstack([vec for _, vec, _ in upserts]).astype(np.float32))
+        vecs = [v for v in vecs if len(v)]
+        dim = vecs[0].shape[1] if vecs else 0
+        matrix = np.vstack(vecs) if vecs else np.zeros((0, dim), dtype=np.float32)
+
+        return self._publish(lambda path: write_snapshot(path, ids, matrix, snippets, counts, cats))
+
+    def _publish(self, write: Callable[[Path], None]):
+        """Write a fresh snapshot directory with ``write`` and make it live."""
+        name = f"snap-{time.time_ns()}"
+        write(self.root / name)
+        tmp = self.root / "CURRENT.tmp"
+        tmp.write_text(name, encoding="utf-8")
+        os.replace(tmp, self._pointer)
+        self._prune(keep=name)
+        return self.current()
+
+    def _prune(self, keep: str):
+        snaps = sorted((p for p in self.root.glob("snap-*") if p.is_dir()),
+                       key=lambda p: int(p.name.split("-")[1]))
+        for old in snaps[:-KEEP_SNAPSHOTS]:
+            if old.name != keep:
+                shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,147 @@
+"""train_intent.py – distil the NLI intent classifier into a small model
+-----------------------------------------------------------------------
+Labels a query corpus with the current classifier (keyword rules + NLI),
+adds the gold examples from evaluation/test_data.py and
+evaluation/intent_test_data.json, embeds everything with tools.embedder
+and fits a softmax-regression head (tools.intent_model). The artifact is
+served by intent_emotion_router with INTENT_DISTILLED=1. With --holdout
+the saved model is the one fitted without the stratified holdout, whose
+queries are stored in the artifact for evaluation/intent_accuracy.py.
+Run:
+  python src/train_intent.py --corpus queries.txt more_queries.jsonl
+"""
+import argparse
+import json
+import logging
+import random
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from intent_emotion_router import (
+    DISTILLED_MIN_CONFIDENCE, DISTILLED_MODEL_PATH, EXAMPLES_PATH,
+    _labelled_examples, classify_intent_staged,
+)
+from tools.embedder import EMBED_MODEL, embed
+from tools.intent_model import IntentModel, fit
+
+GOLD_JSON = EXAMPLES_PATH.parent / "intent_test_data.json"
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)-8s | %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def read_corpus(paths) -> List[str]:
+    """Queries from .txt (one per line), .json lists or .jsonl lines
+    (strings or objects with a query / message field)."""
+    queries = []
+    for path in map(Path, paths):
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".txt":
+            items = text.splitlines()
+        elif path.suffix == ".jsonl":
+            items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            items = json.loads(text)
+        for item in items:
+            q = item if isinstance(item, str) else item.get("query") or item.get("message")
+            if q and q.strip():
+                queries.append(q.strip())
+    return queries
+
+
+def gold_examples() -> List[Tuple[str, str]]:
+    gold = list(_labelled_examples())
+    if GOLD_JSON.exists():
+        gold += [(ex["query"], ex["intent"]) for ex in json.loads(GOLD_JSON.read_text("utf-8"))]
+    return list(dict(gold).items())               # later duplicates win
+
+
+def teacher_labels(queries: List[str]) -> List[Tuple[str, str]]:
+    """(query, intent) from the keyword + NLI classifier, no cascade."""
+    labelled = []
+    for n, q in enumerate(queries, 1):
+        labelled.append((q, classify_intent_staged(q)[0]))
+        if n % 100 == 0:
+            logger.info("Labelled %d/%d corpus queries", n, len(queries))
+    return labelled
+
+
+def split(n: int, labels: List[str], holdout: float, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Stratified train / holdout row indices."""
+    rng = random.Random(seed)
+    train, test = [], []
+    for label in set(labels):
+        rows = [i for i in range(n) if labels[i] == label]
+        rng.shuffle(rows)
+        cut = int(round(len(rows) * holdout))
+        test += rows[:cut]
+        train += rows[cut:]
+    return np.array(sorted(train)), np.array(sorted(test))
+
+
+def report(model: IntentModel, vectors: np.ndarray, labels: List[str], gold: np.ndarray,
+           min_confidence: float):
+    probs = model.predict_proba(vectors)
+    pred = np.array(model.labels)[probs.argmax(axis=1)]
+    conf = probs.max(axis=1)
+    truth = np.array(labels)
+    confident = conf >= min_confidence
+    for name, rows in (("gold", gold), ("NLI-labelled", ~gold)):
+        if rows.any():
+            logger.info("Holdout %-12s accuracy %.3f on %d queries", name,
+                        (pred[rows] == truth[rows]).mean(), rows.sum())
+    if confident.any():
+        logger.info("At confidence >= %.2f: %.0f%% answered without NLI, accuracy %.3f",
+                    min_confidence, 100 * confident.mean(),
+                    (pred[confident] == truth[confident]).mean())
+
+
+def main(corpus, output: Path, holdout: float, gold_weight: float, seed: int):
+    gold = gold_examples()
+    gold_queries = {q for q, _ in gold}
+    unlabelled = [q for q in dict.fromkeys(read_corpus(corpus)) if q not in gold_queries]
+    logger.info("%d gold examples, labelling %d corpus queries with NLI", len(gold), len(unlabelled))
+    examples = gold + teacher_labels(unlabelled)
+    texts, labels = [q for q, _ in examples], [l for _, l in examples]
+    is_gold = np.arange(len(examples)) < len(gold)
+    weights = np.where(is_gold, gold_weight, 1.0)
+    logger.info("Training set: %s", dict(Counter(labels)))
+
+    vectors = embed(texts)
+    if holdout > 0:
+        # the holdout stays unseen, so its queries can score the saved model
+        train, test = split(len(texts), labels, holdout, seed)
+        model = fit(vectors[train], [labels[i] for i in train], EMBED_MODEL,
+                    sample_weight=weights[train])
+        model.holdout = tuple(texts[i] for i in test)
+        report(model, vectors[test], [labels[i] for i in test], is_gold[test],
+               DISTILLED_MIN_CONFIDENCE)
+    else:
+        model = fit(vectors, labels, EMBED_MODEL, sample_weight=weights)
+    model.save(output)
+    start = time.perf_counter()
+    for v in vectors:
+        model.predict(v)
+    per_query_us = (time.perf_counter() - start) / len(vectors) * 1e6
+    logger.info("Saved %s (%s); %.1f µs per prediction after the query embedding",
+                output, ", ".join(model.labels), per_query_us)
+
+
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distil the NLI intent classifier.")
+    parser.add_argument("--corpus", nargs="*", default=[],
+                        help="Query files (.txt / .json / .jsonl) to label with the NLI classifier")
+    parser.add_argument("--output", type=Path, default=DISTILLED_MODEL_PATH)
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="Stratified share held out of training for the accuracy report "
+                             "and intent_accuracy.py (0 = train on everything)")
+    parser.add_argument("--gold-weight", type=float, default=2.0,
+                        help="Sample weight of gold examples relative to NLI-labelled ones")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.corpus, args.output, args.holdout, args.gold_weight, args.seed)
@@ -1,6 +1,7 @@
 let typingInterval;
 let typingEl;
 let latencies = [];
+let firstTokenLatencies = [];
 let statsEl;
 
 async function sendMessage() {
@@ -15,27 +16,49 @@ async function sendMessage() {
   showTypingIndicator();
 
   const startTime = performance.now();
+  let firstTokenTime = null;
+  let botEl = null;
+  let reply = "";
 
   try {
-    const res = await fetch("/chat", {
+    const res = await fetch("/chat/stream", {
       method : "POST",
       headers: { "Content-Type": "application/json" },
       body   : JSON.stringify({ message })
     });
-    if (!res.ok) throw new Error("Network response was not ok");
-    const data = await res.json();
+    if (!res.ok || !res.body) throw new Error("Network response was not ok");
+
+    // Render tokens as Server-Sent Events arrive
+    await readEvents(res.body, (event, data) => {
+      if (event === "error") throw new Error(data.error || "Stream error");
+      if (event !== "message" || !data.token) return;
+      if (firstTokenTime === null) {
+        firstTokenTime = performance.now();
+        hideTypingIndicator();
+        botEl = appendMessage("", "bot");
+      }
+      reply += data.token;
+      botEl.textContent = reply.trimStart();
+      scrollToBottom();
+    });
 
     const endTime = performance.now();
-    recordLatency(endTime - startTime);
+    recordLatency(endTime - startTime, firstTokenTime && firstTokenTime - startTime);
 
     hideTypingIndicator();
-    appendMessage(data.reply || "Hmm … I couldn’t generate a reply.", "bot");
+    if (!reply.trim()) {
+      if (botEl) botEl.remove();
+      appendMessage("Hmm … I couldn’t generate a reply.", "bot");
+    }
   } catch (err) {
     const endTime = performance.now();
-    recordLatency(endTime - startTime);
+    recordLatency(endTime - startTime, firstTokenTime && firstTokenTime - startTime);
 
     hideTypingIndicator();
-    appendMessage("Sorry, I couldn’t reach the server.", "bot");
+    if (!reply) {
+      if (botEl) botEl.remove();
+      appendMessage("Sorry, I couldn’t reach the server.", "bot");
+    }
     console.error(err);
   } finally {
     input.disabled = false;
@@ -43,12 +66,44 @@ async function sendMessage() {
   }
 }
 
-function recordLatency(latency) {
+async function readEvents(body, onEvent) {
+  // Minimal SSE parser over a fetch() body stream
+  const reader  = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      let event = "message";
+      const dataLines = [];
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+      }
+      if (event === "done") return;
+      onEvent(event, dataLines.length ? JSON.parse(dataLines.join("\n")) : {});
+    }
+  }
+}
+
+function recordLatency(latency, firstToken) {
   latencies.push(latency);
   const avg = latencies.reduce((sum, t) => sum + t, 0) / latencies.length;
+  let text = `Response time: ${latency.toFixed(0)} ms (avg: ${avg.toFixed(0)} ms)`;
+  if (firstToken) {
+    firstTokenLatencies.push(firstToken);
+    const avgFirst = firstTokenLatencies.reduce((sum, t) => sum + t, 0) / firstTokenLatencies.length;
+    text += ` · First token: ${firstToken.toFixed(0)} ms (avg: ${avgFirst.toFixed(0)} ms)`;
+  }
   if (statsEl) {
-    statsEl.textContent = 
-      `Response time: ${latency.toFixed(0)} ms (avg: ${avg.toFixed(0)} ms)`;
+    statsEl.textContent = text;
   }
 }
 
@@ -83,6 +138,12 @@ function appendMessage(text, sender) {
   messageEl.textContent = text;
   chatWin.appendChild(messageEl);
   chatWin.scrollTop = chatWin.scrollHeight;
+  return messageEl;
+}
+
+function scrollToBottom() {
+  const chatWin = document.getElementById("chat-window");
+  chatWin.scrollTop = chatWin.scrollHeight;
 }
 
 function checkEnter(event) {
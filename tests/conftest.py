@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# modules are imported the way the servers and evaluation scripts import them
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "evaluation")]
@@ -0,0 +1,98 @@
+"""asgi_app routes with chat_engine's entry points replaced, so no models load."""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import asgi_app
+
+
+@pytest.fixture(autouse=True)
+def fake_chat(monkeypatch):
+    monkeypatch.setattr(asgi_app, "chat_stream", lambda msg: iter(["Hello", " there"]))
+    assert asgi_app._stream_limit.active == 0
+
+
+def scope_for(path: str, body: bytes) -> dict:
+    return {"type": "http", "method": "POST", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "headers": [(b"content-type", b"application/json")],
+            "http_version": "1.1", "scheme": "http", "server": ("test", 80),
+            "client": ("test", 1), "root_path": "", "app": asgi_app.app}
+
+
+def request(path="/chat/stream", message="hi"):
+    body = json.dumps({"message": message}).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    return scope_for(path, body), receive, asgi_app.Request(scope_for(path, body), receive)
+
+
+def test_stream_completes_and_frees_its_slot():
+    async def go():
+        transport = httpx.ASGITransport(app=asgi_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/stream", json={"message": "hi"})
+
+    resp = asyncio.run(go())
+    assert resp.status_code == 200
+    assert '"token": "Hello"' in resp.text and "event: done" in resp.text
+    assert asgi_app._stream_limit.active == 0
+
+
+def test_slot_freed_when_client_is_gone_before_the_body_starts():
+    async def go():
+        scope, receive, req = request()
+        response = await asgi_app.chat_stream_endpoint(req)
+        assert asgi_app._stream_limit.active == 1
+
+        async def send(message):
+            raise OSError("client went away")
+
+        with pytest.raises(Exception):
+            await response(scope, receive, send)
+
+    asyncio.run(go())
+    assert asgi_app._stream_limit.active == 0
+
+
+def test_slot_freed_on_disconnect_mid_stream(monkeypatch):
+    def endless(msg):
+        while True:
+            yield "token"
+
+    monkeypatch.setattr(asgi_app, "chat_stream", endless)
+
+    async def go():
+        scope, _, req = request()
+        response = await asgi_app.chat_stream_endpoint(req)
+        sent = []
+
+        async def receive():
+            while len(sent) < 3:
+                await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        await asyncio.wait_for(response(scope, receive, send), timeout=10)
+
+    asyncio.run(go())
+    assert asgi_app._stream_limit.active == 0
+
+
+def test_queue_route_reports_scheduler_stats():
+    async def go():
+        transport = httpx.ASGITransport(app=asgi_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/queue")
+
+    resp = asyncio.run(go())
+    assert resp.status_code == 200
+    assert resp.json() == asgi_app.llm_scheduler.stats()
@@ -0,0 +1,120 @@
+"""chat_engine's concurrent pipeline with every model and retriever stubbed."""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.documents import Document
+
+import chat_engine
+from tools.response_cache import ResponseCache
+
+STAGE_S = 0.2
+GENERATE, RECORD_TURN = chat_engine._generate, chat_engine._record_turn
+
+
+@pytest.fixture(autouse=True)
+def stubbed(monkeypatch):
+    docs = [Document(page_content="Bezza from RM 34,580", metadata={"category": "Sales"})] * 3
+    monkeypatch.setattr(chat_engine, "_ensure_ready", lambda: None)
+    monkeypatch.setattr(chat_engine, "reply_cache", None)
+    monkeypatch.setattr(chat_engine, "PIPELINE_MODE", "concurrent")
+    monkeypatch.setattr(chat_engine, "classify_intent", lambda msg: "SalesInquiry")
+    monkeypatch.setattr(chat_engine, "detect_emotion", lambda msg: time.sleep(STAGE_S) or "neutral")
+    monkeypatch.setattr(chat_engine, "_retrieve", lambda msg, category: time.sleep(STAGE_S) or docs)
+    monkeypatch.setattr(chat_engine, "_generate", lambda prompt, deadline, timings: ("reply", 1))
+    monkeypatch.setattr(chat_engine, "_record_turn", lambda *args, **kwargs: None)
+    yield
+    chat_engine._new_stage_pool()
+
+
+def use_stage_pool(monkeypatch, workers):
+    monkeypatch.setattr(chat_engine, "STAGE_POOL_WORKERS", workers)
+    chat_engine._new_stage_pool()
+
+
+def burst(n):
+    barrier = threading.Barrier(n)
+
+    def chat(i):
+        barrier.wait()
+        return chat_engine.chat_once(f"bezza price {i}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        replies = list(pool.map(chat, range(n)))
+    return replies, time.perf_counter() - start
+
+
+def test_stages_overlap_when_the_pool_has_room(monkeypatch):
+    use_stage_pool(monkeypatch, 2)
+    start = time.perf_counter()
+    assert chat_engine.chat_once("bezza price") == "reply"
+    assert time.perf_counter() - start < 1.5 * STAGE_S      # emotion and retrieval side by side
+
+
+def test_saturated_pool_runs_stages_inline_instead_of_queueing(monkeypatch):
+    use_stage_pool(monkeypatch, 4)                          # room for two chats' stages
+    replies, elapsed = burst(8)
+    assert replies == ["reply"] * 8
+    # queueing 16 stages on 4 threads would take 4 × STAGE_S; inline chats take 2 × STAGE_S
+    assert elapsed < 3 * STAGE_S
+    assert chat_engine._reserve_stage_slots(4) is not None  # every slot was given back
+
+
+def test_exact_cache_hit_runs_no_model(monkeypatch):
+    def unexpected(*args):
+        raise AssertionError("model stage ran on a cache hit")
+
+    monkeypatch.setattr(chat_engine, "reply_cache", ResponseCache())
+    assert chat_engine.chat_once("Bezza price?") == "reply"
+    for stage in ("classify_intent", "detect_emotion", "_retrieve", "_generate"):
+        monkeypatch.setattr(chat_engine, stage, unexpected)
+    assert chat_engine.chat_once("bezza  PRICE") == "reply"
+    assert "".join(chat_engine.chat_stream("bezza price")) == "reply"
+    assert asyncio.run(chat_engine.achat_once("Bezza price")) == "reply"
+    assert chat_engine.reply_cache.stats()["hits_exact"] == 3
+
+
+def test_token_metrics_need_no_tokenizer(monkeypatch, caplog):
+    class NoTokenizer:
+        def tokenize(self, text):
+            raise AssertionError("tokenized on the request path")
+
+    monkeypatch.setattr(chat_engine, "llm", NoTokenizer())
+    monkeypatch.setattr(chat_engine, "template_tokens", 500)
+    monkeypatch.setattr(chat_engine, "_llm_stream", lambda prompt, deadline, timings: iter(["Hel", "lo"]))
+    monkeypatch.setattr(chat_engine, "_generate", GENERATE)
+    monkeypatch.setattr(chat_engine, "_record_turn", RECORD_TURN)
+    monkeypatch.setattr(chat_engine, "TIMING_LOG", "json")
+    with caplog.at_level("INFO", logger="chat_engine"):
+        assert chat_engine.chat_once("bezza price") == "Hello"
+    turn = json.loads(caplog.records[-1].getMessage())
+    # template + the Sales snippets that fit (estimated, no token_count) + the short fields
+    assert turn["prompt_tokens"] > 500
+    assert turn["generated_tokens"] == 2
+
+
+def test_async_chats_do_not_hold_up_stage_pool_chats(monkeypatch):
+    use_stage_pool(monkeypatch, 2)
+
+    async def aretrieve(class_name, msg, category, k):
+        await asyncio.sleep(STAGE_S)
+        return [Document(page_content="Bezza from RM 34,580", metadata={"category": "Sales"})] * 3
+    monkeypatch.setattr(chat_engine, "aretrieve", aretrieve)
+
+    async def go():
+        chats = [asyncio.ensure_future(chat_engine.achat_once(f"bezza {i}")) for i in range(4)]
+        await asyncio.sleep(STAGE_S / 4)                    # their emotion stages are running
+        start = time.perf_counter()
+        reply = await asyncio.to_thread(chat_engine.chat_once, "bezza price")
+        elapsed = time.perf_counter() - start
+        await asyncio.gather(*chats)
+        return reply, elapsed
+
+    reply, elapsed = asyncio.run(go())
+    assert reply == "reply"
+    # behind four queued emotion stages on two threads it would take 3 × STAGE_S
+    assert elapsed < 1.5 * STAGE_S
@@ -0,0 +1,156 @@
+"""Concurrent crawler (kb_ingest.crawl_stream) against the local fixture
+server of evaluation/crawl_benchmark.py. The browser is replaced by a
+plain HTTP fetch, so the throttle, retry and concurrency logic run
+unchanged without Playwright."""
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import kb_ingest
+from crawl_benchmark import FixtureServer, fixture_urls
+from kb_ingest import crawl
+
+
+class HttpCrawler:
+    """Stand-in for crawl4ai's AsyncWebCrawler: GET the page, body as markdown.
+    Tracks how many fetches are in flight at once and when each started."""
+
+    in_flight = peak = 0
+    started: list = []
+
+    async def __aenter__(self):
+        self._http = httpx.AsyncClient(timeout=10.0)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._http.aclose()
+
+    async def arun(self, url, config=None):
+        cls = type(self)
+        cls.started.append((kb_ingest.domain_from_url(url), asyncio.get_running_loop().time()))
+        cls.in_flight += 1
+        cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            resp = await self._http.get(url)
+        finally:
+            cls.in_flight -= 1
+        ok = resp.status_code < 400
+        return SimpleNamespace(success=ok, status_code=resp.status_code,
+                               markdown=resp.text if ok else None,
+                               response_headers=dict(resp.headers),
+                               error_message=None if ok else f"HTTP {resp.status_code}")
+
+
+@pytest.fixture(autouse=True)
+def http_crawler(monkeypatch):
+    HttpCrawler.in_flight = HttpCrawler.peak = 0
+    HttpCrawler.started = []
+    monkeypatch.setattr(kb_ingest, "AsyncWebCrawler", HttpCrawler)
+
+
+def run(urls, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return asyncio.run(crawl(urls, output=None, **kwargs))
+
+
+def test_every_page_is_crawled_with_bounded_concurrency():
+    server = FixtureServer(latency_ms=50, flaky_every=0)
+    try:
+        urls = fixture_urls(server.port, 24)
+        pages, stats = run(urls, concurrency=4, domain_rps=0)
+    finally:
+        server.close()
+    assert sorted(p.url for p in pages) == sorted(urls)
+    assert all(f"MARKER-{p.url.rsplit('/', 1)[1]} " in p.markdown for p in pages)
+    assert stats["done"] == 24 and stats["failed"] == 0
+    assert HttpCrawler.peak == 4
+
+
+def test_concurrency_speeds_up_slow_pages():
+    server = FixtureServer(latency_ms=100, flaky_every=0)
+    try:
+        urls = fixture_urls(server.port, 12)
+        _, serial = run(urls, concurrency=1, domain_rps=0)
+        _, parallel = run(urls, concurrency=6, domain_rps=0)
+    finally:
+        server.close()
+    assert parallel["elapsed_s"] < serial["elapsed_s"] / 2
+
+
+def test_domain_rate_limit_spaces_requests():
+    rps = 10
+    server = FixtureServer(latency_ms=0, flaky_every=0)
+    try:
+        pages, stats = run(fixture_urls(server.port, 16), concurrency=8, domain_rps=rps)
+    finally:
+        server.close()
+    assert len(pages) == 16
+    starts = {}
+    for domain, t in HttpCrawler.started:
+        starts.setdefault(domain, []).append(t)
+    assert set(starts) == {"127.0.0.1", "localhost"}    # two domains, throttled separately
+    for times in starts.values():
+        gaps = [b - a for a, b in zip(sorted(times), sorted(times)[1:])]
+        assert min(gaps) >= 0.95 / rps                  # event loop timer jitter allowance
+    assert stats["elapsed_s"] < 8 / rps + 0.5          # the two domains were crawled side by side
+
+
+def test_throttle_does_not_hold_up_other_domains():
+    async def go():
+        throttle = kb_ingest.DomainThrottle(rps=2)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await throttle.wait("a.example")
+        await throttle.wait("b.example")
+        first_b = loop.time() - start
+        await throttle.wait("a.example")
+        return first_b, loop.time() - start
+
+    first_b, second_a = asyncio.run(go())
+    assert first_b < 0.1
+    assert second_a >= 0.45
+
+
+def test_transient_failures_are_retried():
+    server = FixtureServer(latency_ms=0, flaky_every=3)   # first request for 0, 3, 6… is a 503
+    try:
+        pages, stats = run(fixture_urls(server.port, 10), concurrency=4, domain_rps=0, retries=2)
+        retried = set(server.failed_once)
+        hits = [path for _, path, _ in server.hits]
+    finally:
+        server.close()
+    assert retried == {0, 3, 6, 9}
+    assert all(p.markdown for p in pages) and stats["failed"] == 0
+    assert all(hits.count(f"/page/{n}") == 2 for n in retried)
+
+
+def test_gives_up_after_retries():
+    server = FixtureServer(latency_ms=0, flaky_every=2)
+    try:
+        pages, stats = run(fixture_urls(server.port, 4), concurrency=2, domain_rps=0, retries=0)
+    finally:
+        server.close()
+    failed = sorted(p.url.rsplit("/", 1)[1] for p in pages if p.markdown is None)
+    assert failed == ["0", "2"] and stats["failed"] == 2
+
+
+def test_gone_and_not_modified_pages():
+    server = FixtureServer(latency_ms=0, flaky_every=0)
+    try:
+        urls = fixture_urls(server.port, 4)
+        first, _ = run(urls, concurrency=2, domain_rps=0)
+        validators = {p.url: {"etag": p.etag} for p in first}
+        server.removed.add(1)
+        server.versions[2] += 1
+        second, stats = run(urls, concurrency=2, domain_rps=0, validators=validators)
+        hits_404 = [path for _, path, _ in server.hits].count("/page/1")
+    finally:
+        server.close()
+    by_page = {int(p.url.rsplit("/", 1)[1]): p for p in second}
+    assert by_page[0].not_modified and by_page[3].not_modified
+    assert by_page[1].gone and by_page[1].markdown is None
+    assert "VERSION-1" in by_page[2].markdown
+    assert stats["not_modified"] == 2
+    assert hits_404 == 3                                # first crawl, conditional GET, one final 404
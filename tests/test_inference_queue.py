@@ -0,0 +1,38 @@
+import threading
+import time
+
+from tools.inference_queue import InferenceScheduler
+
+SERVICE_S = 0.2
+
+
+def slow_model(prompt, stream=False, **kwargs):
+    time.sleep(SERVICE_S)
+    return iter([prompt]) if stream else prompt
+
+
+def test_on_start_reports_queue_wait_not_generation():
+    scheduler = InferenceScheduler([slow_model], max_queue=4)
+    waits = {}
+
+    def call(name):
+        start = time.monotonic()
+        assert scheduler.generate(name, on_start=lambda w: waits.__setitem__(name, w)) == name
+        waits[name + "_total"] = time.monotonic() - start
+
+    first = threading.Thread(target=call, args=("a",))
+    first.start()
+    time.sleep(0.02)                    # "b" queues behind "a" on the only worker
+    call("b")
+    first.join()
+
+    assert waits["a"] < 0.05
+    assert SERVICE_S * 0.8 < waits["b"] < SERVICE_S * 1.5
+    assert waits["b_total"] - waits["b"] < SERVICE_S * 1.5   # generation alone
+
+
+def test_stream_reports_queue_wait():
+    scheduler = InferenceScheduler([slow_model], max_queue=4)
+    waits = []
+    assert list(scheduler.stream("x", on_start=waits.append)) == ["x"]
+    assert len(waits) == 1 and waits[0] < 0.05
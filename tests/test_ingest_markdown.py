@@ -0,0 +1,46 @@
+"""kb_ingest.ingest_markdown() page splitting and manifest handling."""
+import pytest
+
+import kb_ingest
+
+
+@pytest.fixture
+def ingested(monkeypatch):
+    calls = []
+
+    def ingest_pages(pages, manifest, full=False, class_name=None):
+        calls.append((list(pages), manifest, class_name))
+        return {}
+    monkeypatch.setattr(kb_ingest, "ingest_pages", ingest_pages)
+    return calls
+
+
+def test_plain_markdown_is_one_page_of_the_given_class(ingested):
+    kb_ingest.ingest_markdown("# Bezza\n\nFrom RM 34,580.\n", "Domain_carlist_my")
+    [(pages, manifest, class_name)] = ingested
+    assert [(p.url, p.markdown) for p in pages] == [
+        ("markdown:Domain_carlist_my", "# Bezza\n\nFrom RM 34,580.")]
+    assert class_name == "Domain_carlist_my"
+    assert manifest.path is None                         # output/manifest.json untouched
+
+
+def test_dump_is_split_at_its_page_markers(ingested):
+    kb_ingest.ingest_markdown("## https://a.example/p\n\nalpha\n## https://b.example/q\nbeta\n")
+    [(pages, _, class_name)] = ingested
+    assert [(p.url, p.markdown) for p in pages] == [
+        ("https://a.example/p", "alpha"), ("https://b.example/q", "beta")]
+    assert class_name is None
+
+
+def test_plain_markdown_needs_a_class_name(ingested):
+    with pytest.raises(ValueError):
+        kb_ingest.ingest_markdown("# Bezza\n")
+    assert not ingested
+
+
+def test_in_memory_manifest_is_never_written(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manifest = kb_ingest.CrawlManifest(None)
+    manifest.pages["https://a.example/p"] = {"hash": "x"}
+    manifest.save()
+    assert list(tmp_path.iterdir()) == []
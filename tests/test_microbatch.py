@@ -0,0 +1,56 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tools.microbatch import MicroBatcher
+
+CALLERS = 64
+
+
+def run_concurrently(fn, items):
+    """Call ``fn`` on every item from its own thread, all released at once."""
+    barrier = threading.Barrier(len(items))
+
+    def call(item):
+        barrier.wait()
+        return fn(item)
+
+    with ThreadPoolExecutor(max_workers=len(items)) as pool:
+        return list(pool.map(call, items))
+
+
+def test_concurrent_callers_get_their_own_results():
+    sizes = []
+
+    def square(items):
+        sizes.append(len(items))
+        time.sleep(0.002)                   # let the queue fill behind a running batch
+        return [i * i for i in items]
+
+    batcher = MicroBatcher(square, max_batch_size=8, max_wait_ms=20)
+    assert run_concurrently(batcher.submit, list(range(CALLERS))) == [i * i for i in range(CALLERS)]
+    assert batcher.items == CALLERS
+    assert max(sizes) <= 8
+    assert batcher.batches < CALLERS        # callers were actually batched together
+
+
+def test_batch_error_reaches_every_caller_of_that_batch():
+    def process(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return list(items)
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit_async(x) for x in ("a", "bad", "c")]
+    for fut in futures:
+        with pytest.raises(ValueError):
+            fut.result(timeout=5)
+    assert batcher.submit("d") == "d"       # the worker survives a failed batch
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=2, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="0 results for 1 items"):
+        batcher.submit("x")
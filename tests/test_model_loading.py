@@ -0,0 +1,39 @@
+"""chat_engine.load_models() with every model stubbed: which components load."""
+import pytest
+
+import chat_engine
+from tools.inference_queue import InferenceScheduler
+from tools.llm_loader import LLMSettings, StubBackend
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    embedded = []
+    monkeypatch.setattr(chat_engine, "load_llm",
+                        lambda prompt_prefix=None: StubBackend(LLMSettings(stub_tokens_per_sec=0)))
+    monkeypatch.setattr(chat_engine, "nli_intent", lambda msg: "SalesInquiry")
+    monkeypatch.setattr(chat_engine, "detect_emotion_many", lambda msgs: ["neutral"] * len(msgs))
+    monkeypatch.setattr(chat_engine, "embed_query", lambda text: embedded.append(text))
+    monkeypatch.setattr(chat_engine, "llm_scheduler", InferenceScheduler(max_queue=1))
+    monkeypatch.setattr(chat_engine, "llm", None)
+    monkeypatch.setattr(chat_engine, "_ready", chat_engine.threading.Event())
+    monkeypatch.setattr(chat_engine, "load_status",
+                        {"state": "idle", "components": {}, "error": None})
+    return embedded
+
+
+def test_default_flags_load_without_the_embedder(stub_models):
+    assert chat_engine.reply_cache is not None             # RESPONSE_CACHE is on by default
+    chat_engine.load_models()
+    assert chat_engine.is_ready()
+    assert chat_engine.load_status["state"] == "ready"
+    needs_embedder = chat_engine.EMBEDS_LOCALLY or chat_engine.INTENT_CASCADE \
+        or chat_engine.INTENT_DISTILLED
+    assert ("embedder" in chat_engine.load_status["components"]) == needs_embedder
+
+
+def test_semantic_reply_cache_loads_the_embedder(stub_models, monkeypatch):
+    monkeypatch.setattr(chat_engine, "RESPONSE_CACHE_SEMANTIC", True)
+    chat_engine.load_models()
+    assert chat_engine.load_status["components"]["embedder"].startswith("ready")
+    assert stub_models == [chat_engine.WARM_UP_MESSAGE]
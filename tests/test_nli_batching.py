@@ -0,0 +1,106 @@
+"""Batched NLI scoring (one padded forward pass over many message /
+hypothesis pairs) must match scoring every pair on its own. The NLI model
+is replaced by a small deterministic fake that, like the real one,
+ignores padding through the attention mask."""
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+import intent_emotion_router as router
+from tools.microbatch import MicroBatcher
+
+VOCAB, DIM = 997, 16
+MESSAGES = [
+    "What's the price of the Bezza 1.3 Premium?",
+    "my password reset link is broken",
+    "Compare the fuel consumption of the City and the Vios",
+    "hello",
+    "Do you have a white Myvi in stock near Shah Alam for a test drive this weekend?",
+]
+
+
+def _token(word: str) -> int:
+    return zlib.crc32(word.encode()) % (VOCAB - 1) + 1      # 0 is padding
+
+
+class FakeTokenizer:
+    def __call__(self, premises, hypotheses, padding=True, truncation=True, return_tensors="pt"):
+        rows = [[(_token(w), 0) for w in p.lower().split()] + [(_token(w), 1) for w in h.lower().split()]
+                for p, h in zip(premises, hypotheses)]
+        width = max(map(len, rows))
+        ids = torch.zeros(len(rows), width, dtype=torch.long)
+        types = torch.zeros_like(ids)
+        mask = torch.zeros_like(ids)
+        for i, row in enumerate(rows):
+            ids[i, :len(row)] = torch.tensor([t for t, _ in row])
+            types[i, :len(row)] = torch.tensor([s for _, s in row])
+            mask[i, :len(row)] = 1
+        return {"input_ids": ids, "token_type_ids": types, "attention_mask": mask}
+
+
+class FakeNLIModel:
+    config = SimpleNamespace(label2id={"CONTRADICTION": 0, "NEUTRAL": 1, "ENTAILMENT": 2})
+
+    def __init__(self):
+        gen = torch.Generator().manual_seed(0)
+        self.embedding = torch.randn(VOCAB, DIM, generator=gen)
+        self.head = torch.randn(DIM, 3, generator=gen)
+
+    def __call__(self, input_ids, token_type_ids, attention_mask):
+        vectors = self.embedding[input_ids]
+        premise = ((token_type_ids == 0) & (attention_mask == 1)).unsqueeze(-1).float()
+        hypothesis = ((token_type_ids == 1) & (attention_mask == 1)).unsqueeze(-1).float()
+        p = (vectors * premise).sum(1) / premise.sum(1)
+        h = (vectors * hypothesis).sum(1) / hypothesis.sum(1)
+        return SimpleNamespace(logits=(p * h) @ self.head)
+
+
+@pytest.fixture(autouse=True)
+def fake_nli(monkeypatch):
+    pipe = SimpleNamespace(tokenizer=FakeTokenizer(), model=FakeNLIModel(), device="cpu")
+    monkeypatch.setattr(router, "_intent_pipe", lambda: pipe)
+
+
+def per_label(msg):
+    """Reference: every hypothesis scored in its own forward pass."""
+    scores = [router.nli_entailment([(msg, hyp)], batch_size=1)[0]
+              for _, hyp in router._hypothesis_index()]
+    return router._best_hypothesis(scores)
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 64, 1000])
+def test_batched_scores_match_per_pair(batch_size):
+    pairs = [(m, hyp) for m in MESSAGES for _, hyp in router._hypothesis_index()]
+    single = [router.nli_entailment([pair], batch_size=1)[0] for pair in pairs]
+    assert router.nli_entailment(pairs, batch_size=batch_size) == pytest.approx(single, rel=1e-5)
+
+
+def test_nli_intent_many_matches_per_label_scoring():
+    batched = router.nli_intent_many(MESSAGES, batch_size=32)
+    for msg, (intent, score) in zip(MESSAGES, batched):
+        ref_intent, ref_score = per_label(msg)
+        assert intent == ref_intent
+        assert score == pytest.approx(ref_score, rel=1e-5)
+    assert router.nli_intent(MESSAGES[0]) == batched[0]
+
+
+def test_micro_batched_intents_match_direct_calls():
+    msgs = [f"{MESSAGES[i % len(MESSAGES)]} #{i}" for i in range(40)]
+    expected = {m: router.nli_intent(m) for m in msgs}
+    batcher = MicroBatcher(router.nli_intent_many, max_batch_size=8, max_wait_ms=20)
+    barrier = threading.Barrier(len(msgs))
+
+    def classify(msg):
+        barrier.wait()
+        return msg, batcher.submit(msg)
+
+    with ThreadPoolExecutor(max_workers=len(msgs)) as pool:
+        results = dict(pool.map(classify, msgs))
+    for msg in msgs:
+        assert results[msg][0] == expected[msg][0]
+        assert results[msg][1] == pytest.approx(expected[msg][1], rel=1e-5)
+    assert batcher.batches < len(msgs)
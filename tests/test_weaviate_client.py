@@ -0,0 +1,104 @@
+"""Shared Weaviate client and retriever cache (kb_ingest) against the
+in-memory fake server from evaluation/fake_weaviate.py."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import kb_ingest
+from fake_weaviate import FakeWeaviate
+
+CLASS_NAME = "Domain_fake_local"
+DOCS = [
+    {"content": "The Perodua Bezza 1.3 Premium X is priced from RM 49,980.", "category": "Sales"},
+    {"content": "To reset your password, open Account > Security and choose Reset.", "category": "Support"},
+    {"content": "The Honda City uses a 1.5 litre i-VTEC engine with CVT.", "category": "Specs"},
+]
+for d in DOCS:
+    d.update(snippet=d["content"], token_count=len(d["content"]) // 4, headers=[])
+
+
+def serve():
+    fake = FakeWeaviate().__enter__()
+    fake.schema[CLASS_NAME] = {"class": CLASS_NAME, "properties": [
+        {"name": n} for n in ("content", "snippet", "token_count", "category", "headers")]}
+    fake.add_objects(CLASS_NAME, DOCS)
+    return fake
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    server = serve()
+    monkeypatch.setenv("WEAVIATE_URL", server.url)
+    monkeypatch.setattr(kb_ingest, "RETRIEVER_BACKEND", "weaviate")
+    monkeypatch.setattr(kb_ingest, "CLIENT_EMBEDDINGS", False)
+    monkeypatch.setattr(kb_ingest, "EMBEDS_LOCALLY", False)
+    monkeypatch.setattr(kb_ingest, "TERM_INDEX", False)
+    kb_ingest.reset_weaviate_client()
+    yield server
+    kb_ingest.reset_weaviate_client()
+    server.__exit__(None, None, None)
+
+
+def test_client_and_retrievers_are_shared(fake):
+    client = kb_ingest.get_weaviate_client()
+    assert kb_ingest.get_weaviate_client() is client
+    retriever = kb_ingest.build_retriever(CLASS_NAME)
+    assert kb_ingest.build_retriever(CLASS_NAME) is retriever
+    assert kb_ingest.build_retriever(CLASS_NAME, category="Sales") is not retriever
+    docs = kb_ingest.build_retriever(CLASS_NAME, category="Sales").invoke("bezza price")
+    assert [d.metadata["category"] for d in docs] == ["Sales"]
+
+
+def test_concurrent_retrievals_reuse_connections(fake):
+    callers, n = 8, 120
+    kb_ingest.build_retriever(CLASS_NAME).invoke("warm up")   # client construction opens its own
+    opened = fake.connections
+    barrier = threading.Barrier(callers)
+
+    def retrieve(i):
+        if i < callers:
+            barrier.wait()
+        return kb_ingest.build_retriever(CLASS_NAME).invoke(("bezza", "password", "engine")[i % 3])
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(retrieve, range(n)))
+    assert all(results)
+    assert fake.connections - opened <= callers       # at most one keep-alive connection per thread
+
+
+def test_health_check_interval_limits_probes(fake, monkeypatch):
+    monkeypatch.setattr(kb_ingest, "HEALTH_CHECK_INTERVAL", 3600)
+    client = kb_ingest.get_weaviate_client()
+    requests = fake.requests
+    for _ in range(20):
+        assert kb_ingest.get_weaviate_client() is client
+    assert fake.requests == requests                  # no readiness probe inside the interval
+
+
+def test_reconnects_when_weaviate_goes_away(fake, monkeypatch):
+    monkeypatch.setattr(kb_ingest, "HEALTH_CHECK_INTERVAL", 0)
+    client = kb_ingest.get_weaviate_client()
+    retriever = kb_ingest.build_retriever(CLASS_NAME)
+    assert kb_ingest.get_weaviate_client() is client  # healthy: kept
+
+    replacement = serve()
+    try:
+        fake.__exit__(None, None, None)               # old server gone, new one elsewhere
+        monkeypatch.setenv("WEAVIATE_URL", replacement.url)
+        new_client = kb_ingest.get_weaviate_client()
+        assert new_client is not client
+        new_retriever = kb_ingest.build_retriever(CLASS_NAME)
+        assert new_retriever is not retriever         # cache dropped with the old client
+        assert new_retriever.invoke("password reset")
+        assert replacement.requests > 0
+    finally:
+        replacement.__exit__(None, None, None)
+
+
+def test_reset_drops_client_and_retrievers(fake):
+    client = kb_ingest.get_weaviate_client()
+    retriever = kb_ingest.build_retriever(CLASS_NAME)
+    kb_ingest.reset_weaviate_client()
+    assert kb_ingest.get_weaviate_client() is not client
+    assert kb_ingest.build_retriever(CLASS_NAME) is not retriever